@@ -0,0 +1,148 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from entry_index import PATIENT_COLUMN
+
+# ========== ANALYTICS CONFIG ==========
+ROLLING_WINDOWS = (7, 30)
+SLEEP_TARGET_HOURS = 8.0
+# Weight change rate is the change in the 7-day average over this many days,
+# expressed per week.
+WEIGHT_RATE_DAYS = 28
+# The furthest back any metric looks: the 7-day average shifted by
+# WEIGHT_RATE_DAYS. An incremental update recomputes from this far before the
+# first changed day, so every recomputed value sees its full window.
+LOOKBACK_DAYS = WEIGHT_RATE_DAYS + 7
+
+METRICS = ["weight", "sleep_hours", "coffee_cups", "walking_km"]
+# How much history the doctor view charts, ending at the selected day.
+CHART_DAYS = 180
+# Patients whose trend frames are kept; the least recently viewed go first,
+# like the entries caches they are derived from.
+MAX_TREND_STATES = 64
+
+
+def _numeric(frame, column):
+    # float32 in the typed frame; widened so window sums don't lose precision.
+    return frame[column].astype("float64")
+
+
+def _last_per_day(frame):
+    # One row per day that has an entry. The day's latest submission wins
+    # whole, blank fields included, as in the entries index and daily summaries.
+    dates = frame["Date"]
+    daily = pd.DataFrame({
+        "weight": _numeric(frame, "Weight").to_numpy(),
+        "sleep_hours": (_numeric(frame, "Hours") + _numeric(frame, "Minutes").fillna(0) / 60).to_numpy(),
+        "coffee_cups": _numeric(frame, "coffee_cups").to_numpy(),
+        "walking_km": _numeric(frame, "walking_distance").to_numpy(),
+    }, index=pd.DatetimeIndex(dates.to_numpy(), name="Date"))
+    daily = daily[daily.index.notna()]
+    return daily[~daily.index.duplicated(keep="last")].sort_index(kind="stable")
+
+
+def daily_metrics(frame):
+    # One row per calendar day, gaps filled with NaN so time-based windows line
+    # up with real days. frame is a typed entries frame (schema.to_frame).
+    daily = _last_per_day(frame)
+    if daily.empty:
+        return daily
+    return daily.asfreq("D")
+
+
+def compute_trends(daily):
+    # Rolling averages, week-over-week deltas, weight change rate and sleep debt,
+    # all as column-wise window operations over the daily frame.
+    trends = daily.copy()
+    for window in ROLLING_WINDOWS:
+        averages = daily[METRICS].rolling(f"{window}D", min_periods=1).mean()
+        trends[[f"{metric}_avg_{window}d" for metric in METRICS]] = averages.to_numpy()
+
+    weekly = trends[[f"{metric}_avg_7d" for metric in METRICS]].to_numpy()
+    previous_week = trends[[f"{metric}_avg_7d" for metric in METRICS]].shift(7).to_numpy()
+    trends[[f"{metric}_wow" for metric in METRICS]] = weekly - previous_week
+
+    weight_avg = trends["weight_avg_7d"]
+    trends["weight_rate_kg_per_week"] = (weight_avg - weight_avg.shift(WEIGHT_RATE_DAYS)) / (WEIGHT_RATE_DAYS / 7)
+
+    # Hours short of the target each night; days without an entry add nothing.
+    shortfall = (SLEEP_TARGET_HOURS - daily["sleep_hours"]).clip(lower=0)
+    for window in ROLLING_WINDOWS:
+        trends[f"sleep_debt_{window}d"] = shortfall.rolling(f"{window}D", min_periods=1).sum()
+    return trends
+
+
+def _patient_rows(frame, patient):
+    if patient is None:
+        return frame
+    return frame[frame[PATIENT_COLUMN] == patient]
+
+
+def as_of(trends, day):
+    # Trend rows up to and including day, plus the last of them (None if empty).
+    history = trends.loc[:pd.Timestamp(day)] if not trends.empty else trends
+    return history, (history.iloc[-1] if not history.empty else None)
+
+
+def format_value(value, unit="", digits=1, signed=False):
+    if value is None or pd.isna(value):
+        return "n/a"
+    return f"{value:{'+' if signed else ''}.{digits}f}{unit}"
+
+
+def format_delta(value, unit="", digits=1):
+    # st.metric shows no delta for None, rather than an arrow next to "n/a".
+    if value is None or pd.isna(value):
+        return None
+    return format_value(value, unit, digits, signed=True)
+
+
+class TrendCache:
+    # Trend frames per patient, updated from only the rows appended to the
+    # entries cache since the last call. Keyed by the storage backend rather
+    # than the cache object, so an entries cache that is evicted and rebuilt
+    # replaces its state (the new generation forces a rebuild) instead of
+    # leaving it behind.
+
+    def __init__(self, max_states=MAX_TREND_STATES):
+        self._lock = threading.Lock()
+        self._states = OrderedDict()
+        self.max_states = max_states
+
+    def get(self, entries_cache, patient):
+        frame = entries_cache.get_frame()
+        key = (entries_cache.storage, entries_cache.patient, patient)
+        with self._lock:
+            state = self._states.get(key)
+            if state is None or state["generation"] != entries_cache.generation or len(frame) < state["rows_seen"]:
+                daily = daily_metrics(_patient_rows(frame, patient))
+                state = {"daily": daily, "trends": compute_trends(daily) if not daily.empty else daily}
+            elif len(frame) > state["rows_seen"]:
+                self._update(state, _patient_rows(frame.iloc[state["rows_seen"]:], patient))
+            state["generation"] = entries_cache.generation
+            state["rows_seen"] = len(frame)
+            self._states[key] = state
+            self._states.move_to_end(key)
+            while len(self._states) > self.max_states:
+                self._states.popitem(last=False)
+            return state["trends"]
+
+    def _update(self, state, new_rows):
+        new_daily = _last_per_day(new_rows)
+        if new_daily.empty:
+            return
+        first_changed = new_daily.index.min()
+        daily = pd.concat([state["daily"], new_daily])
+        daily = daily[~daily.index.duplicated(keep="last")].sort_index().asfreq("D")
+
+        # Recompute only the tail; everything before first_changed is unaffected.
+        tail = compute_trends(daily.loc[first_changed - pd.Timedelta(days=LOOKBACK_DAYS):])
+        head = state["trends"].loc[:first_changed - pd.Timedelta(days=1)] if not state["trends"].empty else state["trends"]
+        state["daily"] = daily
+        state["trends"] = pd.concat([head, tail.loc[first_changed:]]) if not head.empty else tail.loc[first_changed:]
+
+
+# Shared by every session in the process.
+trend_cache = TrendCache()
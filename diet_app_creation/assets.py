@@ -0,0 +1,100 @@
+import base64
+import functools
+import io
+import os
+import threading
+
+import metrics
+
+# ========== ASSET CONFIG ==========
+# Files written here are served by Streamlit at app/static/... when
+# server.enableStaticServing is on (see .streamlit/config.toml).
+STATIC_DIR = "diet_app_creation/static"
+STATIC_CACHE_SUBDIR = "cache"
+STATIC_URL = "app/static"
+
+# The background is shown full-screen behind a dark overlay, so a 1920px WebP
+# looks the same as the original photo at a fraction of the size.
+BACKGROUND_WIDTH = 1920
+BACKGROUND_FORMAT = "webp"  # "webp", "jpeg" (progressive) or None to keep the original file
+BACKGROUND_QUALITY = 80
+
+_MIME_TYPES = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".gif": "image/gif",
+    ".webp": "image/webp",
+}
+_write_lock = threading.Lock()
+
+
+def _static_serving_enabled():
+    import streamlit as st
+
+    try:
+        return bool(st.get_option("server.enableStaticServing"))
+    except Exception:
+        return False
+
+
+@functools.lru_cache(maxsize=16)
+@metrics.timed("image_encode")
+def _load_image(path, mtime, width, fmt, quality):
+    # Keyed on mtime so replacing the file on disk is picked up without a restart.
+    # Returns (bytes, file extension).
+    if fmt is None:
+        with open(path, "rb") as f:
+            return f.read(), os.path.splitext(path)[1].lower()
+
+    from PIL import Image
+
+    with Image.open(path) as img:
+        img = img.convert("RGB")
+        if width and img.width > width:
+            img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+        buf = io.BytesIO()
+        if fmt == "webp":
+            img.save(buf, format="WEBP", quality=quality, method=6)
+            return buf.getvalue(), ".webp"
+        img.save(buf, format="JPEG", quality=quality, optimize=True, progressive=True)
+        return buf.getvalue(), ".jpg"
+
+
+@functools.lru_cache(maxsize=16)
+@metrics.timed("image_base64")
+def _data_uri(path, mtime, width, fmt, quality):
+    data, ext = _load_image(path, mtime, width, fmt, quality)
+    return f"data:{_MIME_TYPES.get(ext, 'application/octet-stream')};base64,{base64.b64encode(data).decode()}"
+
+
+@functools.lru_cache(maxsize=16)
+def _static_url(path, mtime, width, fmt, quality):
+    data, ext = _load_image(path, mtime, width, fmt, quality)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    # Every setting that changes the bytes is in the name, so the browser never
+    # keeps showing an old variant: a JPEG re-encode and the original JPEG
+    # share an extension, as do two qualities of one format.
+    variant = "orig" if fmt is None else f"{width or 'full'}-{fmt}-q{quality}"
+    name = f"{stem}-{variant}-{int(mtime)}{ext}"
+    target_dir = os.path.join(STATIC_DIR, STATIC_CACHE_SUBDIR)
+    target = os.path.join(target_dir, name)
+    with _write_lock:
+        if not os.path.exists(target):
+            os.makedirs(target_dir, exist_ok=True)
+            tmp = target + ".tmp"
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+    return f"{STATIC_URL}/{STATIC_CACHE_SUBDIR}/{name}"
+
+
+@metrics.timed("image_url")
+def image_url(path, width=BACKGROUND_WIDTH, fmt=BACKGROUND_FORMAT, quality=BACKGROUND_QUALITY):
+    # A short app/static/... reference when static serving is on, so the browser
+    # downloads and caches the image once. Otherwise an inline data URI, which is
+    # still encoded only once per process.
+    mtime = os.path.getmtime(path)
+    if _static_serving_enabled():
+        return _static_url(path, mtime, width, fmt, quality)
+    return _data_uri(path, mtime, width, fmt, quality)
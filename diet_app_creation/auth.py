@@ -0,0 +1,190 @@
+import datetime
+from dataclasses import dataclass
+
+import pyotp
+import streamlit as st
+
+import bycrypt_utils
+import login_throttle
+import otp_cache
+import sessions
+import user_store
+
+# ========== AUTH CONFIG ==========
+# The one login flow: password, then OTP, then a server-side session. Every
+# app calls it with its own LoginApp: diet_tracker.py, and the single-page
+# scripts through require_login().
+ROLES = ("patient", "doctor")
+SESSION_TIMEOUT_MINUTES = 30
+OTP_ISSUER = "DietTrackerApp"
+SESSION_KEYS = ["auth_username", "auth_role", "auth_secret", "auth_phase", "auth_show_qr", "logged_in", "login_time"]
+
+
+@dataclass(frozen=True)
+class LoginApp:
+    # name namespaces the app's server-side sessions (see sessions.py).
+    # user_tables are (user_store.get_user_store() arguments, OTP secret field)
+    # pairs, searched in order; the matching record's role must be in roles.
+    name: str
+    user_tables: tuple
+    roles: tuple = ROLES
+    title: str = "Login"
+
+
+# One form for both roles: the matching record's role decides which pages the
+# session gets. Each table keeps its OTP secret under its own key.
+DIET_TRACKER = LoginApp("diet_tracker", (
+    ({"secrets_key": "users_app"}, "secret_key"),
+    ({"secrets_key": "users_doctor"}, "otp_secret"),
+))
+
+
+# ========== USER LOOKUP ==========
+def find_user(username, app=DIET_TRACKER):
+    # (user record, its store, name of its OTP secret field), or Nones.
+    for store_args, secret_field in app.user_tables:
+        store = user_store.get_user_store(**store_args)
+        user = store.get(username)
+        if user is not None:
+            return user, store, secret_field
+    return None, None, None
+
+def authenticate(username, password, app=DIET_TRACKER):
+    user, store, _ = find_user(username, app)
+    if user is None or user.role not in app.roles:
+        return False, None
+    # Runs on the bounded bcrypt pool instead of the script thread.
+    valid = bycrypt_utils.check_password(password, user.password)
+    if valid and bycrypt_utils.needs_rehash(user.password):
+        if store.path:
+            store.update(username, password=bycrypt_utils.hash_password(password))
+        else:
+            # Secrets are read-only at runtime, so the upgraded hash can only be reported.
+            print(f"Password hash for '{username}' does not use bcrypt cost {bycrypt_utils.BCRYPT_ROUNDS}; "
+                  "regenerate it with bycrypt_utils.hash_password() and update the secrets.")
+    return valid, user
+
+def verify_otp(username, secret, otp):
+    # Memoized TOTP per user; a code that was already accepted is refused.
+    return otp_cache.verify(username, secret, otp)
+
+
+# ========== SESSION ==========
+def logout():
+    sessions.end()
+    for k in SESSION_KEYS:
+        st.session_state.pop(k, None)
+
+def current_role(app=DIET_TRACKER):
+    # The logged-in role, or None. A server-side session named in the URL
+    # resumes the login after a reconnect or reload, without bcrypt or OTP.
+    # Expired sessions are cleared here, before the navigation is built, so
+    # they fall back to the login page.
+    session, had_token = sessions.resume(app.name)
+    if session is not None:
+        st.session_state.auth_username = session.username
+        st.session_state.auth_role = session.role
+        st.session_state.logged_in = True
+        st.session_state.login_time = datetime.datetime.now()
+        return session.role
+    login_time = st.session_state.get("login_time")
+    if (had_token and st.session_state.get("logged_in", False)) or (
+            login_time and (datetime.datetime.now() - login_time).total_seconds() > SESSION_TIMEOUT_MINUTES * 60):
+        logout()
+        st.session_state["auth_expired"] = True
+        return None
+    if not st.session_state.get("logged_in", False):
+        return None
+    return st.session_state.get("auth_role")
+
+def current_username():
+    return st.session_state.get("auth_username")
+
+
+# ========== LOGIN PAGE ==========
+def show_provisioning_qr(secret, username):
+    # Drawn once per user and secret, not on every rerun; qrcode is only
+    # imported the first time (see otp_cache.py).
+    qr_png = otp_cache.provisioning_qr(username, secret, OTP_ISSUER)
+    st.info("Scan the QR code below in your authenticator app (only once).")
+    st.image(qr_png, caption="Scan this QR Code in Google Authenticator")
+
+def password_step(app):
+    username = st.text_input("Username", key="username_input")
+    password = st.text_input("Password", type="password", key="password_input")
+
+    if st.button("Login"):
+        # Throttled per user and per client IP before any bcrypt work is done.
+        keys = login_throttle.login_keys(username)
+        wait = login_throttle.throttle.begin(keys)
+        if wait:
+            st.error(f"Too many login attempts. Please try again in {int(wait) + 1} seconds.")
+            st.stop()
+        valid = None
+        try:
+            valid, user = authenticate(username, password, app)
+        except bycrypt_utils.LoginBusy:
+            st.error("Login is busy right now. Please try again in a moment.")
+            st.stop()
+        finally:
+            login_throttle.throttle.end(keys, valid)
+        if not valid:
+            st.error("Invalid username or password")
+            st.stop()
+
+        _, store, secret_field = find_user(username, app)
+        secret = user.get(secret_field)
+        st.session_state.auth_show_qr = not secret
+        if not secret:
+            # File-backed stores save it; secrets-backed ones keep it in memory
+            # only, so provision it in the secrets for good.
+            secret = pyotp.random_base32()
+            store.update(username, **{secret_field: secret})
+        st.session_state.auth_username = username
+        st.session_state.auth_role = user.role
+        st.session_state.auth_secret = secret
+        st.session_state.auth_phase = "otp"
+        st.rerun()
+
+def otp_step(app):
+    if st.session_state.get("auth_show_qr", False):
+        show_provisioning_qr(st.session_state.auth_secret, st.session_state.auth_username)
+
+    otp = st.text_input("Enter OTP", type="password")
+
+    col_verify, col_back = st.columns(2)
+    if col_verify.button("Verify OTP"):
+        if verify_otp(st.session_state.auth_username, st.session_state.auth_secret, otp):
+            st.success("OTP verified. Logging in...")
+            st.session_state.logged_in = True
+            st.session_state.login_time = datetime.datetime.now()
+            sessions.start(app.name, st.session_state.auth_username, st.session_state.auth_role)
+            st.rerun()
+        else:
+            st.error("Invalid OTP")
+    if col_back.button("Back"):
+        logout()
+        st.rerun()
+
+def login_page(app=DIET_TRACKER):
+    st.subheader(app.title)
+    if st.session_state.pop("auth_expired", False):
+        st.warning("Session timed out. Please log in again.")
+    if st.session_state.get("auth_phase") == "otp":
+        otp_step(app)
+    else:
+        password_step(app)
+
+
+# ========== SINGLE-PAGE APPS ==========
+def require_login(app):
+    # The logged-in username, with a Logout button in the sidebar. Anyone not
+    # logged in gets the login page and the rest of the script is skipped.
+    if current_role(app) is None:
+        login_page(app)
+        st.stop()
+    st.sidebar.title("Menu")
+    if st.sidebar.button("Logout"):
+        logout()
+        st.rerun()
+    return current_username()
@@ -0,0 +1,103 @@
+import random
+import time
+
+import metrics
+
+# ========== BATCH CONFIG ==========
+# Submissions are coalesced for up to BATCH_WINDOW_SECONDS or until
+# BATCH_MAX_ROWS are waiting, whichever comes first (see write_queue.py).
+BATCH_WINDOW_SECONDS = 2.0
+BATCH_MAX_ROWS = 200
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 32.0
+# Quota exhaustion and transient server errors are worth retrying; anything
+# else (bad range, permissions) will fail the same way again.
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def _is_retryable(error):
+    # Imported here so loading the write path doesn't pull in gspread.
+    from gspread.exceptions import APIError
+
+    if isinstance(error, APIError):
+        return getattr(error, "code", None) in RETRYABLE_STATUS_CODES
+    return isinstance(error, (ConnectionError, TimeoutError))
+
+
+def _updated_rows(response, default):
+    try:
+        return int(response["updates"]["updatedRows"])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+
+class BatchWriter:
+    # Appends many rows with a single append_rows call and reports per-row success.
+    #
+    # A request that fails with a timeout or 5xx may still have been applied.
+    # Given find_written(rows) -> one bool per row already in the sheet, the
+    # writer asks before each retry and only re-sends the rows that are missing.
+    # Rows that may have been sent before (a job replayed from the write queue's
+    # journal after a crash, or retried after the writer gave up) are passed
+    # with maybe_written=True and checked before the first append too.
+
+    def __init__(self, get_worksheet, max_attempts=MAX_ATTEMPTS, sleep=time.sleep, find_written=None):
+        self._get_worksheet = get_worksheet
+        self.max_attempts = max_attempts
+        self._sleep = sleep
+        self._find_written = find_written
+
+    def __call__(self, rows, maybe_written=False):
+        return self.write(rows, maybe_written)
+
+    def write(self, rows, maybe_written=False):
+        # Returns one bool per row, in order. Rows that Sheets reports as not
+        # written are retried on their own; the rest are never re-sent.
+        rows = list(rows)
+        results = [False] * len(rows)
+        remaining = list(range(len(rows)))
+        if maybe_written:
+            remaining = self._unwritten(rows, remaining, results)
+        attempt = 0
+        while remaining and attempt < self.max_attempts:
+            attempt += 1
+            batch = [rows[i] for i in remaining]
+            try:
+                with metrics.timer("sheets_append_rows"):
+                    response = self._get_worksheet().append_rows(batch, value_input_option="RAW")
+            except Exception as e:
+                metrics.count("sheets_append_errors")
+                if not _is_retryable(e) or attempt >= self.max_attempts:
+                    print(f"Batch append of {len(batch)} rows failed: {e}")
+                    break
+                self._backoff(attempt)
+                remaining = self._unwritten(rows, remaining, results)
+                continue
+
+            written = _updated_rows(response, len(batch))
+            # Sheets appends a contiguous block, so a short count means the tail was lost.
+            for i in remaining[:written]:
+                results[i] = True
+            remaining = remaining[written:]
+            if remaining:
+                self._backoff(attempt)
+        return results
+
+    def _unwritten(self, rows, remaining, results):
+        if self._find_written is None:
+            return remaining
+        try:
+            written = self._find_written([rows[i] for i in remaining])
+        except Exception as e:
+            # Can't tell; re-send everything and let the next attempt decide.
+            print(f"Could not check which rows were written: {e}")
+            return remaining
+        for i, ok in zip(remaining, written):
+            results[i] = results[i] or ok
+        return [i for i, ok in zip(remaining, written) if not ok]
+
+    def _backoff(self, attempt):
+        delay = min(BACKOFF_BASE_SECONDS * 2 ** (attempt - 1), BACKOFF_MAX_SECONDS)
+        # Full jitter keeps several app processes from retrying in lockstep.
+        self._sleep(random.uniform(0, delay))
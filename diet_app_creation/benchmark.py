@@ -0,0 +1,288 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+# ========== BENCHMARK CONFIG ==========
+# python diet_app_creation/benchmark.py [--sizes 1000,100000,1000000] [--json out.json] [--baseline old.json]
+# Drives the login, submit and doctor-dashboard paths through Streamlit's
+# AppTest against the in-process fake Sheets backend and the fake SMTP sink,
+# and reports p50/p95 latency plus peak traced allocations per path.
+DEFAULT_SIZES = (1_000, 100_000, 1_000_000)
+DEFAULT_ITERATIONS = 20
+# --baseline fails the run when a p95 grows by more than this fraction.
+DEFAULT_TOLERANCE = 0.2
+APP_TIMEOUT_SECONDS = 600
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+PATIENT_APP = os.path.join(APP_DIR, "streamlit_app.py")
+DOCTOR_APP = os.path.join(APP_DIR, "streamlit_app_doctor.py")
+
+PATIENT_USER = "bench_patient"
+DOCTOR_USER = "bench_doctor"
+PASSWORD = "bench-password"
+MEALS = ["2 eggs, toast", "oats with banana", "rice and dal", "salad", "chicken, rice, broccoli", "apple", "pizza", ""]
+
+# The apps read these at import time, so set them before anything imports them.
+os.environ.setdefault("DIET_SHEETS_BACKEND", "fake")
+os.environ.setdefault("DIET_STORAGE_BACKEND", "sheets")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+
+def seed_entries(worksheet, count, patients=1000):
+    # count synthetic rows spread over `patients` patients, one row per patient
+    # per day. Cell strings come from small pools and are shared between rows,
+    # so even a million rows fit in memory.
+    days = max(1, -(-count // patients))
+    start = datetime.date(2020, 1, 1)
+    dates = [str(start + datetime.timedelta(days=day)) for day in range(days)]
+    names = [PATIENT_USER] + [f"patient_{i:04d}" for i in range(1, patients)]
+    weights = [f"{70 + i / 10:g}" for i in range(200)]
+    small = [str(i) for i in range(60)]
+    rows = worksheet._rows
+    for i in range(count):
+        day, patient = divmod(i, patients)
+        meal = MEALS[i % len(MEALS)]
+        rows.append([
+            dates[day], weights[i % 200], small[5 + i % 4], small[i % 60], small[1 + i % 5], small[i % 8],
+            meal, MEALS[(i + 1) % len(MEALS)], meal, "", meal, "", names[patient],
+        ])
+
+
+def measure(run, iterations, setup=None):
+    # Latency over `iterations` calls, then one more under tracemalloc for the
+    # allocation peak (kept separate so tracing doesn't skew the timings).
+    samples = []
+    for _ in range(iterations):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        run(state)
+        samples.append((time.perf_counter() - started) * 1000)
+    state = setup() if setup else None
+    tracemalloc.start()
+    try:
+        run(state)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    p50, p95 = np.percentile(samples, [50, 95])
+    return {"iterations": iterations, "p50_ms": round(float(p50), 2), "p95_ms": round(float(p95), 2),
+            "peak_alloc_kib": round(peak / 1024, 1)}
+
+
+class Bench:
+    def __init__(self, sink, iterations):
+        import bycrypt_utils
+        import pyotp
+
+        self.iterations = iterations
+        self.submissions = 0
+        self.patient_secret = pyotp.random_base32()
+        self.doctor_secret = pyotp.random_base32()
+        hashed = bycrypt_utils.hash_password(PASSWORD)
+        self.secrets = {
+            "users_app": {PATIENT_USER: {"password": hashed, "role": "patient", "secret_key": self.patient_secret}},
+            "users_doctor": {DOCTOR_USER: {"password": hashed, "role": "doctor", "otp_secret": self.doctor_secret}},
+            "email": {
+                "email_user": "app@localhost", "receiver_email": "doctor@localhost", "email_password": "",
+                "smtp_host": sink.host, "smtp_port": sink.port, "smtp_ssl": False,
+            },
+        }
+
+    def app(self, path, **session):
+        from streamlit.testing.v1 import AppTest
+
+        at = AppTest.from_file(path, default_timeout=APP_TIMEOUT_SECONDS)
+        for key, value in self.secrets.items():
+            at.secrets[key] = value
+        for key, value in session.items():
+            at.session_state[key] = value
+        return at
+
+    @staticmethod
+    def check(at):
+        errors = [e.value for e in at.error if "Background image" not in e.value]
+        if errors or at.exception:
+            raise RuntimeError(f"App failed: {errors or [e.value for e in at.exception]}")
+
+    # ---------- login: authenticate() then verify_otp() ----------
+    def login_setup(self):
+        at = self.app(PATIENT_APP)
+        at.run()
+        at.text_input(key="username_input").input(PATIENT_USER)
+        at.text_input(key="password_input").input(PASSWORD)
+        return at
+
+    def login_run(self, at):
+        at.button[0].click().run()
+        self.check(at)
+        if at.session_state["auth_phase"] != "otp":
+            raise RuntimeError("Login did not reach the OTP step")
+
+    def otp_setup(self):
+        import otp_cache
+        import pyotp
+
+        # Every iteration replays the same code within one 30-second step;
+        # forget the last accepted one so replay protection lets it through.
+        with otp_cache._lock:
+            otp_cache._last_used.pop(PATIENT_USER, None)
+        at = self.login_setup()
+        self.login_run(at)
+        at.text_input[0].input(pyotp.TOTP(self.patient_secret).now())
+        return at
+
+    def otp_run(self, at):
+        next(b for b in at.button if b.label == "Verify OTP").click().run()
+        self.check(at)
+
+    # ---------- submit: main_app() Submit button ----------
+    def submit_setup(self):
+        at = self.app(PATIENT_APP, logged_in=True, auth_username=PATIENT_USER, auth_role="patient",
+                      login_time=datetime.datetime.now())
+        at.run()
+        # A new draft revision each time; resubmitting an unchanged draft is
+        # deduplicated by its entry_id and would not measure a real submit.
+        self.submissions += 1
+        at.text_area(key="draft_dinner_food").input(f"{MEALS[self.submissions % len(MEALS)]} #{self.submissions}").run()
+        self.check(at)
+        return at
+
+    def submit_run(self, at):
+        next(b for b in at.button if b.label == "Submit").click().run()
+        self.check(at)
+
+    # ---------- doctor: get_user_data() and doctor_view() ----------
+    def doctor_session(self):
+        return self.app(DOCTOR_APP, logged_in=True, auth_username=DOCTOR_USER, auth_role="doctor",
+                        login_time=datetime.datetime.now())
+
+    def doctor_cold_setup(self):
+        reset_caches()
+        return self.doctor_session()
+
+    def doctor_run(self, at):
+        at.run()
+        self.check(at)
+
+    def doctor_warm_setup(self):
+        at = self.doctor_session()
+        at.run()
+        return at
+
+
+def reset_caches():
+    import analytics
+    import entries_cache
+    import storage
+
+    with entries_cache._caches_lock:
+        entries_cache._caches.clear()
+    with storage._storages_lock:
+        storage._storages.clear()
+    analytics.trend_cache = analytics.TrendCache()
+
+
+def get_user_data_run(_):
+    import entries_cache
+
+    entries_cache.get_entries_cache(source="secrets").get_frame()
+
+
+def drain_queue(_):
+    import write_queue
+
+    with write_queue._queues_lock:
+        queues = list(write_queue._queues.values())
+    for queue in queues:
+        if not queue.flush(timeout=APP_TIMEOUT_SECONDS):
+            raise RuntimeError("Write-behind queue did not drain")
+
+
+def run_size(bench, size):
+    import fake_gspread
+    import sheets_client
+
+    sheets_client.use_client_factory(fake_gspread.FakeClient)
+    reset_caches()
+    seed_entries(sheets_client.get_worksheet(source="secrets"), size)
+
+    n = bench.iterations
+    results = {
+        "login_authenticate": measure(bench.login_run, n, bench.login_setup),
+        "login_verify_otp": measure(bench.otp_run, n, bench.otp_setup),
+        "submit": measure(bench.submit_run, n, bench.submit_setup),
+        "submit_drain": measure(drain_queue, 1),
+        "get_user_data_cold": measure(get_user_data_run, max(1, n // 5), reset_caches),
+        "get_user_data_warm": measure(get_user_data_run, n),
+        "doctor_view_cold": measure(bench.doctor_run, max(1, n // 5), bench.doctor_cold_setup),
+        "doctor_view_warm": measure(bench.doctor_run, n, bench.doctor_warm_setup),
+    }
+    return results
+
+
+def compare(results, baseline, tolerance):
+    # Returns the (size, path) pairs whose p95 regressed beyond tolerance.
+    regressions = []
+    for size, paths in results.items():
+        for path, stats in paths.items():
+            before = baseline.get(size, {}).get(path)
+            if before and before["p95_ms"] and stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append((size, path, before["p95_ms"], stats["p95_ms"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the login, submit and doctor-dashboard paths.")
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES),
+                        help="Comma-separated dataset sizes (rows in the fake sheet)")
+    parser.add_argument("--iterations", type=int, default=DEFAULT_ITERATIONS)
+    parser.add_argument("--json", help="Write the results to this file")
+    parser.add_argument("--baseline", help="Results file from an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    args = parser.parse_args(argv)
+
+    import drafts
+    import journal
+    from fake_smtp import SMTPSink
+
+    # Journals and drafts go to a scratch directory so runs never replay each other's entries.
+    scratch = tempfile.mkdtemp(prefix="diet-bench-")
+    journal.JOURNAL_DIR = os.path.join(scratch, "queue")
+    drafts.DRAFTS_DIR = os.path.join(scratch, "drafts")
+    results = {}
+    with SMTPSink() as sink:
+        import notifications
+
+        # Registered before the app asks for it, so the notifier's worker thread
+        # doesn't need Streamlit secrets.
+        notifications.get_notifier("streamlit_app", load_settings=sink.settings, digest_interval=0)
+        bench = Bench(sink, args.iterations)
+        print(f"{'rows':>9} {'path':<20} {'p50 ms':>10} {'p95 ms':>10} {'peak KiB':>11}")
+        for size in [int(size) for size in args.sizes.split(",") if size]:
+            results[str(size)] = run_size(bench, size)
+            for path, stats in results[str(size)].items():
+                print(f"{size:>9} {path:<20} {stats['p50_ms']:>10.2f} {stats['p95_ms']:>10.2f} {stats['peak_alloc_kib']:>11.1f}")
+        print(f"emails delivered to the sink: {len(sink.messages)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for size, path, before, after in regressions:
+            print(f"REGRESSION {size} {path}: p95 {before:.2f} ms -> {after:.2f} ms")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
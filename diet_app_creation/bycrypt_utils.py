@@ -1,7 +1,66 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+
 import bcrypt
 
-def hash_password(password):
-    return bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+import metrics
+
+# ========== HASHING CONFIG ==========
+# Work factor for new hashes. When it changes, existing hashes are upgraded
+# the next time their owner logs in (see needs_rehash()).
+BCRYPT_ROUNDS = int(os.environ.get("DIET_BCRYPT_ROUNDS", "12"))
+
+# bcrypt releases the GIL, so running checks on a small pool keeps a burst of
+# logins from stalling every other session's reruns. Checks beyond
+# LOGIN_WORKERS + LOGIN_QUEUE_SIZE are refused instead of piling up.
+LOGIN_WORKERS = 2
+LOGIN_QUEUE_SIZE = 8
+LOGIN_TIMEOUT_SECONDS = 15
+
+_pool = ThreadPoolExecutor(max_workers=LOGIN_WORKERS, thread_name_prefix="bcrypt-login")
+_slots = threading.BoundedSemaphore(LOGIN_WORKERS + LOGIN_QUEUE_SIZE)
+
+
+class LoginBusy(Exception):
+    pass
 
+
+@metrics.timed("bcrypt_hashpw")
+def hash_password(password, rounds=None):
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds or BCRYPT_ROUNDS)).decode()
+
+@metrics.timed("bcrypt_checkpw")
 def verify_password(password, hashed):
     return bcrypt.checkpw(password.encode(), hashed.encode())
+
+def hash_rounds(hashed):
+    # "$2b$12$..." -> 12
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+def needs_rehash(hashed, rounds=None):
+    return hash_rounds(hashed) != (rounds or BCRYPT_ROUNDS)
+
+def check_password(password, hashed, timeout=LOGIN_TIMEOUT_SECONDS):
+    # verify_password() on the bounded login pool. Raises LoginBusy when the
+    # pool's queue is full or the check doesn't finish within timeout, so
+    # callers treat both as a busy attempt that never ran.
+    if not _slots.acquire(blocking=False):
+        metrics.count("login_busy")
+        raise LoginBusy("Too many logins in progress")
+    try:
+        future = _pool.submit(verify_password, password, hashed)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        # The check keeps its slot until it finishes; only this caller gives up.
+        metrics.count("login_timeout")
+        raise LoginBusy("Password check timed out")
@@ -0,0 +1,143 @@
+import threading
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+import nutrition
+from entry_index import DATE_COLUMN, PATIENT_COLUMN
+from schema import MEAL_COLUMNS, float_values
+
+# ========== SUMMARY CONFIG ==========
+# Thresholds for the flags shown next to a day's summary.
+SHORT_SLEEP_MINUTES = 6 * 60
+HIGH_COFFEE_CUPS = 5
+LOW_WALKING_KM = 1.0
+
+
+@dataclass(slots=True, frozen=True)
+class DailySummary:
+    # Everything the doctor view shows for one (patient, date), computed once
+    # when the day's latest entry is ingested.
+    patient: str
+    date: object
+    weight: float
+    sleep_minutes: int
+    coffee_cups: int
+    walking_km: float
+    meals: tuple      # meal texts, in schema.MEAL_COLUMNS order
+    estimates: tuple  # nutrition.MealEstimate per meal, same order
+    kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    flags: tuple
+
+    @property
+    def sleep_hours(self):
+        return self.sleep_minutes / 60
+
+    @property
+    def sleep_text(self):
+        return f"{self.sleep_minutes // 60} hours and {self.sleep_minutes % 60} minutes"
+
+    def meal(self, column):
+        return self.meals[MEAL_COLUMNS.index(column)]
+
+    def estimates_by_meal(self):
+        return dict(zip(MEAL_COLUMNS, self.estimates))
+
+
+def _flags(sleep_minutes, coffee_cups, walking_km, meals, estimates):
+    flags = []
+    if sleep_minutes < SHORT_SLEEP_MINUTES:
+        flags.append(f"Short sleep (under {SHORT_SLEEP_MINUTES // 60} hours)")
+    if coffee_cups >= HIGH_COFFEE_CUPS:
+        flags.append(f"High coffee intake ({coffee_cups} cups)")
+    if walking_km < LOW_WALKING_KM:
+        flags.append(f"Low activity (under {LOW_WALKING_KM:g} km walked)")
+    if not any(meals):
+        flags.append("No meals recorded")
+    unmatched = sorted({word for estimate in estimates for word in estimate.unmatched})
+    if unmatched:
+        flags.append(f"Foods not in the nutrition table: {', '.join(unmatched)}")
+    return tuple(flags)
+
+
+def _numbers(frame, column):
+    return frame[column].fillna(0)
+
+
+def summarize_frame(frame):
+    # One DailySummary per (patient, date) in a typed chunk (schema.to_frame),
+    # for the day's last row.
+    if frame.empty:
+        return []
+    dates = frame[DATE_COLUMN]
+    # Dedupe on the patient codes and raw timestamps; values are only
+    # materialized for the rows kept.
+    keep = dates.notna() & ~pd.DataFrame({
+        "patient": frame[PATIENT_COLUMN].cat.codes, "day": dates,
+    }).duplicated(keep="last")
+    frame = frame[keep]
+    days = frame[DATE_COLUMN].dt.date
+    patients = frame[PATIENT_COLUMN].astype(object)
+
+    # Column-wise arithmetic for the numeric fields; each distinct meal text is
+    # estimated once per chunk (and memoized across chunks).
+    sleep_minutes = (_numbers(frame, "Hours") * 60 + _numbers(frame, "Minutes")).astype(int).tolist()
+    coffee_cups = _numbers(frame, "coffee_cups").astype(int).tolist()
+    walking_km = float_values(_numbers(frame, "walking_distance"))
+    weights = float_values(frame["Weight"])
+    meal_texts, meal_estimates = [], []
+    for column in MEAL_COLUMNS:
+        texts = frame[column]
+        meal_texts.append(texts.tolist())
+        meal_estimates.append(nutrition.estimate_column(texts))
+    totals = {
+        nutrient: np.sum([[getattr(estimate, nutrient) for estimate in column] for column in meal_estimates], axis=0).tolist()
+        for nutrient in nutrition.NUTRIENTS
+    }
+
+    summaries = []
+    rows = zip(patients.tolist(), days.tolist(), weights, sleep_minutes, coffee_cups, walking_km,
+               zip(*meal_texts), zip(*meal_estimates))
+    for position, (patient, day, weight, sleep, coffee, walking, meals, estimates) in enumerate(rows):
+        summaries.append(DailySummary(
+            patient=patient,
+            date=day,
+            weight=weight,
+            sleep_minutes=sleep,
+            coffee_cups=coffee,
+            walking_km=walking,
+            meals=meals,
+            estimates=estimates,
+            flags=_flags(sleep, coffee, walking, meals, estimates),
+            **{nutrient: totals[nutrient][position] for nutrient in nutrition.NUTRIENTS},
+        ))
+    return summaries
+
+
+class SummaryTable:
+    # Materialized DailySummary per (patient, date). Fed the same chunks as the
+    # EntryIndex, so each row is summarized once at ingest rather than on
+    # every page render.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._summaries = {}
+
+    def clear(self):
+        with self._lock:
+            self._summaries.clear()
+
+    def add_frame(self, frame):
+        summaries = summarize_frame(frame)
+        with self._lock:
+            for summary in summaries:
+                # Later rows win, matching EntryIndex.latest().
+                self._summaries[(summary.patient, summary.date)] = summary
+
+    def get(self, patient, day):
+        with self._lock:
+            return self._summaries.get((patient, day))
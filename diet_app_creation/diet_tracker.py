@@ -0,0 +1,80 @@
+import streamlit as st
+
+import auth
+import metrics
+import theme
+
+# ========== PAGE CONFIG ==========
+# One app for patients and doctors: streamlit run diet_app_creation/diet_tracker.py
+# Logging in picks the pages for the session's role. The page modules, and
+# pandas, gspread and qrcode behind them, are imported the first time a page
+# that needs them runs, so the login page loads only Streamlit, bcrypt and pyotp.
+st.set_page_config(layout="wide")
+# Timed from here to the end of the script, including reruns cut short by st.stop().
+metrics.configure()
+rerun_timer = metrics.start_timer("script_rerun", app="diet_tracker")
+
+ROLE_THEMES = {None: "patient", "patient": "patient", "doctor": "doctor"}
+
+
+# ========== WRITE-BEHIND SUBMISSIONS ==========
+def store_entries(data_rows, maybe_written=False):
+    import storage
+
+    return storage.get_storage(source="secrets").append_rows(data_rows, maybe_written)
+
+def send_email_notification(subject, body, key=None):
+    import notifications
+
+    notifications.get_notifier("diet_tracker").notify(subject, body, key=key)
+
+def get_submission_queue():
+    import write_queue
+
+    return write_queue.get_write_queue("diet_tracker", store_entries, send_email_notification)
+
+def get_drafts():
+    import drafts
+
+    return drafts.get_draft_store("diet_tracker")
+
+
+# ========== PAGES ==========
+def login_page():
+    auth.login_page()
+
+def entry_page():
+    import patient_page
+
+    patient_page.render(auth.current_username(), get_submission_queue(), get_drafts())
+
+def summary_page():
+    import doctor_page
+
+    st.title("Doctor's View - Patient Diet Summary")
+    doctor_page.render(source="secrets")
+
+PAGES = {
+    None: [st.Page(login_page, title="Login", icon=":material/login:", url_path="login")],
+    "patient": [st.Page(entry_page, title="Daily Entry", icon=":material/edit_note:", url_path="entry")],
+    "doctor": [st.Page(summary_page, title="Patient Summary", icon=":material/monitoring:", url_path="summary")],
+}
+
+
+# ========== ENTRY POINT ==========
+def app():
+    metrics.render_debug_panel()
+    role = auth.current_role()
+    theme.apply(ROLE_THEMES[role])
+
+    page = st.navigation(PAGES[role], position="sidebar" if role else "hidden")
+    if role:
+        st.sidebar.title("Menu")
+        st.sidebar.caption(f"Signed in as {auth.current_username()}")
+        if st.sidebar.button("Logout"):
+            auth.logout()
+            st.rerun()
+    page.run()
+
+with rerun_timer:
+    app()
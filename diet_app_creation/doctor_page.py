@@ -0,0 +1,263 @@
+import calendar
+import datetime
+import html
+
+import streamlit as st
+
+import analytics
+import entries_cache
+import nutrition
+import sheets_client
+
+# ========== PAGE CONFIG ==========
+# The doctor dashboard body, shared by streamlit_app_doctor.py, doctors_view.py
+# and the Patient Summary page of diet_tracker.py. It pulls in pandas through the
+# cache and analytics modules, so callers import it only once a doctor is logged in.
+
+# Meal columns in display order, with the labels used in the nutrition table.
+MEAL_LABELS = {
+    "breakfast_food": "Breakfast",
+    "snack_food": "Snack",
+    "lunch_food": "Lunch",
+    "evening_food": "Evening Snack",
+    "dinner_food": "Dinner",
+    "bedtime_food": "Before Bed",
+}
+# Labels with the meal times shown on the patient's entry form.
+MEAL_HEADINGS = {
+    "breakfast_food": "Breakfast (06:45 AM - 08:00 AM)",
+    "snack_food": "Snack (09:30 AM - 11:30 AM)",
+    "lunch_food": "Lunch (12:30 PM - 02:30 PM)",
+    "evening_food": "Evening Snack (05:30 PM)",
+    "dinner_food": "Dinner (07:00 PM - 08:00 PM)",
+    "bedtime_food": "Before Bed (09:00 PM - 10:30 PM)",
+}
+# The history browser shows one month at a time; its day table is paged.
+HISTORY_PAGE_SIZE = 10
+# Values the month heatmap can be coloured by: label -> DailySummary attribute.
+HEATMAP_METRICS = {
+    "Calories (kcal)": "kcal",
+    "Weight (kg)": "weight",
+    "Sleep (hours)": "sleep_hours",
+    "Coffee (cups)": "coffee_cups",
+    "Walking (km)": "walking_km",
+}
+# Meal search results listed under the counts, newest first.
+SEARCH_RESULTS_SHOWN = 100
+
+
+# ========== DATA ACCESS ==========
+def get_user_data(source="secrets", name=sheets_client.WORKSHEET_NAME):
+    # Served from the resident cache; Sheets is only asked for rows appended
+    # since the last read, and at most once per storage cache_ttl.
+    return entries_cache.get_entries_cache(name=name, source=source).get_frame()
+
+def get_patients(source="secrets", name=sheets_client.WORKSHEET_NAME):
+    return entries_cache.list_patients(name=name, source=source)
+
+def get_date_bounds(patient, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    return entries_cache.date_bounds(patient, name=name, source=source)
+
+def get_window(patient, start, end, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    # Only start..end is read; with SQLite that is one range scan on the (patient, date) index.
+    return entries_cache.window_summaries(patient, start, end, name=name, source=source)
+
+def get_search_index(patient, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    # Kept up to date as rows are ingested; a query is dict lookups and bisects.
+    return entries_cache.get_entries_cache(name=name, source=source, patient=patient).get_search()
+
+def get_logged_days(patient, start, end, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    index = entries_cache.get_entries_cache(name=name, source=source, patient=patient).get_index()
+    return len(index.dates_between(patient, start, end))
+
+def get_trends(patient, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    # Rolling averages and deltas, updated from only the rows added since the last rerun.
+    return analytics.trend_cache.get(entries_cache.get_entries_cache(name=name, source=source, patient=patient), patient)
+
+
+# ========== HISTORY BROWSER ==========
+def _month_starts(first, last):
+    # First day of every month from last back to first, newest first.
+    months = []
+    year, month = last.year, last.month
+    while (year, month) >= (first.year, first.month):
+        months.append(datetime.date(year, month, 1))
+        year, month = (year, month - 1) if month > 1 else (year - 1, 12)
+    return months
+
+def _month_end(month):
+    return month.replace(day=calendar.monthrange(month.year, month.month)[1])
+
+def _month_heatmap(month, by_day, metric, label):
+    # Vega-Lite spec of a calendar grid for the month: weekday columns, one row
+    # per week, days without an entry in grey. A plain spec rather than an
+    # altair chart, so reruns skip altair's schema validation.
+    cells = []
+    for day_number in range(1, _month_end(month).day + 1):
+        day = month.replace(day=day_number)
+        value = getattr(by_day[day], metric) if day in by_day else None
+        cells.append({
+            "date": str(day),
+            "day": day_number,
+            "weekday": calendar.day_abbr[day.weekday()],
+            "week": (day_number - 1 + month.weekday()) // 7,
+            "value": None if value is None or value != value else round(float(value), 2),
+        })
+    return {
+        "data": {"values": cells},
+        "height": 40 * (cells[-1]["week"] + 1),
+        "encoding": {
+            "x": {"field": "weekday", "type": "ordinal", "sort": list(calendar.day_abbr), "title": None,
+                  "axis": {"orient": "top", "labelAngle": 0}},
+            "y": {"field": "week", "type": "ordinal", "title": None, "axis": None},
+        },
+        "layer": [
+            {
+                "mark": {"type": "rect", "stroke": "white"},
+                "encoding": {
+                    "color": {
+                        "condition": {"test": "datum.value === null", "value": "#eeeeee"},
+                        "field": "value", "type": "quantitative", "title": label,
+                    },
+                    "tooltip": [
+                        {"field": "date", "type": "nominal", "title": "Date"},
+                        {"field": "value", "type": "quantitative", "title": label},
+                    ],
+                },
+            },
+            {"mark": {"type": "text", "baseline": "middle"}, "encoding": {"text": {"field": "day", "type": "quantitative"}}},
+        ],
+    }
+
+def _history_row(summary):
+    return {
+        "Date": str(summary.date),
+        "Weight (kg)": summary.weight,
+        "Sleep": summary.sleep_text,
+        "Coffee (cups)": summary.coffee_cups,
+        "Walking (km)": summary.walking_km,
+        "Calories (kcal)": round(summary.kcal),
+        "Flags": len(summary.flags),
+    }
+
+def history_browser(patient, bounds, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    # Month picker, heatmap and paged day table for one patient. Only the
+    # chosen month is fetched, however long the patient's history is.
+    # Returns the selected day's DailySummary.
+    st.markdown("#### History:")
+    month = st.selectbox("Month", _month_starts(*bounds), format_func=lambda m: m.strftime("%B %Y"))
+    by_day = {summary.date: summary for summary in get_window(patient, month, _month_end(month), source, name)}
+
+    label = st.radio("Heatmap colour", list(HEATMAP_METRICS), horizontal=True)
+    st.vega_lite_chart(_month_heatmap(month, by_day, HEATMAP_METRICS[label], label), use_container_width=True)
+    if not by_day:
+        st.info(f"No entries in {month:%B %Y}.")
+        st.stop()
+
+    days = sorted(by_day, reverse=True)
+    pages = -(-len(days) // HISTORY_PAGE_SIZE)
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1,
+                               key=f"history_page_{patient}_{month}")
+    page_days = days[(page - 1) * HISTORY_PAGE_SIZE:page * HISTORY_PAGE_SIZE]
+    st.dataframe([_history_row(by_day[day]) for day in page_days], hide_index=True)
+
+    selected_date = st.selectbox("Select a date to view patient's data:", days)
+    return by_day[selected_date]
+
+
+# ========== MEAL SEARCH ==========
+def meal_search(patient, bounds, source="secrets", name=sheets_client.WORKSHEET_NAME):
+    # "When did they last eat fried food", "how often is sugar in the bedtime
+    # snack": every word must appear in the same meal.
+    with st.expander("Search meal logs"):
+        query = st.text_input("Foods to find", placeholder="e.g. fried, or sugar")
+        meals = st.multiselect("Meals", list(MEAL_LABELS), default=list(MEAL_LABELS), format_func=MEAL_LABELS.get)
+        window = st.date_input("Between", value=bounds, min_value=bounds[0], max_value=bounds[1])
+        if not query.strip():
+            return
+        # The range is a single date while its second end is being picked.
+        start, end = (window[0], window[-1]) if window else bounds
+        hits = get_search_index(patient, source, name).search(patient, query, meals, start, end)
+        if not hits:
+            st.info(f"No meals with '{query}' between {start} and {end}.")
+            return
+
+        days = len({hit.date for hit in hits})
+        st.write(f"**{len(hits)}** {'meal' if len(hits) == 1 else 'meals'} on **{days}** of "
+                 f"{get_logged_days(patient, start, end, source, name)} logged days, most recently on **{hits[0].date}**.")
+        st.dataframe([
+            {"Date": str(hit.date), "Meal": MEAL_LABELS[hit.meal], "Food": hit.text}
+            for hit in hits[:SEARCH_RESULTS_SHOWN]
+        ], hide_index=True)
+        if len(hits) > SEARCH_RESULTS_SHOWN:
+            st.caption(f"Showing the latest {SEARCH_RESULTS_SHOWN}.")
+
+
+# ========== PATIENT SUMMARY ==========
+def render(source="secrets", name=sheets_client.WORKSHEET_NAME, meal_headings=MEAL_HEADINGS):
+    try:
+        patients = get_patients(source, name)
+        if not patients:
+            st.info("No entries found yet. Please make sure the user has submitted at least one entry.")
+            st.stop()
+        selected_patient = st.sidebar.selectbox(
+            "Patient", patients, format_func=lambda p: p or "(entries without a username)"
+        )
+
+        bounds = get_date_bounds(selected_patient, source, name)
+        if bounds is None:
+            st.info("No entries found yet for this patient.")
+            st.stop()
+        meal_search(selected_patient, bounds, source, name)
+
+        # Summarized when the entry was ingested (or, for a windowed read, once per window).
+        summary = history_browser(selected_patient, bounds, source, name)
+        selected_date = summary.date
+
+        # Usernames come from the sheet, so they are escaped before going into HTML.
+        st.markdown(f"<h3>Summary for {html.escape(selected_patient or 'patient')} on {selected_date}</h3>",
+                    unsafe_allow_html=True)
+        st.write(f"**Weight**: {summary.weight:g} kg")
+        st.write(f"**Sleep**: {summary.sleep_text}")
+        st.write(f"**Coffee Consumed**: {summary.coffee_cups} cups")
+        st.write(f"**Walking Distance**: {summary.walking_km:g} km")
+        for flag in summary.flags:
+            st.warning(flag)
+
+        st.markdown("#### Food Consumption Summary:")
+        for column, heading in meal_headings.items():
+            st.write(f"**{heading}**: {summary.meal(column)}")
+
+        st.markdown("#### Estimated Nutrition:")
+        # Estimated at ingest from the bundled food table (see daily_summary.py).
+        st.dataframe(nutrition.estimate_table(summary.estimates_by_meal(), MEAL_LABELS), hide_index=True)
+
+        st.markdown("#### Trends:")
+        history, latest = analytics.as_of(get_trends(selected_patient, source, name), selected_date)
+        if latest is None:
+            st.info("Not enough entries yet to show trends.")
+        else:
+            weight_col, sleep_col, coffee_col, walking_col = st.columns(4)
+            weight_col.metric("Weight (7-day avg)", analytics.format_value(latest["weight_avg_7d"], " kg"),
+                              analytics.format_delta(latest["weight_wow"], " kg vs last week"), delta_color="off")
+            sleep_col.metric("Sleep (7-day avg)", analytics.format_value(latest["sleep_hours_avg_7d"], " h"),
+                             analytics.format_delta(latest["sleep_hours_wow"], " h vs last week"))
+            coffee_col.metric("Coffee (7-day avg)", analytics.format_value(latest["coffee_cups_avg_7d"], " cups"),
+                              analytics.format_delta(latest["coffee_cups_wow"], " cups vs last week"), delta_color="inverse")
+            walking_col.metric("Walking (7-day avg)", analytics.format_value(latest["walking_km_avg_7d"], " km"),
+                               analytics.format_delta(latest["walking_km_wow"], " km vs last week"))
+            st.write(f"**Weight change rate**: {analytics.format_value(latest['weight_rate_kg_per_week'], ' kg/week', digits=2, signed=True)}")
+            st.write(f"**Sleep debt**: {analytics.format_value(latest['sleep_debt_7d'], ' h')} over 7 days, "
+                     f"{analytics.format_value(latest['sleep_debt_30d'], ' h')} over 30 days")
+
+            chart = history.iloc[-analytics.CHART_DAYS:]
+            st.line_chart(chart[["weight", "weight_avg_7d", "weight_avg_30d"]], y_label="kg")
+            st.line_chart(chart[["sleep_hours", "sleep_hours_avg_7d", "sleep_debt_7d"]], y_label="hours")
+            st.line_chart(chart[["coffee_cups_avg_7d", "walking_km_avg_7d"]])
+
+    except FileNotFoundError:
+        st.error("No data found. Please make sure the user has submitted at least one entry.")
+    except Exception as e:
+        st.error(f"An error occurred while loading the data: {e}")
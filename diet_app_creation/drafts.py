@@ -0,0 +1,117 @@
+import datetime
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from urllib.parse import quote
+
+# ========== DRAFT CONFIG ==========
+# Patient entries in progress, saved on the server per user and date as each
+# field changes, so a dropped connection or a session timeout on a phone
+# doesn't lose what was typed. One JSON file per user under DRAFTS_DIR/<app>/.
+DRAFTS_DIR = "diet_app_creation/.drafts"
+# Drafts for dates older than this are dropped the next time the user's file is written.
+DRAFT_RETENTION_DAYS = 30
+
+
+def _new_draft():
+    return {
+        # Idempotency key of the stored row (the entry_id column); retried
+        # submits of the same draft reuse it, so they never add a second row.
+        "entry_id": uuid.uuid4().hex,
+        "fields": {},
+        "updated_at": time.time(),
+        "submitted_at": None,
+    }
+
+
+class DraftStore:
+    # Drafts keyed by (username, date string). Each user's drafts are read once
+    # per process and written back with a temp file and rename, like user_store.
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._lock = threading.Lock()
+        self._users = {}
+
+    def _path(self, username):
+        return os.path.join(self.directory, quote(username or "_", safe="") + ".json")
+
+    def _load(self, username):
+        drafts = self._users.get(username)
+        if drafts is None:
+            try:
+                with open(self._path(username), "r", encoding="utf-8") as f:
+                    drafts = json.load(f)
+            except FileNotFoundError:
+                drafts = {}
+            except ValueError as e:
+                print(f"Drafts for '{username}' could not be read and were reset: {e}")
+                drafts = {}
+            self._users[username] = drafts
+        return drafts
+
+    def _save(self, username):
+        drafts = self._users[username]
+        cutoff = str(datetime.date.today() - datetime.timedelta(days=DRAFT_RETENTION_DAYS))
+        for day in [day for day in drafts if day < cutoff]:
+            del drafts[day]
+        os.makedirs(self.directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".drafts-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(drafts, f)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self._path(username))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def get(self, username, day):
+        with self._lock:
+            draft = self._load(username).get(str(day))
+            return None if draft is None else {**draft, "fields": dict(draft["fields"])}
+
+    def update(self, username, day, **fields):
+        # Saves changed fields. Editing a draft that was already submitted
+        # starts a new revision with a new entry_id, stored as a new row.
+        with self._lock:
+            drafts = self._load(username)
+            draft = drafts.setdefault(str(day), _new_draft())
+            changed = {name: value for name, value in fields.items() if draft["fields"].get(name) != value}
+            if changed:
+                if draft["submitted_at"] is not None:
+                    draft["entry_id"] = uuid.uuid4().hex
+                    draft["submitted_at"] = None
+                draft["fields"].update(changed)
+                draft["updated_at"] = time.time()
+                self._save(username)
+            return {**draft, "fields": dict(draft["fields"])}
+
+    def mark_submitted(self, username, day):
+        with self._lock:
+            draft = self._load(username)[str(day)]
+            draft["submitted_at"] = time.time()
+            self._save(username)
+            return draft["entry_id"]
+
+    def discard(self, username, day):
+        with self._lock:
+            if self._load(username).pop(str(day), None) is not None:
+                self._save(username)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_draft_store(name):
+    # One store per app, shared by every session in the process.
+    with _stores_lock:
+        if name not in _stores:
+            _stores[name] = DraftStore(os.path.join(DRAFTS_DIR, name))
+        return _stores[name]
@@ -0,0 +1,160 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+import schema
+import sheets_client
+import storage
+from daily_summary import SummaryTable, summarize_frame
+from entry_index import EntryIndex
+from meal_search import MealSearchIndex
+
+# ========== CACHE CONFIG ==========
+# Rows are only ever appended by the apps; a periodic full reload picks up manual
+# edits or deletions made directly in the spreadsheet.
+FULL_REFRESH_SECONDS = 60 * 60
+
+# Every full load gets a process-unique generation, so derived caches (see
+# analytics.py) can tell a rebuilt frame from an extended one.
+_generations = itertools.count(1)
+
+
+class EntriesCache:
+    # Resident typed frame of all entries (schema.to_frame), extended with only the rows stored
+    # since the previous read (storage.read_since). Reads within the storage's
+    # cache_ttl are served from memory. The (patient, date) index, the daily
+    # summary table and the meal search index are fed the same chunks, so none
+    # of them re-scans rows it has already seen.
+
+    def __init__(self, entry_storage, patient=None, ttl_seconds=None, full_refresh_seconds=FULL_REFRESH_SECONDS):
+        self._storage = entry_storage
+        self.patient = patient
+        self.ttl_seconds = entry_storage.cache_ttl if ttl_seconds is None else ttl_seconds
+        self.full_refresh_seconds = full_refresh_seconds
+        self._lock = threading.Lock()
+        self._frame = None
+        self._cursor = None
+        self._last_fetch = 0.0
+        self._last_full_fetch = 0.0
+        self.generation = 0
+        self.index = EntryIndex()
+        self.summaries = SummaryTable()
+        self.search = MealSearchIndex()
+
+    @property
+    def storage(self):
+        return self._storage
+
+    def invalidate(self):
+        with self._lock:
+            self._last_fetch = 0.0
+
+    def _refresh(self, force):
+        now = time.monotonic()
+        if self._frame is None or now - self._last_full_fetch > self.full_refresh_seconds:
+            self._full_fetch(now)
+        elif force or now - self._last_fetch >= self.ttl_seconds:
+            self._fetch_new_rows(now)
+
+    def get_index(self, force=False):
+        with self._lock:
+            self._refresh(force)
+            return self.index
+
+    def get_summaries(self, force=False):
+        with self._lock:
+            self._refresh(force)
+            return self.summaries
+
+    def get_search(self, force=False):
+        with self._lock:
+            self._refresh(force)
+            return self.search
+
+    def get_frame(self, force=False):
+        with self._lock:
+            self._refresh(force)
+            # Shallow copy: callers may add or replace columns without touching
+            # the resident frame, and no cell data is duplicated.
+            return self._frame.copy(deep=False)
+
+    def _full_fetch(self, now):
+        header, rows, self._cursor = self._storage.read_since(None, patient=self.patient)
+        metrics.count("entries_rows_ingested", len(rows), fetch="full")
+        self._frame = schema.to_frame(rows, header)
+        self.generation = next(_generations)
+        self.index.clear()
+        self.index.add_frame(self._frame)
+        self.summaries.clear()
+        self.summaries.add_frame(self._frame)
+        self.search.clear()
+        self.search.add_frame(self._frame)
+        self._last_fetch = self._last_full_fetch = now
+
+    def _fetch_new_rows(self, now):
+        header, rows, self._cursor = self._storage.read_since(self._cursor, patient=self.patient)
+        if rows:
+            metrics.count("entries_rows_ingested", len(rows), fetch="incremental")
+            new_frame = schema.to_frame(rows, header)
+            self._frame = schema.append_frame(self._frame, new_frame)
+            self.index.add_frame(new_frame)
+            self.summaries.add_frame(new_frame)
+            self.search.add_frame(new_frame)
+        self._last_fetch = now
+
+
+# Per-patient caches kept resident; the least recently used are dropped first.
+MAX_PATIENT_CACHES = 64
+
+_caches = OrderedDict()
+_caches_lock = threading.Lock()
+
+
+def get_entries_cache(name=sheets_client.WORKSHEET_NAME, source="secrets", patient=None):
+    # Backends that can filter by patient get one cache per patient, so a doctor
+    # only loads the selected patient's rows. Otherwise every patient shares one
+    # cache, and the index still answers per-patient lookups.
+    entry_storage = storage.get_storage(source=source, worksheet=name)
+    key = (entry_storage, patient if entry_storage.filters_by_patient else None)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = EntriesCache(entry_storage, patient=key[1])
+            if len(_caches) > MAX_PATIENT_CACHES:
+                _caches.popitem(last=False)
+        _caches.move_to_end(key)
+        return cache
+
+
+def list_patients(name=sheets_client.WORKSHEET_NAME, source="secrets"):
+    entry_storage = storage.get_storage(source=source, worksheet=name)
+    if entry_storage.filters_by_patient:
+        return entry_storage.list_patients()
+    return get_entries_cache(name=name, source=source).get_index().patients()
+
+
+# ========== DATE WINDOWS ==========
+# The history browser only shows one window of days at a time. Backends with a
+# (patient, date) index read just that window; otherwise it is served from the
+# resident cache's index and summary table without scanning the frame.
+def date_bounds(patient, name=sheets_client.WORKSHEET_NAME, source="secrets"):
+    entry_storage = storage.get_storage(source=source, worksheet=name)
+    if entry_storage.filters_by_patient:
+        return entry_storage.date_bounds(patient)
+    return get_entries_cache(name=name, source=source, patient=patient).get_index().bounds(patient)
+
+
+def window_summaries(patient, start, end, name=sheets_client.WORKSHEET_NAME, source="secrets"):
+    # DailySummary per day with an entry, start..end inclusive, oldest first.
+    entry_storage = storage.get_storage(source=source, worksheet=name)
+    if entry_storage.filters_by_patient:
+        header, rows = entry_storage.read_range(patient, start, end)
+        metrics.count("entries_rows_ingested", len(rows), fetch="window")
+        return sorted(summarize_frame(schema.to_frame(rows, header)), key=lambda summary: summary.date)
+    cache = get_entries_cache(name=name, source=source, patient=patient)
+    days = cache.get_index().dates_between(patient, start, end)
+    summaries = cache.get_summaries()
+    # A full reload between the two reads may have dropped a day edited out of the sheet.
+    return [summary for day in days if (summary := summaries.get(patient, day)) is not None]
@@ -0,0 +1,77 @@
+import bisect
+import threading
+
+import schema
+
+# Column holding the patient's username. Rows written before entries were keyed by
+# patient don't have it and are indexed under UNASSIGNED_PATIENT.
+PATIENT_COLUMN = "Patient"
+UNASSIGNED_PATIENT = ""
+DATE_COLUMN = "Date"
+
+
+class EntryIndex:
+    # Latest entry (a schema.DietEntry) per (patient, date) plus a sorted date
+    # list per patient, both maintained incrementally as rows are ingested.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._dates = {}
+        self._dates_desc = {}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dates.clear()
+            self._dates_desc.clear()
+
+    def add_frame(self, frame):
+        # frame is a typed chunk (schema.to_frame); rows without a valid date
+        # are skipped.
+        if frame.empty:
+            return
+        entries = schema.frame_entries(frame)
+
+        with self._lock:
+            for entry in entries:
+                patient, day = entry.patient or UNASSIGNED_PATIENT, entry.date
+                if day is None:
+                    continue
+                key = (patient, day)
+                if key not in self._entries:
+                    patient_dates = self._dates.setdefault(patient, [])
+                    # Entries are appended roughly in date order, so this is
+                    # usually an append at the end of the list.
+                    bisect.insort(patient_dates, day)
+                    self._dates_desc.pop(patient, None)
+                # Later rows win, so the index always holds the day's last submission.
+                self._entries[key] = entry
+
+    def patients(self):
+        with self._lock:
+            return sorted(self._dates)
+
+    def dates(self, patient=UNASSIGNED_PATIENT):
+        # Newest first, ready for a selectbox; rebuilt only when a new date arrives.
+        with self._lock:
+            cached = self._dates_desc.get(patient)
+            if cached is None:
+                cached = tuple(reversed(self._dates.get(patient, ())))
+                self._dates_desc[patient] = cached
+            return cached
+
+    def dates_between(self, patient, start, end):
+        # Oldest first, start..end inclusive; two bisects on the sorted list.
+        with self._lock:
+            patient_dates = self._dates.get(patient, [])
+            return patient_dates[bisect.bisect_left(patient_dates, start):bisect.bisect_right(patient_dates, end)]
+
+    def bounds(self, patient):
+        with self._lock:
+            patient_dates = self._dates.get(patient)
+            return (patient_dates[0], patient_dates[-1]) if patient_dates else None
+
+    def latest(self, patient, day):
+        with self._lock:
+            return self._entries.get((patient, day))
@@ -0,0 +1,184 @@
+import argparse
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+import sheets_client
+import storage
+from batch_writer import BATCH_MAX_ROWS
+from schema import ENTRY_COLUMNS, ENTRY_ID_COLUMN, NUMERIC_COLUMNS, TEXT_COLUMNS
+
+# ========== EXPORT / IMPORT CONFIG ==========
+# Stored rows read per storage call while exporting; memory use is bounded by
+# one chunk, whatever the size of the store.
+EXPORT_CHUNK_ROWS = 5000
+# Rows per storage.append_rows() call while importing. Matches the write
+# queue's batches, so the Sheets backend sends one append_rows request each.
+IMPORT_BATCH_ROWS = BATCH_MAX_ROWS
+FORMATS = ("csv", "parquet")
+
+
+def _format_for(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'; use one of {', '.join(FORMATS)}")
+    return fmt
+
+
+def _typed(frame):
+    # Same dtypes for every chunk, whatever each backend hands back, so the
+    # chunks concatenate into one consistent file.
+    frame = frame.reindex(columns=ENTRY_COLUMNS)
+    for column in NUMERIC_COLUMNS:
+        frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+    for column in TEXT_COLUMNS:
+        frame[column] = frame[column].fillna("").astype(str)
+    return frame
+
+
+def iter_entry_chunks(patient=None, chunk_rows=EXPORT_CHUNK_ROWS, source="secrets", worksheet=sheets_client.WORKSHEET_NAME):
+    # Pages through the store with read_since(limit=...), yielding one
+    # DataFrame per non-empty chunk. Stops at the first read that doesn't move
+    # the cursor forward, i.e. that found no stored rows past it.
+    entry_storage = storage.get_storage(source=source, worksheet=worksheet)
+    cursor = None
+    while True:
+        header, rows, next_cursor = entry_storage.read_since(cursor, patient=patient, limit=chunk_rows)
+        if rows:
+            yield _typed(pd.DataFrame(rows, columns=header))
+        if next_cursor is None or next_cursor <= (cursor or 0):
+            return
+        cursor = next_cursor
+
+
+def export_entries(path, fmt=None, patient=None, chunk_rows=EXPORT_CHUNK_ROWS, source="secrets", worksheet=sheets_client.WORKSHEET_NAME):
+    # Streams entries to CSV or Parquet chunk by chunk. Returns the row count.
+    fmt = _format_for(path, fmt)
+    chunks = iter_entry_chunks(patient=patient, chunk_rows=chunk_rows, source=source, worksheet=worksheet)
+    written = 0
+    if fmt == "csv":
+        with open(path, "w", newline="") as f:
+            # Header even for an empty export, so the file can be imported back.
+            pd.DataFrame(columns=ENTRY_COLUMNS).to_csv(f, index=False)
+            for chunk in chunks:
+                chunk.to_csv(f, index=False, header=False)
+                written += len(chunk)
+        return written
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(column, pa.float64() if column in NUMERIC_COLUMNS else pa.string()) for column in ENTRY_COLUMNS])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            # One row group per chunk.
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+            written += len(chunk)
+    return written
+
+
+def _read_chunks(path, fmt, batch_rows):
+    if fmt == "csv":
+        yield from pd.read_csv(path, chunksize=batch_rows, dtype=str, keep_default_na=False)
+        return
+    import pyarrow.parquet as pq
+
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_rows):
+        yield batch.to_pandas()
+
+
+def _derived_entry_id(row):
+    # Same patient, date and values, same id, whatever the file format, so
+    # importing a file again stores nothing twice.
+    position = ENTRY_COLUMNS.index(ENTRY_ID_COLUMN)
+    values = [float(value) if isinstance(value, (int, float)) else value
+              for i, value in enumerate(row) if i != position]
+    return hashlib.sha256(json.dumps(values).encode()).hexdigest()[:32]
+
+
+def _import_rows(frame, patient):
+    # Maps an imported chunk onto ENTRY_COLUMNS. Column names are matched
+    # case-insensitively; missing columns are left empty. An entry_id in the
+    # file is kept; rows without one get _derived_entry_id().
+    by_name = {str(column).strip().lower(): column for column in frame.columns}
+    frame = pd.DataFrame({
+        column: frame[by_name[column.lower()]] if column.lower() in by_name else None
+        for column in ENTRY_COLUMNS
+    }, index=frame.index)
+    if patient is not None:
+        frame["Patient"] = patient
+
+    dates = pd.to_datetime(frame["Date"], errors="coerce")
+    valid = dates.notna()
+    frame = frame[valid].copy()
+    # Stored the way the app writes dates (str(datetime.date)).
+    frame["Date"] = dates[valid].dt.strftime("%Y-%m-%d")
+    for column in NUMERIC_COLUMNS:
+        values = pd.to_numeric(frame[column], errors="coerce")
+        frame[column] = values.astype(object).where(values.notna(), None)
+    for column in TEXT_COLUMNS:
+        if column != "Date":
+            frame[column] = frame[column].fillna("").astype(str)
+    rows = frame.values.tolist()
+    position = ENTRY_COLUMNS.index(ENTRY_ID_COLUMN)
+    for row in rows:
+        row[position] = row[position] or _derived_entry_id(row)
+    return rows, int((~valid).sum())
+
+
+def import_entries(path, fmt=None, patient=None, batch_rows=IMPORT_BATCH_ROWS, retry=False,
+                   source="secrets", worksheet=sheets_client.WORKSHEET_NAME):
+    # Loads historical entries in batches through storage.append_rows().
+    # retry is for running an import again after it stopped part way: every
+    # batch is sent with maybe_written, so rows already stored are skipped.
+    # Returns (rows stored, rows skipped for a missing or invalid date).
+    fmt = _format_for(path, fmt)
+    entry_storage = storage.get_storage(source=source, worksheet=worksheet)
+    stored = skipped = 0
+    for chunk in _read_chunks(path, fmt, batch_rows):
+        rows, invalid = _import_rows(chunk, patient)
+        skipped += invalid
+        if rows:
+            results = entry_storage.append_rows(rows, maybe_written=retry)
+            stored += sum(1 for ok in results if ok)
+            skipped += sum(1 for ok in results if not ok)
+    return stored, skipped
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export or import diet entries.")
+    parser.add_argument("--source", default="secrets", choices=sorted(sheets_client.CREDENTIAL_SOURCES),
+                        help="Sheets credentials to use (ignored by the SQLite backend)")
+    parser.add_argument("--worksheet", default=sheets_client.WORKSHEET_NAME,
+                        help="Worksheet name; an empty string means the first worksheet")
+    parser.add_argument("--format", choices=FORMATS, help="File format (default: from the file extension)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = commands.add_parser("export", help="Stream entries to a CSV or Parquet file")
+    export_parser.add_argument("path")
+    export_parser.add_argument("--patient", help="Only this patient's entries")
+    export_parser.add_argument("--chunk-rows", type=int, default=EXPORT_CHUNK_ROWS)
+
+    import_parser = commands.add_parser("import", help="Load entries from a CSV or Parquet file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--patient", help="Store every row under this patient's username")
+    import_parser.add_argument("--batch-rows", type=int, default=IMPORT_BATCH_ROWS)
+    import_parser.add_argument("--retry", action="store_true",
+                               help="The file was partly imported before; skip rows already stored")
+
+    args = parser.parse_args(argv)
+    worksheet = args.worksheet or None
+    if args.command == "export":
+        written = export_entries(args.path, args.format, patient=args.patient, chunk_rows=args.chunk_rows,
+                                 source=args.source, worksheet=worksheet)
+        print(f"Exported {written} entries to {args.path}")
+    else:
+        stored, skipped = import_entries(args.path, args.format, patient=args.patient, batch_rows=args.batch_rows,
+                                         retry=args.retry, source=args.source, worksheet=worksheet)
+        print(f"Imported {stored} entries from {args.path}; skipped {skipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import re
+import threading
+
+from schema import ENTRY_COLUMNS
+from sheets_client import SPREADSHEET_NAME, WORKSHEET_NAME
+
+# ========== LOCAL FAKE GSPREAD BACKEND ==========
+# Minimal in-memory stand-in for the parts of the gspread API the apps use.
+# Enable it with sheets_client.use_client_factory(FakeClient) or by setting
+# DIET_SHEETS_BACKEND=fake before starting Streamlit.
+
+_RANGE_RE = re.compile(r"^[A-Z]+(\d+)(?::[A-Z]+(\d*))?$")
+
+
+def _to_cell(value):
+    # The Sheets API hands every cell back as a string.
+    if value is None:
+        return ""
+    return str(value)
+
+
+def _numericise(value):
+    if value == "":
+        return value
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def _padded(rows):
+    # Shaped like gspread's get_values(): the Sheets API leaves out trailing
+    # blank rows, gspread pads every row to the widest one, and an empty range
+    # comes back as [[]] rather than [] (gspread.utils.fill_gaps).
+    rows = list(rows)
+    while rows and not any(cell != "" for cell in rows[-1]):
+        rows.pop()
+    if not rows:
+        return [[]]
+    width = max(len(row) for row in rows)
+    return [list(row) + [""] * (width - len(row)) for row in rows]
+
+
+class FakeWorksheet:
+    def __init__(self, title, header=None):
+        self.title = title
+        self._rows = [list(header)] if header else []
+        self._lock = threading.Lock()
+        self.calls = {}
+
+    def _count(self, name):
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+    @property
+    def row_count(self):
+        return len(self._rows)
+
+    def append_row(self, values, value_input_option="RAW", **kwargs):
+        self._count("append_row")
+        with self._lock:
+            self._rows.append([_to_cell(v) for v in values])
+        return {"updates": {"updatedRows": 1}}
+
+    def append_rows(self, values, value_input_option="RAW", **kwargs):
+        self._count("append_rows")
+        with self._lock:
+            self._rows.extend([_to_cell(v) for v in row] for row in values)
+        return {"updates": {"updatedRows": len(values)}}
+
+    def get_all_values(self, **kwargs):
+        self._count("get_all_values")
+        with self._lock:
+            return _padded(self._rows)
+
+    def get_values(self, range_name=None, **kwargs):
+        # Supports whole-sheet reads and "A<start>:<col>[<end>]" row windows.
+        self._count("get_values")
+        with self._lock:
+            if range_name is None:
+                return _padded(self._rows)
+            match = _RANGE_RE.match(range_name)
+            if not match:
+                raise ValueError(f"Unsupported range for fake worksheet: {range_name}")
+            start = int(match.group(1)) - 1
+            end = int(match.group(2)) if match.group(2) else len(self._rows)
+            return _padded(self._rows[start:end])
+
+    def row_values(self, row):
+        self._count("row_values")
+        with self._lock:
+            if row > len(self._rows):
+                return []
+            return list(self._rows[row - 1])
+
+    def col_values(self, col):
+        self._count("col_values")
+        with self._lock:
+            return [row[col - 1] if len(row) >= col else "" for row in self._rows]
+
+    def get_all_records(self, **kwargs):
+        self._count("get_all_records")
+        with self._lock:
+            if not self._rows:
+                return []
+            header = self._rows[0]
+            return [
+                {key: _numericise(row[i]) if i < len(row) else "" for i, key in enumerate(header)}
+                for row in self._rows[1:]
+            ]
+
+
+class FakeSpreadsheet:
+    def __init__(self, title):
+        self.title = title
+        self._worksheets = {}
+
+    def add_worksheet(self, title, rows=1000, cols=26, header=None):
+        worksheet = FakeWorksheet(title, header=header)
+        self._worksheets[title] = worksheet
+        return worksheet
+
+    def worksheet(self, title):
+        if title not in self._worksheets:
+            raise KeyError(f"Worksheet '{title}' not found")
+        return self._worksheets[title]
+
+    @property
+    def sheet1(self):
+        return next(iter(self._worksheets.values()))
+
+    def worksheets(self):
+        return list(self._worksheets.values())
+
+
+class FakeClient:
+    def __init__(self):
+        self._spreadsheets = {}
+        self.open_calls = 0
+        # Mirror the real layout: one spreadsheet whose first tab is Entries.
+        self.open(SPREADSHEET_NAME).add_worksheet(WORKSHEET_NAME, header=ENTRY_COLUMNS)
+        self.open_calls = 0
+
+    def open(self, title):
+        self.open_calls += 1
+        if title not in self._spreadsheets:
+            self._spreadsheets[title] = FakeSpreadsheet(title)
+        return self._spreadsheets[title]
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_client():
+    # One fake per process so every app and session sees the same rows.
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = FakeClient()
+        return _shared
@@ -0,0 +1,98 @@
+import email
+import socketserver
+import threading
+
+# ========== LOCAL SMTP STAND-IN ==========
+# A tiny aiosmtpd-style sink: it speaks just enough plain SMTP for smtplib and
+# keeps every delivered message in memory. Point the app at it with
+#   [email] smtp_host = "127.0.0.1", smtp_port = <port>, smtp_ssl = false
+# in secrets.toml, or pass the settings from sink.settings() directly. The
+# tests under tests/ and benchmark.py use it the same way.
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    def _reply(self, line):
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self):
+        sink = self.server.sink
+        self._reply("220 localhost fake SMTP sink ready")
+        mail_from, rcpt_to = None, []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip()
+            verb = command.split(" ", 1)[0].upper()
+            if verb in ("EHLO", "HELO"):
+                self._reply("250 localhost")
+            elif verb == "MAIL":
+                mail_from, rcpt_to = command.split(":", 1)[1].strip(" <>"), []
+                self._reply("250 OK")
+            elif verb == "RCPT":
+                rcpt_to.append(command.split(":", 1)[1].strip(" <>"))
+                self._reply("250 OK")
+            elif verb == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                lines = []
+                while True:
+                    data = self.rfile.readline()
+                    if not data or data in (b".\r\n", b".\n"):
+                        break
+                    lines.append(data[1:] if data.startswith(b"..") else data)
+                sink.deliver(mail_from, rcpt_to, b"".join(lines))
+                self._reply("250 OK: queued")
+            elif verb in ("RSET", "NOOP"):
+                self._reply("250 OK")
+            elif verb == "QUIT":
+                self._reply("221 Bye")
+                return
+            else:
+                self._reply("502 Command not implemented")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = _Server((host, port), _SMTPHandler)
+        self._server.sink = self
+        self._lock = threading.Lock()
+        self.messages = []
+        self.host, self.port = self._server.server_address
+
+    def deliver(self, mail_from, rcpt_to, raw):
+        with self._lock:
+            self.messages.append({
+                "from": mail_from,
+                "to": list(rcpt_to),
+                "message": email.message_from_bytes(raw),
+            })
+
+    def settings(self, sender="app@localhost", receiver="doctor@localhost"):
+        return {
+            "sender": sender,
+            "receiver": receiver,
+            "password": None,
+            "host": self.host,
+            "port": self.port,
+            "use_ssl": False,
+        }
+
+    def start(self):
+        threading.Thread(target=self._server.serve_forever, name="fake-smtp", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
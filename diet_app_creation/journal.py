@@ -0,0 +1,66 @@
+import json
+import os
+
+# ========== JOURNAL CONFIG ==========
+# Durable work lists (the write-behind queue, the email notifier) keep one
+# journal per app under JOURNAL_DIR, so a restart picks up where it stopped.
+JOURNAL_DIR = "diet_app_creation/.queue"
+# Rewrite a journal once it has grown this much and nothing is pending.
+COMPACT_AFTER_BYTES = 1024 * 1024
+
+
+def journal_path(name):
+    return os.path.join(JOURNAL_DIR, f"{name}.journal")
+
+
+class Journal:
+    # Append-only file of JSON lines. Every write is flushed and fsync'd before
+    # it returns, so a record the caller has acknowledged survives a crash.
+    # Not thread-safe: owners write under their own lock.
+
+    def __init__(self, path):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = None
+
+    def records(self):
+        # Everything written so far, oldest first. Read before open().
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A torn last line from a crash mid-write; it was never acknowledged.
+                    continue
+
+    def open(self):
+        self._file = open(self.path, "a", encoding="utf-8")
+        return self
+
+    def write(self, *records):
+        for record in records:
+            self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def needs_compaction(self):
+        return self._file.tell() >= COMPACT_AFTER_BYTES
+
+    def compact(self, records):
+        # Replaces the whole journal with records, atomically.
+        self._file.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.writelines(json.dumps(record) + "\n" for record in records)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.open()
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
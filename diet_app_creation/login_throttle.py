@@ -0,0 +1,139 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+# ========== THROTTLE CONFIG ==========
+# Failures are counted per key inside the window, and a key that reaches its
+# limit is locked out:
+#   "user_ip"  one username from one client address; stops a single guesser
+#   "ip"       one client address across usernames (a clinic shares one)
+#   "user"     one username from anywhere; bounds guessing spread over many
+#              addresses, but never locks out a client the user has logged in
+#              from before, so a stranger can't lock a patient out.
+FAILURE_WINDOW_SECONDS = 15 * 60
+MAX_FAILURES = {"user_ip": 5, "ip": 20, "user": 50}
+# Lockout doubles with every further failure, up to the cap.
+LOCKOUT_BASE_SECONDS = 30
+LOCKOUT_MAX_SECONDS = 30 * 60
+# Concurrent password checks per key; stops one client from filling the bcrypt
+# pool. None leaves the key uncapped, so nobody can hold a user's only slot.
+MAX_IN_FLIGHT = {"user_ip": 1, "ip": 3, "user": None}
+# (username, address) pairs remembered as known-good after a successful login.
+KNOWN_CLIENTS_KEPT = 10000
+
+# Proxies in front of the app that append to X-Forwarded-For (one on
+# Streamlit Cloud). The client writes the leftmost entries itself, so the
+# address is taken this many hops from the right.
+TRUSTED_PROXY_HOPS_ENV_VAR = "DIET_TRUSTED_PROXY_HOPS"
+TRUSTED_PROXY_HOPS = int(os.environ.get(TRUSTED_PROXY_HOPS_ENV_VAR, "1"))
+
+
+def forwarded_ip(forwarded_for, hops=None):
+    # The address the outermost trusted proxy saw, from an X-Forwarded-For value.
+    hops = TRUSTED_PROXY_HOPS if hops is None else hops
+    addresses = [address.strip() for address in forwarded_for.split(",") if address.strip()]
+    if not addresses or hops < 1:
+        return None
+    # Fewer entries than proxies: every one was added by a trusted proxy.
+    return addresses[-min(hops, len(addresses))]
+
+
+def client_ip():
+    import streamlit as st
+
+    try:
+        headers = st.context.headers
+        forwarded = headers.get("X-Forwarded-For")
+        real_ip = headers.get("X-Real-Ip")
+    except Exception:
+        forwarded = real_ip = None
+    return (forwarded and forwarded_ip(forwarded)) or real_ip or "unknown"
+
+
+def login_keys(username, ip=None):
+    username = username or ""
+    ip = ip if ip is not None else client_ip()
+    return [("user_ip", (username, ip)), ("ip", ip), ("user", username)]
+
+
+class LoginThrottle:
+    # Failure counting with exponential lockout for the keys from login_keys(),
+    # plus a cap on in-flight checks per key. Rejections are decided before any
+    # bcrypt work.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._failures = {}
+        self._locked_until = {}
+        self._in_flight = {}
+        self._known = OrderedDict()  # user_ip keys that have logged in
+
+    def _prune(self, key, now):
+        failures = self._failures.get(key)
+        while failures and now - failures[0] > FAILURE_WINDOW_SECONDS:
+            failures.popleft()
+        if failures is not None and not failures:
+            del self._failures[key]
+
+    def begin(self, keys):
+        # Returns 0 if the attempt may proceed (and reserves an in-flight slot),
+        # otherwise the number of seconds to wait.
+        now = time.monotonic()
+        with self._lock:
+            known = any(key in self._known for key in keys if key[0] == "user_ip")
+            wait = 0
+            for key in keys:
+                locked_until = self._locked_until.get(key)
+                if locked_until is None:
+                    continue
+                if locked_until <= now:
+                    del self._locked_until[key]
+                elif not (known and key[0] == "user"):
+                    wait = max(wait, locked_until - now)
+            if wait > 0:
+                return wait
+            if any(MAX_IN_FLIGHT[key[0]] is not None and self._in_flight.get(key, 0) >= MAX_IN_FLIGHT[key[0]]
+                   for key in keys):
+                return 1
+            for key in keys:
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            return 0
+
+    def end(self, keys, success):
+        # success=None releases the slot without recording an outcome.
+        now = time.monotonic()
+        with self._lock:
+            for key in keys:
+                count = self._in_flight.get(key, 0) - 1
+                if count > 0:
+                    self._in_flight[key] = count
+                else:
+                    self._in_flight.pop(key, None)
+
+                if success is None:
+                    # The check never ran (e.g. the login pool was busy).
+                    continue
+                if success:
+                    # Only this user-and-client record is cleared: a shared IP
+                    # keeps its history, and so does a user still being guessed at elsewhere.
+                    if key[0] == "user_ip":
+                        self._failures.pop(key, None)
+                        self._locked_until.pop(key, None)
+                        self._known[key] = True
+                        self._known.move_to_end(key)
+                        while len(self._known) > KNOWN_CLIENTS_KEPT:
+                            self._known.popitem(last=False)
+                    continue
+
+                self._prune(key, now)
+                failures = self._failures.setdefault(key, deque())
+                failures.append(now)
+                excess = len(failures) - MAX_FAILURES[key[0]]
+                if excess >= 0:
+                    lockout = min(LOCKOUT_BASE_SECONDS * 2 ** excess, LOCKOUT_MAX_SECONDS)
+                    self._locked_until[key] = now + lockout
+
+
+# Shared by every session in the process.
+throttle = LoginThrottle()
@@ -0,0 +1,145 @@
+import bisect
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+from entry_index import DATE_COLUMN, PATIENT_COLUMN, UNASSIGNED_PATIENT
+from nutrition import singular
+from schema import MEAL_COLUMNS
+
+# ========== SEARCH CONFIG ==========
+# Words are lowercased and made singular the way nutrition.py matches foods,
+# so "Fries" in a query finds "fries" and "fry" in a meal.
+# Distinct meal texts whose word sets are kept in memory.
+TERMS_CACHE_SIZE = 16384
+
+_WORD_RE = re.compile(r"[a-z]+")
+
+
+@lru_cache(maxsize=TERMS_CACHE_SIZE)
+def terms(text):
+    # Patients repeat the same meals, so each distinct text is split once.
+    return frozenset(singular(word) for word in _WORD_RE.findall(text.lower())) if text else frozenset()
+
+
+@dataclass(slots=True, frozen=True)
+class SearchHit:
+    date: object
+    meal: str  # meal column, e.g. "bedtime_food"
+    text: str
+
+
+def _contains(days, day):
+    position = bisect.bisect_left(days, day)
+    return position < len(days) and days[position] == day
+
+
+class MealSearchIndex:
+    # Inverted index over the six meal fields: for every (patient, meal column,
+    # word) the sorted days whose latest entry has that word in that meal. Fed
+    # the same chunks as the EntryIndex, so a query never scans entry rows.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meals = {}     # (patient, day) -> meal texts of the day's latest entry, in MEAL_COLUMNS order
+        self._postings = {}  # (patient, meal column, word) -> sorted days
+
+    def clear(self):
+        with self._lock:
+            self._meals.clear()
+            self._postings.clear()
+
+    def _post(self, key, day, add):
+        days = self._postings.setdefault(key, [])
+        position = bisect.bisect_left(days, day)
+        present = position < len(days) and days[position] == day
+        if add and not present:
+            # Days arrive roughly in order, so this is usually an append.
+            days.insert(position, day)
+        elif not add and present:
+            del days[position]
+            if not days:
+                del self._postings[key]
+
+    def _replace(self, patient, day, texts):
+        # A later entry for an indexed day: only the words that changed are re-posted.
+        previous = self._meals[(patient, day)]
+        for column, old, new in zip(MEAL_COLUMNS, previous, texts):
+            if old == new:
+                continue
+            old_terms, new_terms = terms(old), terms(new)
+            for word in old_terms - new_terms:
+                self._post((patient, column, word), day, add=False)
+            for word in new_terms - old_terms:
+                self._post((patient, column, word), day, add=True)
+        self._meals[(patient, day)] = texts
+
+    def add_frame(self, frame):
+        # frame is a typed chunk (schema.to_frame). Later rows for a day replace
+        # earlier ones, as in EntryIndex.
+        if frame.empty:
+            return
+        frame = frame[frame[DATE_COLUMN].notna()]
+        days = frame[DATE_COLUMN].dt.date.tolist()
+        patients = [patient or UNASSIGNED_PATIENT for patient in frame[PATIENT_COLUMN].tolist()]
+        texts = list(zip(*(frame[column].tolist() for column in MEAL_COLUMNS)))
+        # Position of each (patient, day)'s last row in the chunk.
+        latest = dict(zip(zip(patients, days), range(len(days))))
+
+        with self._lock:
+            new = []
+            for key, position in latest.items():
+                if key in self._meals:
+                    self._replace(*key, texts[position])
+                else:
+                    new.append((key, texts[position]))
+
+            # Days seen for the first time (all of them on a full load) are
+            # grouped by meal text, so each distinct text is split once and
+            # every posting list is extended in one go.
+            pending = {}
+            if new:
+                keys, new_texts = zip(*new)
+                new_patients = [patient for patient, _ in keys]
+                new_days = [day for _, day in keys]
+                for column, column_texts in zip(MEAL_COLUMNS, zip(*new_texts)):
+                    by_text = {}
+                    for patient, text, day in zip(new_patients, column_texts, new_days):
+                        if text:
+                            by_text.setdefault((patient, text), []).append(day)
+                    for (patient, text), text_days in by_text.items():
+                        for word in terms(text):
+                            pending.setdefault((patient, column, word), []).extend(text_days)
+            for key, days_added in pending.items():
+                days_added.sort()
+                days_list = self._postings.setdefault(key, [])
+                needs_sort = bool(days_list) and days_added[0] < days_list[-1]
+                days_list.extend(days_added)
+                if needs_sort:
+                    days_list.sort()
+            self._meals.update(new)
+
+    def search(self, patient, query, meals=MEAL_COLUMNS, start=None, end=None):
+        # Meals of the patient containing every word of the query, within
+        # start..end (inclusive, either may be None), newest first.
+        words = terms(query)
+        if not words:
+            return []
+        hits = []
+        with self._lock:
+            for column in meals:
+                postings = [self._postings.get((patient, column, word)) for word in words]
+                if not all(postings):
+                    continue
+                # Walk the rarest word's days in range; check the others by bisection.
+                postings.sort(key=len)
+                rarest, others = postings[0], postings[1:]
+                low = bisect.bisect_left(rarest, start) if start is not None else 0
+                high = bisect.bisect_right(rarest, end) if end is not None else len(rarest)
+                position = MEAL_COLUMNS.index(column)
+                for day in rarest[low:high]:
+                    if all(_contains(days, day) for days in others):
+                        hits.append(SearchHit(day, column, self._meals[(patient, day)][position]))
+        hits.sort(key=lambda hit: (hit.date, MEAL_COLUMNS.index(hit.meal)), reverse=True)
+        return hits
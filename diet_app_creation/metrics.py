@@ -0,0 +1,233 @@
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ========== METRICS CONFIG ==========
+# Off by default. Enable with environment variables or the [metrics] secrets:
+#   DIET_METRICS=1            collect timers and counters
+#   DIET_METRICS_PORT=9464    also serve Prometheus text on http://127.0.0.1:9464/metrics
+#   DIET_METRICS_PANEL=1      also show the numbers in a sidebar debug panel
+# While disabled, timer() hands back one shared no-op context manager, so an
+# instrumented call costs a global lookup and a function call.
+ENABLED = os.environ.get("DIET_METRICS", "") not in ("", "0", "false")
+PORT = int(os.environ.get("DIET_METRICS_PORT", "0") or 0)
+PANEL = os.environ.get("DIET_METRICS_PANEL", "") not in ("", "0", "false")
+HOST = "127.0.0.1"
+PREFIX = "diet_"
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_lock = threading.Lock()
+_timers = {}    # (name, labels) -> [count, sum, bucket counts...]
+_counters = {}  # (name, labels) -> value
+_server = None
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+class _Timer:
+    __slots__ = ("key", "started")
+
+    def __init__(self, key):
+        self.key = key
+
+    def __enter__(self):
+        if not hasattr(self, "started"):
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        observe(self.key, time.perf_counter() - self.started)
+        return False
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items())) if labels else ()
+
+
+def timer(name, **labels):
+    # with metrics.timer("bcrypt_checkpw"): ...
+    # Recorded even when the block raises (including Streamlit's st.stop()).
+    if not ENABLED:
+        return _NOOP
+    return _Timer(_key(name, labels))
+
+
+def start_timer(name, **labels):
+    # For spans that can't be one with-block, such as a whole script rerun:
+    # started now, recorded when used as `with started_timer: ...` ends.
+    started = timer(name, **labels)
+    started.__enter__()
+    return started
+
+
+def timed(name, **labels):
+    # Decorator form of timer().
+    def decorate(func):
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Timer(_key(name, labels)):
+                return func(*args, **kwargs)
+        wrapper.__name__ = func.__name__
+        wrapper.__wrapped__ = func
+        return wrapper
+    return decorate
+
+
+def observe(key, seconds):
+    with _lock:
+        stats = _timers.get(key)
+        if stats is None:
+            stats = _timers[key] = [0, 0.0] + [0] * len(BUCKETS)
+        stats[0] += 1
+        stats[1] += seconds
+        position = bisect.bisect_left(BUCKETS, seconds)
+        if position < len(BUCKETS):
+            stats[2 + position] += 1
+
+
+def count(name, value=1, **labels):
+    if not ENABLED:
+        return
+    key = _key(name, labels)
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def snapshot():
+    # Rows for display: one per timer and counter.
+    with _lock:
+        timers = {key: list(stats) for key, stats in _timers.items()}
+        counters = dict(_counters)
+    rows = []
+    for (name, labels), stats in sorted(timers.items()):
+        calls, total = stats[0], stats[1]
+        rows.append({
+            "metric": name, "labels": _label_text(labels), "calls": calls,
+            "total_ms": round(total * 1000, 2), "avg_ms": round(total * 1000 / calls, 2) if calls else 0.0,
+        })
+    for (name, labels), value in sorted(counters.items()):
+        rows.append({"metric": name, "labels": _label_text(labels), "calls": value, "total_ms": None, "avg_ms": None})
+    return rows
+
+
+def _label_text(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def render_prometheus():
+    # Prometheus text exposition format (version 0.0.4).
+    with _lock:
+        timers = {key: list(stats) for key, stats in _timers.items()}
+        counters = dict(_counters)
+    lines = []
+    for name in sorted({name for name, _ in timers}):
+        metric = f"{PREFIX}{name}_seconds"
+        lines.append(f"# TYPE {metric} histogram")
+        for (key_name, labels), stats in sorted(timers.items()):
+            if key_name != name:
+                continue
+            cumulative = 0
+            for bound, bucket in zip(BUCKETS, stats[2:]):
+                cumulative += bucket
+                lines.append(f"{metric}_bucket{_label_text(labels, [('le', f'{bound:g}')])} {cumulative}")
+            lines.append(f"{metric}_bucket{_label_text(labels, [('le', '+Inf')])} {stats[0]}")
+            lines.append(f"{metric}_sum{_label_text(labels)} {stats[1]:.6f}")
+            lines.append(f"{metric}_count{_label_text(labels)} {stats[0]}")
+    for name in sorted({name for name, _ in counters}):
+        metric = f"{PREFIX}{name}_total"
+        lines.append(f"# TYPE {metric} counter")
+        for (key_name, labels), value in sorted(counters.items()):
+            if key_name == name:
+                lines.append(f"{metric}{_label_text(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = render_prometheus().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port=None, host=HOST):
+    # Starts the /metrics endpoint once per process; later calls are no-ops.
+    global _server
+    with _lock:
+        if _server is not None:
+            return _server
+        _server = ThreadingHTTPServer((host, port or PORT), _MetricsHandler)
+        _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-http", daemon=True).start()
+    return _server
+
+
+def configure():
+    # Called at the top of each app. Environment variables win over the
+    # [metrics] secrets; the endpoint is started the first time a port is set.
+    global ENABLED, PORT, PANEL
+    try:
+        import streamlit as st
+        config = st.secrets.get("metrics", {})
+    except Exception:
+        config = {}
+    if "DIET_METRICS" not in os.environ:
+        ENABLED = bool(config.get("enabled", ENABLED))
+    if "DIET_METRICS_PORT" not in os.environ:
+        PORT = int(config.get("port", PORT) or 0)
+    if "DIET_METRICS_PANEL" not in os.environ:
+        PANEL = bool(config.get("panel", PANEL))
+    if ENABLED and PORT and _server is None:
+        try:
+            serve(PORT)
+        except OSError as e:
+            # Another app process on this host already owns the port.
+            print(f"Metrics endpoint not started on port {PORT}: {e}")
+            PORT = 0
+    return ENABLED
+
+
+def render_debug_panel():
+    if not (ENABLED and PANEL):
+        return
+    import streamlit as st
+
+    with st.sidebar.expander("Performance metrics"):
+        rows = snapshot()
+        if rows:
+            st.dataframe(rows, hide_index=True)
+        else:
+            st.caption("Nothing recorded yet.")
+        if st.button("Reset metrics"):
+            reset()
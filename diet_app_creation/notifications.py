@@ -0,0 +1,387 @@
+import smtplib
+import ssl
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+
+import journal
+import metrics
+
+# ========== EMAIL CONFIG ==========
+SMTP_HOST = "smtp.gmail.com"
+SMTP_PORT = 465
+
+
+def load_email_settings():
+    # Reads the [email] secrets table. smtp_host/smtp_port/smtp_ssl are optional
+    # and let a local SMTP stand-in (see fake_smtp.py) replace Gmail.
+    import streamlit as st
+
+    email = st.secrets["email"]
+    return {
+        "sender": email["email_user"],
+        "receiver": email["receiver_email"],
+        "password": email["email_password"],
+        "host": email.get("smtp_host", SMTP_HOST),
+        "port": int(email.get("smtp_port", SMTP_PORT)),
+        "use_ssl": bool(email.get("smtp_ssl", True)),
+    }
+
+
+def build_message(sender, receiver, subject, body):
+    message = MIMEMultipart("alternative")
+    message["Subject"] = subject
+    message["From"] = sender
+    message["To"] = receiver
+    message.attach(MIMEText(body, "plain"))
+    return message
+
+
+def send_email(settings, subject, body):
+    # Raises on failure so callers such as the write-behind queue can retry.
+    message = build_message(settings["sender"], settings["receiver"], subject, body)
+    if settings.get("use_ssl", True):
+        context = ssl.create_default_context()
+        server = smtplib.SMTP_SSL(settings["host"], settings["port"], context=context)
+    else:
+        server = smtplib.SMTP(settings["host"], settings["port"])
+    with metrics.timer("smtp_send", session="oneshot"), server:
+        if settings.get("password"):
+            server.login(settings["sender"], settings["password"])
+        server.sendmail(settings["sender"], settings["receiver"], message.as_string())
+
+
+def send_email_notification(subject, body, settings=None):
+    try:
+        send_email(settings or load_email_settings(), subject, body)
+        print("Email sent successfully.")
+        return True
+    except Exception as e:
+        print(f"Error sending email: {e}")
+        return False
+
+
+# ========== PERSISTENT SMTP CONNECTION ==========
+SMTP_IDLE_SECONDS = 120
+SMTP_TIMEOUT_SECONDS = 30
+# Digest mode: DIGEST_SUBJECT events for the same recipient are grouped into
+# one email per interval. 0 sends every event on its own.
+DIGEST_INTERVAL_SECONDS = 0
+DIGEST_SUBJECT = "New Diet Entry!"
+RETRY_SECONDS = 30
+MAX_SEND_ATTEMPTS = 5
+# Keys of sent notifications remembered (and kept across compaction) so a
+# repeated notify() with the same key is recognised as already handled.
+DONE_KEYS_KEPT = 5000
+
+
+class SMTPConnection:
+    # One logged-in SMTP session, reused across sends. A NOOP before each use
+    # checks the server still has us; a dead session is replaced transparently.
+
+    def __init__(self, settings):
+        self.settings = settings
+        self._server = None
+        self.last_used = 0.0
+        self.connects = 0
+
+    @metrics.timed("smtp_connect")
+    def _connect(self):
+        settings = self.settings
+        if settings.get("use_ssl", True):
+            context = ssl.create_default_context()
+            server = smtplib.SMTP_SSL(settings["host"], settings["port"], context=context,
+                                      timeout=SMTP_TIMEOUT_SECONDS)
+        else:
+            server = smtplib.SMTP(settings["host"], settings["port"], timeout=SMTP_TIMEOUT_SECONDS)
+        if settings.get("password"):
+            server.login(settings["sender"], settings["password"])
+        self._server = server
+        self.connects += 1
+
+    def _healthy(self):
+        if self._server is None:
+            return False
+        try:
+            return self._server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def send(self, receiver, subject, body):
+        message = build_message(self.settings["sender"], receiver, subject, body).as_string()
+        if not self._healthy():
+            self.close()
+            self._connect()
+        try:
+            with metrics.timer("smtp_send", session="pooled"):
+                self._server.sendmail(self.settings["sender"], receiver, message)
+        except (smtplib.SMTPServerDisconnected, OSError):
+            # The NOOP can race a server-side idle timeout; retry once on a new session.
+            self.close()
+            self._connect()
+            self._server.sendmail(self.settings["sender"], receiver, message)
+        self.last_used = time.monotonic()
+
+    def close(self):
+        if self._server is not None:
+            try:
+                self._server.quit()
+            except (smtplib.SMTPException, OSError):
+                pass
+            self._server = None
+
+
+# ========== NOTIFIER ==========
+def _new_event(key, subject, body, receiver):
+    return {"id": key, "subject": subject, "body": body, "receiver": receiver,
+            "attempts": 0, "next_attempt": 0.0}
+
+
+class Notifier:
+    # Sends notifications from a background thread over a pooled SMTP
+    # connection, so submitting an entry never waits on the mail server.
+    # notify() only enqueues. With a digest interval, events are grouped per
+    # recipient and sent as one summary email when the interval elapses.
+    #
+    # With a journal_path, notify() first appends the event to a journal
+    # (see journal.py) and it is marked done only once its email has been sent
+    # or given up on, so emails still waiting for SMTP or for their digest are
+    # sent after a restart. Records:
+    #   {"op": "put", "id": ..., "subject": ..., "body": ..., "receiver": ...}
+    #   {"op": "done", "id": ...}
+    # notify(..., key=...) is idempotent like WriteBehindQueue.submit().
+
+    def __init__(self, load_settings, digest_interval=DIGEST_INTERVAL_SECONDS, start=True, journal_path=None):
+        self._load_settings = load_settings
+        self.digest_interval = digest_interval
+        self._cond = threading.Condition()
+        self._events = deque()
+        self._digests = {}
+        self._pending = set()
+        self._done = OrderedDict()
+        self._stopped = False
+        self._flushing = False
+        self._in_flight = 0
+        self._connection = None
+        self.sent = 0
+        self.last_error = None
+        self._journal = None
+        if journal_path:
+            self._journal = journal.Journal(journal_path)
+            self._replay()
+            self._journal.open()
+        self._thread = threading.Thread(target=self._run, name="diet-notifier", daemon=True)
+        if start:
+            self._thread.start()
+
+    # ---------- journal ----------
+    def _replay(self):
+        events = {}
+        for record in self._journal.records():
+            op, key = record.get("op"), record.get("id")
+            if op == "put":
+                events[key] = _new_event(key, record["subject"], record["body"], record.get("receiver"))
+            elif op == "done":
+                events.pop(key, None)
+                self._remember_done(key)
+        self._events.extend(events.values())
+        self._pending.update(events)
+
+    def _remember_done(self, key):
+        self._done[key] = True
+        self._done.move_to_end(key)
+        while len(self._done) > DONE_KEYS_KEPT:
+            self._done.popitem(last=False)
+
+    def _finish(self, events):
+        # Sent or given up on: never sent again, even after a restart.
+        with self._cond:
+            if self._journal is not None:
+                self._journal.write(*({"op": "done", "id": event["id"]} for event in events))
+            for event in events:
+                self._pending.discard(event["id"])
+                self._remember_done(event["id"])
+            if self._journal is not None and not self._pending and self._journal.needs_compaction():
+                self._journal.compact({"op": "done", "id": key} for key in self._done)
+
+    # ---------- public API ----------
+    def notify(self, subject, body, receiver=None, key=None):
+        key = key or uuid.uuid4().hex
+        with self._cond:
+            if key in self._pending or key in self._done:
+                return
+            if self._journal is not None:
+                self._journal.write({"op": "put", "id": key, "subject": subject, "body": body,
+                                     "receiver": receiver})
+            self._pending.add(key)
+            self._events.append(_new_event(key, subject, body, receiver))
+            self._cond.notify()
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._events) + sum(len(d["events"]) for d in self._digests.values())
+
+    def flush(self, timeout=10):
+        # Sends any open digests now and waits for the backlog to drain.
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            self._flushing = True
+            try:
+                self._cond.notify_all()
+                while self._events or self._digests or self._in_flight:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._cond.wait(remaining)
+            finally:
+                self._flushing = False
+        return True
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        if self._connection is not None:
+            self._connection.close()
+        if self._journal is not None:
+            with self._cond:
+                self._journal.close()
+
+    def _get_connection(self):
+        if self._connection is None:
+            self._connection = SMTPConnection(self._load_settings())
+        return self._connection
+
+    def _take_due(self, now):
+        # Called with the condition held: returns the sends that are due now,
+        # each as (receiver, subject, body, source events).
+        due = []
+        waiting = deque()
+        while self._events:
+            event = self._events.popleft()
+            if event["next_attempt"] > now:
+                # Retries wait out their delay without holding back newer events.
+                waiting.append(event)
+            elif self.digest_interval and event["subject"] == DIGEST_SUBJECT:
+                digest = self._digests.setdefault(event["receiver"], {
+                    "events": [], "due": now + self.digest_interval})
+                digest["events"].append(event)
+            else:
+                due.append((event["receiver"], event["subject"], event["body"], [event]))
+        self._events = waiting
+        for receiver, digest in list(self._digests.items()):
+            # flush() sends open digests early, but a retry still waits out its delay.
+            if digest["due"] <= now or (self._flushing and digest.get("retry_at", 0) <= now):
+                del self._digests[receiver]
+                events = digest["events"]
+                if len(events) == 1:
+                    due.append((receiver, events[0]["subject"], events[0]["body"], events))
+                else:
+                    body = f"{len(events)} new diet entries were submitted:\n\n" + "\n".join(
+                        f"- {event['body']}" for event in events)
+                    due.append((receiver, f"{len(events)} New Diet Entries", body, events))
+        self._in_flight += len(due)
+        return due
+
+    def _next_wake(self, now):
+        times = [d["due"] for d in self._digests.values()]
+        times.extend(event["next_attempt"] for event in self._events)
+        if self._connection is not None and self._connection.last_used:
+            times.append(self._connection.last_used + SMTP_IDLE_SECONDS)
+        return max(min(times) - now, 0.01) if times else None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                now = time.monotonic()
+                due = self._take_due(now)
+                while not due and not self._stopped and not self._is_idle(now):
+                    self._cond.wait(self._next_wake(now))
+                    now = time.monotonic()
+                    due = self._take_due(now)
+                if self._stopped and not due:
+                    return
+
+            if not due:
+                # QUIT is a network round trip, so the idle session is closed
+                # without holding the lock notify() needs.
+                self._connection.close()
+                self._connection.last_used = 0.0
+                continue
+
+            for receiver, subject, body, events in due:
+                try:
+                    connection = self._get_connection()
+                    connection.send(receiver or connection.settings["receiver"], subject, body)
+                    self.sent += 1
+                    print("Email sent successfully.")
+                except Exception as e:
+                    self.last_error = e
+                    print(f"Error sending email: {e}")
+                    self._requeue(events)
+                    continue
+                self._finish(events)
+
+            with self._cond:
+                self._in_flight -= len(due)
+                self._cond.notify_all()
+
+    def _is_idle(self, now):
+        connection = self._connection
+        return connection is not None and connection.last_used and now - connection.last_used >= SMTP_IDLE_SECONDS
+
+    def _requeue(self, events):
+        given_up = []
+        with self._cond:
+            retry_at = time.monotonic() + RETRY_SECONDS
+            retried = []
+            for event in events:
+                event["attempts"] += 1
+                if event["attempts"] >= MAX_SEND_ATTEMPTS:
+                    given_up.append(event)
+                elif self.digest_interval and event["subject"] == DIGEST_SUBJECT:
+                    retried.append(event)
+                else:
+                    event["next_attempt"] = retry_at
+                    self._events.append(event)
+            if retried:
+                # A failed digest is retried as one email, ahead of any entries
+                # that have joined a digest for the same recipient since.
+                receiver = retried[0]["receiver"]
+                digest = self._digests.setdefault(receiver, {"events": [], "due": retry_at})
+                digest["events"][:0] = retried
+                digest["due"] = digest["retry_at"] = retry_at
+        if given_up:
+            print(f"Giving up on {len(given_up)} email(s) after {MAX_SEND_ATTEMPTS} attempts")
+            self._finish(given_up)
+
+
+_notifiers = {}
+_notifiers_lock = threading.Lock()
+
+
+def get_notifier(name="default", load_settings=load_email_settings, digest_interval=None):
+    # One notifier (thread + SMTP session) per process and name, journaled
+    # under journal.JOURNAL_DIR as notify-<name>. Apps running as separate
+    # processes need their own name. digest_interval defaults to the optional
+    # digest_minutes in the [email] secrets.
+    with _notifiers_lock:
+        if name not in _notifiers:
+            if digest_interval is None:
+                digest_interval = _digest_interval_from_secrets()
+            _notifiers[name] = Notifier(load_settings, digest_interval,
+                                        journal_path=journal.journal_path(f"notify-{name}"))
+        return _notifiers[name]
+
+
+def _digest_interval_from_secrets():
+    try:
+        import streamlit as st
+        return float(st.secrets["email"].get("digest_minutes", 0)) * 60 or DIGEST_INTERVAL_SECONDS
+    except Exception:
+        return DIGEST_INTERVAL_SECONDS
@@ -0,0 +1,221 @@
+import csv
+import re
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+import pandas as pd
+
+# ========== NUTRITION CONFIG ==========
+# Bundled food-composition table: one row per food, nutrients per serving.
+# aliases is a ';'-separated list of other names that map to the same food.
+FOOD_TABLE_PATH = "diet_app_creation/food_table.csv"
+# Distinct normalized meal texts whose estimates are kept in memory.
+ESTIMATE_CACHE_SIZE = 16384
+
+NUTRIENTS = ["kcal", "protein_g", "carbs_g", "fat_g"]
+
+# Words that only separate or decorate items ("toast with butter", "a bowl of oats").
+SKIP_WORDS = {
+    "and", "with", "of", "some", "little", "bit", "plus", "w", "on", "in", "the",
+    "cup", "bowl", "glass", "plate", "slice", "piece", "serving", "portion", "handful",
+    "tbsp", "tablespoon", "tsp", "teaspoon", "small", "medium", "large", "big", "mug", "x",
+}
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "seven": 7, "eight": 8, "nine": 9, "ten": 10, "half": 0.5, "couple": 2, "few": 3,
+}
+GRAM_UNITS = {"g", "gm", "gms", "gram", "grams", "gr"}
+
+_TOKEN_RE = re.compile(r"\d+(?:[./]\d+)?|[a-z]+")
+# Commas, semicolons, newlines and "+" end an item, so "2 eggs, toast" doesn't
+# carry the 2 over to the toast.
+_ITEM_SEPARATOR_RE = re.compile(r"[,;+\n]+")
+
+
+@dataclass(slots=True, frozen=True)
+class Food:
+    name: str
+    serving: str
+    serving_g: float
+    kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+
+
+@dataclass(slots=True, frozen=True)
+class MealEstimate:
+    # items holds (food, servings) pairs; unmatched holds words no food matched.
+    items: tuple
+    unmatched: tuple
+    kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+
+
+EMPTY_ESTIMATE = MealEstimate((), (), 0.0, 0.0, 0.0, 0.0)
+
+
+def normalize(text):
+    # Case, spacing and punctuation differences shouldn't cost a cache miss.
+    if text is None or (isinstance(text, float) and pd.isna(text)):
+        return ""
+    text = str(text).lower()
+    return "\n".join(" ".join(_TOKEN_RE.findall(item)) for item in _ITEM_SEPARATOR_RE.split(text) if item.strip())
+
+
+def singular(token):
+    # Applied to the table and to meal text alike, so it only has to be consistent.
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 4 and token.endswith("oes"):
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _quantity(token):
+    if token in NUMBER_WORDS:
+        return NUMBER_WORDS[token]
+    if "/" in token:
+        numerator, denominator = token.split("/")
+        return float(numerator) / float(denominator) if float(denominator) else None
+    try:
+        return float(token)
+    except ValueError:
+        return None
+
+
+class FoodMatcher:
+    # Token trie over every food name and alias. Matching walks the meal's
+    # tokens once, always taking the longest name that starts at each token
+    # ("peanut butter" over "butter").
+
+    _END = None
+
+    def __init__(self, foods):
+        self.foods = foods
+        self._trie = {}
+        for food, names in foods:
+            for name in names:
+                tokens = [singular(token) for token in _TOKEN_RE.findall(name.lower())]
+                node = self._trie
+                for token in tokens:
+                    node = node.setdefault(token, {})
+                node.setdefault(self._END, food)
+
+    @classmethod
+    def from_csv(cls, path=FOOD_TABLE_PATH):
+        foods = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                food = Food(
+                    name=row["name"],
+                    serving=row["serving"],
+                    **{field: float(row[field] or 0) for field in ["serving_g"] + NUTRIENTS},
+                )
+                aliases = [alias.strip() for alias in row["aliases"].split(";") if alias.strip()]
+                foods.append((food, [food.name] + aliases))
+        return cls(foods)
+
+    def _longest_match(self, tokens, start):
+        node, match, end = self._trie, None, start
+        for position in range(start, len(tokens)):
+            node = node.get(tokens[position])
+            if node is None:
+                break
+            if self._END in node:
+                match, end = node[self._END], position + 1
+        return match, end
+
+    def match(self, normalized_text):
+        items, unmatched = [], []
+        for line in normalized_text.split("\n"):
+            tokens = [singular(token) for token in line.split()]
+            quantity, grams = None, False
+            position = 0
+            while position < len(tokens):
+                token = tokens[position]
+                food, end = self._longest_match(tokens, position)
+                if food is not None:
+                    servings = quantity if quantity is not None else 1.0
+                    if grams and food.serving_g:
+                        servings = quantity / food.serving_g
+                    items.append((food, servings))
+                    quantity, grams = None, False
+                    position = end
+                    continue
+                value = _quantity(token)
+                if value is not None and quantity is None:
+                    quantity = value
+                elif token in GRAM_UNITS and quantity is not None:
+                    grams = True
+                elif token not in SKIP_WORDS and value is None:
+                    unmatched.append(token)
+                position += 1
+        return items, unmatched
+
+
+_matcher = None
+_matcher_lock = threading.Lock()
+
+
+def get_matcher():
+    # The trie is built once per process and shared by every session.
+    global _matcher
+    with _matcher_lock:
+        if _matcher is None:
+            _matcher = FoodMatcher.from_csv()
+        return _matcher
+
+
+@lru_cache(maxsize=ESTIMATE_CACHE_SIZE)
+def _estimate_normalized(normalized_text):
+    if not normalized_text:
+        return EMPTY_ESTIMATE
+    items, unmatched = get_matcher().match(normalized_text)
+    totals = {nutrient: sum(getattr(food, nutrient) * servings for food, servings in items) for nutrient in NUTRIENTS}
+    return MealEstimate(items=tuple(items), unmatched=tuple(unmatched), **totals)
+
+
+def estimate_meal(text):
+    # Patients repeat the same meals, so estimates are memoized by normalized text.
+    return _estimate_normalized(normalize(text))
+
+
+def _factorized_estimates(texts):
+    # (codes, estimates): each distinct text in the column is estimated once.
+    # Missing cells get code -1, which picks the empty estimate appended last.
+    # A categorical column (schema.to_frame) is already factorized.
+    if isinstance(texts.dtype, pd.CategoricalDtype):
+        codes, uniques = texts.cat.codes.to_numpy(), texts.cat.categories
+    else:
+        codes, uniques = pd.factorize(texts)
+    return codes, [estimate_meal(text) for text in uniques] + [EMPTY_ESTIMATE]
+
+
+def estimate_column(texts):
+    # One MealEstimate per row of a meal column.
+    codes, estimates = _factorized_estimates(texts)
+    return [estimates[code] for code in codes.tolist()]
+
+
+def estimate_table(estimates, labels):
+    # Rows of per-meal nutrients plus a day total, for display.
+    rows = []
+    for column, label in labels.items():
+        estimate = estimates[column]
+        rows.append({
+            "Meal": label,
+            "Matched foods": ", ".join(f"{servings:g} x {food.name}" for food, servings in estimate.items),
+            **{nutrient: round(getattr(estimate, nutrient), 1) for nutrient in NUTRIENTS},
+        })
+    rows.append({
+        "Meal": "Total",
+        "Matched foods": "",
+        **{nutrient: round(sum(getattr(estimates[column], nutrient) for column in labels), 1) for nutrient in NUTRIENTS},
+    })
+    return pd.DataFrame(rows)
@@ -0,0 +1,98 @@
+import hashlib
+import hmac
+import threading
+import time
+from collections import OrderedDict
+
+import pyotp
+
+# ========== OTP CONFIG ==========
+# Per-user TOTP objects, provisioning URIs and QR code PNGs, built once and
+# reused by every rerun of the OTP screen. An entry is rebuilt when the user's
+# secret changes (rotation), and the least recently used entries are dropped
+# beyond OTP_CACHE_SIZE.
+OTP_CACHE_SIZE = 1024
+# Accepted clock drift in 30-second steps either side of now; 0 matches
+# pyotp's TOTP.verify() default used before.
+VALID_WINDOW = 0
+
+_lock = threading.Lock()
+_entries = OrderedDict()  # username -> _OtpEntry
+# username -> (secret fingerprint, last accepted time step). Kept apart from
+# the LRU so evicting a cache entry never reopens a used code. This is per
+# process and in memory only: after a restart, or in another app process, a
+# code can be accepted once more within its 30-second step.
+_last_used = {}
+
+
+def _fingerprint(secret):
+    return hashlib.sha256(secret.encode()).hexdigest()
+
+
+class _OtpEntry:
+    __slots__ = ("secret", "totp", "uris", "qr_pngs")
+
+    def __init__(self, secret):
+        self.secret = secret
+        self.totp = pyotp.TOTP(secret)
+        self.uris = {}     # issuer -> provisioning URI
+        self.qr_pngs = {}  # issuer -> PNG bytes
+
+
+def _entry(username, secret):
+    with _lock:
+        entry = _entries.get(username)
+        if entry is None or entry.secret != secret:
+            # New user or rotated secret: the old TOTP and QR code are stale.
+            entry = _entries[username] = _OtpEntry(secret)
+            while len(_entries) > OTP_CACHE_SIZE:
+                _entries.popitem(last=False)
+        _entries.move_to_end(username)
+        return entry
+
+
+def provisioning_uri(username, secret, issuer):
+    entry = _entry(username, secret)
+    uri = entry.uris.get(issuer)
+    if uri is None:
+        uri = entry.uris[issuer] = entry.totp.provisioning_uri(name=username, issuer_name=issuer)
+    return uri
+
+
+def provisioning_qr(username, secret, issuer):
+    # PNG bytes of the QR code for the authenticator app. qrcode (and PIL
+    # behind it) is imported the first time a code is drawn.
+    entry = _entry(username, secret)
+    png = entry.qr_pngs.get(issuer)
+    if png is None:
+        from io import BytesIO
+
+        import qrcode
+
+        buf = BytesIO()
+        qrcode.make(provisioning_uri(username, secret, issuer)).save(buf)
+        png = entry.qr_pngs[issuer] = buf.getvalue()
+    return png
+
+
+def verify(username, secret, code, valid_window=VALID_WINDOW, now=None):
+    # True for a current code that hasn't been accepted before. Each accepted
+    # code records its time step, and codes from that step or earlier are
+    # refused afterwards, so an observed code can't be replayed in its window.
+    code = str(code or "").strip()
+    if not code:
+        return False
+    totp = _entry(username, secret).totp
+    now = time.time() if now is None else now
+    current = int(now) // totp.interval
+    fingerprint = _fingerprint(secret)
+    for offset in range(-valid_window, valid_window + 1):
+        step = current + offset
+        if hmac.compare_digest(totp.generate_otp(step), code):
+            with _lock:
+                last_fingerprint, last_step = _last_used.get(username, (None, -1))
+                if last_fingerprint == fingerprint and step <= last_step:
+                    return False
+                _last_used[username] = (fingerprint, step)
+            return True
+    return False
@@ -0,0 +1,158 @@
+import datetime
+
+import streamlit as st
+
+from schema import DietEntry
+
+# ========== PAGE CONFIG ==========
+# The daily entry form, shared by streamlit_app.py, app.py and the Daily Entry
+# page of diet_tracker.py. Needs only Streamlit, the caller's write queue and
+# its draft store (see drafts.py).
+SUBMIT_NOTIFICATION_SUBJECT = "New Diet Entry!"
+# Form fields in stored column order, with the values a new day starts from.
+FIELD_DEFAULTS = {
+    "weight": 70.0,
+    "sleep_hours": 7,
+    "sleep_minutes": 30,
+    "coffee_cups": 2,
+    "walking_distance": 3.0,
+    "breakfast_food": "",
+    "snack_food": "",
+    "lunch_food": "",
+    "evening_food": "",
+    "dinner_food": "",
+    "bedtime_food": "",
+}
+
+
+# ========== DRAFTS ==========
+def _widget_key(field):
+    return f"draft_{field}"
+
+def _load_draft(drafts, username, day, whole_kg):
+    # Fills the widgets from the saved draft when the day changes, or when
+    # Streamlit has dropped the widget state (e.g. after a session timeout).
+    keys = [_widget_key(field) for field in FIELD_DEFAULTS]
+    if st.session_state.get("draft_for") == (username, day) and all(key in st.session_state for key in keys):
+        return
+    draft = drafts.get(username, day)
+    values = {**FIELD_DEFAULTS, **(draft["fields"] if draft else {})}
+    values["weight"] = int(values["weight"]) if whole_kg else float(values["weight"])
+    values["walking_distance"] = float(values["walking_distance"])
+    for field, value in values.items():
+        st.session_state[_widget_key(field)] = value
+    st.session_state["draft_for"] = (username, day)
+
+def _save_field(drafts, username, day, field):
+    # on_change callback: runs before the rerun, so every edit is on disk
+    # even if the connection drops straight afterwards.
+    drafts.update(username, day, **{field: st.session_state[_widget_key(field)]})
+
+def _draft_status(drafts, queue, username, day):
+    draft = drafts.get(username, day)
+    if draft is None:
+        return
+    if draft["submitted_at"] is None:
+        saved_at = datetime.datetime.fromtimestamp(draft["updated_at"]).strftime("%H:%M")
+        st.caption(f"Draft saved at {saved_at}. It stays here until you submit it.")
+    elif queue.is_pending(draft["entry_id"]):
+        st.caption("Submitted. Waiting to sync; it will be saved as soon as the connection is back.")
+    else:
+        st.caption("Submitted and saved.")
+
+
+# ========== DAILY ENTRY FORM ==========
+def render(username, queue, drafts, notify=True, whole_kg=False):
+    # Title
+    st.title("Diet Tracker App")
+
+    # Description
+    st.write("""
+    Welcome to the Diet Tracker App! This app helps you track your daily activities, food consumption, and other parameters to help you meet your diet goals.
+    """)
+
+    # Calendar Selection (Date Picker)
+    st.header("Select the Date")
+    selected_date = st.date_input("Choose a date", datetime.date.today())
+    st.write(f"You selected: {selected_date}")
+    day = str(selected_date)
+    _load_draft(drafts, username, day, whole_kg)
+    _draft_status(drafts, queue, username, day)
+
+    def draft_input(widget, field, *args, **kwargs):
+        # Every input is bound to its draft field and saved as it changes.
+        return widget(*args, key=_widget_key(field), on_change=_save_field, args=(drafts, username, day, field), **kwargs)
+
+    # User Input Section
+    st.header("Enter Your Daily Information:")
+
+    # Weight Input (kg); app.py has always stored whole kilograms.
+    if whole_kg:
+        weight = draft_input(st.number_input, "weight", "Weight (kg)", min_value=30, max_value=300)
+    else:
+        weight = draft_input(st.number_input, "weight", "Weight (kg)", min_value=30.0, max_value=300.0)
+
+    # Sleep Hours and Minutes
+    st.subheader("Sleep Hours")
+    sleep_hours = draft_input(st.number_input, "sleep_hours", "Hours of Sleep", min_value=0, max_value=24)
+    sleep_minutes = draft_input(st.number_input, "sleep_minutes", "Minutes of Sleep", min_value=0, max_value=59)
+
+    # Number of Cups of Coffee Consumed
+    coffee_cups = draft_input(st.slider, "coffee_cups", "Number of cups of coffee consumed", 1, 10)
+
+    # Walking Distance in km
+    walking_distance = draft_input(st.number_input, "walking_distance", "Walking Distance (in km)", min_value=0.0)
+
+    # Food Consumption at Different Times
+    st.subheader("Breakfast (06:45 AM - 08:00 AM)")
+    breakfast_food = draft_input(st.text_area, "breakfast_food", "Food Consumed (Breakfast)", placeholder="Enter foods consumed during breakfast")
+
+    st.subheader("Snack or Light Meals (09:30 AM - 11:30 AM)")
+    snack_food = draft_input(st.text_area, "snack_food", "Food Consumed (Snack)", placeholder="Enter foods consumed during snack or light meal")
+
+    st.subheader("Lunch (12:30 PM - 02:30 PM)")
+    lunch_food = draft_input(st.text_area, "lunch_food", "Food Consumed (Lunch)", placeholder="Enter foods consumed during lunch")
+
+    st.subheader("Evening Snack (05:30 PM)")
+    evening_food = draft_input(st.text_area, "evening_food", "Food Consumed (Evening Snack)", placeholder="Enter foods consumed during evening snack")
+
+    st.subheader("Dinner (07:00 PM - 08:00 PM)")
+    dinner_food = draft_input(st.text_area, "dinner_food", "Food Consumed (Dinner)", placeholder="Enter foods consumed during dinner")
+
+    st.subheader("Before Bed Snack (09:00 PM - 10:30 PM)")
+    bedtime_food = draft_input(st.text_area, "bedtime_food", "Food Consumed (Before Bed)", placeholder="Enter foods consumed before bed")
+
+    if st.button("Submit"):
+        st.write("Submitting your entry...")
+
+        values = [
+            weight,
+            sleep_hours,
+            sleep_minutes,
+            coffee_cups,
+            walking_distance,
+            breakfast_food,
+            snack_food,
+            lunch_food,
+            evening_food,
+            dinner_food,
+            bedtime_food,
+        ]
+        # The draft's entry_id is the idempotency key: pressing Submit again, or
+        # a resubmit after a dropped connection, is recognised and not stored twice.
+        draft = drafts.update(username, day, **dict(zip(FIELD_DEFAULTS, values)))
+        entry = DietEntry(selected_date, *values, patient=username, entry_id=draft["entry_id"])
+
+        # Journaled to disk and acknowledged immediately; the Sheets write and
+        # the email happen on the background worker, which keeps retrying
+        # until the store is reachable again.
+        notification = None
+        if notify:
+            notification = {
+                "subject": SUBMIT_NOTIFICATION_SUBJECT,
+                "body": f"A new diet entry has been submitted by {username}. Please review it!"
+            }
+        queue.submit(entry.to_row(), notification, key=entry.entry_id)
+        drafts.mark_submitted(username, day)
+
+        st.success("Entry submitted successfully! It will be saved in the background.")
@@ -0,0 +1,157 @@
+import datetime
+import math
+from dataclasses import astuple, dataclass, fields
+
+# ========== ENTRY SCHEMA ==========
+# One definition of a diet entry for the form that writes it, the storage
+# backends, and the caches that read it back. Stored rows are plain lists in
+# ENTRY_COLUMNS order (the header row of the Entries worksheet); in memory an
+# entry is a DietEntry, and a history is a typed frame (see to_frame()).
+
+# Header row of the Entries worksheet, in the order the entry form writes it.
+# Patient (the submitting username) and entry_id (the submission's idempotency
+# key, see drafts.py) were added last so older rows still line up.
+ENTRY_COLUMNS = [
+    "Date", "Weight", "Hours", "Minutes", "coffee_cups", "walking_distance",
+    "breakfast_food", "snack_food", "lunch_food", "evening_food", "dinner_food", "bedtime_food",
+    "Patient", "entry_id",
+]
+ENTRY_ID_COLUMN = "entry_id"
+MEAL_COLUMNS = ["breakfast_food", "snack_food", "lunch_food", "evening_food", "dinner_food", "bedtime_food"]
+NUMERIC_COLUMNS = ["Weight", "Hours", "Minutes", "coffee_cups", "walking_distance"]
+TEXT_COLUMNS = [column for column in ENTRY_COLUMNS if column not in NUMERIC_COLUMNS]
+
+# Typed frame dtypes. Numbers are float32 (NaN marks a missing value); the
+# patient and meal texts repeat heavily, so they are categoricals holding each
+# distinct string once.
+COLUMN_DTYPES = {
+    "Date": "datetime64[ns]",
+    **{column: "float32" for column in NUMERIC_COLUMNS},
+    **{column: "category" for column in MEAL_COLUMNS},
+    "Patient": "category",
+    ENTRY_ID_COLUMN: "object",
+}
+CATEGORY_COLUMNS = [column for column, dtype in COLUMN_DTYPES.items() if dtype == "category"]
+
+
+@dataclass(slots=True, frozen=True)
+class DietEntry:
+    # Fields in ENTRY_COLUMNS order.
+    date: datetime.date
+    weight: float
+    sleep_hours: int
+    sleep_minutes: int
+    coffee_cups: int
+    walking_km: float
+    breakfast_food: str = ""
+    snack_food: str = ""
+    lunch_food: str = ""
+    evening_food: str = ""
+    dinner_food: str = ""
+    bedtime_food: str = ""
+    patient: str = ""
+    entry_id: str = ""
+
+    def to_row(self):
+        # The stored form: ENTRY_COLUMNS order, the date as YYYY-MM-DD.
+        row = list(astuple(self))
+        row[0] = str(self.date)
+        return row
+
+    @classmethod
+    def from_row(cls, row, header=ENTRY_COLUMNS):
+        # Parses one stored row (from any backend), coercing each field once.
+        values = dict(zip(header, row))
+        return cls(*(_coerce(name, values.get(column)) for name, column in FIELD_COLUMNS.items()))
+
+
+# DietEntry field -> stored column.
+FIELD_COLUMNS = dict(zip((f.name for f in fields(DietEntry)), ENTRY_COLUMNS))
+_FIELD_TYPES = {f.name: f.type for f in fields(DietEntry)}
+_COLUMN_TYPES = {column: _FIELD_TYPES[name] for name, column in FIELD_COLUMNS.items()}
+
+
+def _coerce(name, value):
+    kind = _FIELD_TYPES[name]
+    if kind is str:
+        return "" if value is None or (isinstance(value, float) and math.isnan(value)) else str(value)
+    if kind is datetime.date:
+        if isinstance(value, datetime.datetime):
+            return value.date()
+        if isinstance(value, datetime.date):
+            return value
+        try:
+            return datetime.date.fromisoformat(str(value).strip()[:10])
+        except ValueError:
+            return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return None
+    if math.isnan(number):
+        return None
+    return int(number) if kind is int else number
+
+
+# ========== TYPED FRAMES ==========
+def to_frame(rows, header=ENTRY_COLUMNS):
+    # Stored rows -> typed frame with exactly ENTRY_COLUMNS. This is the one
+    # place values are parsed; readers use the columns as they are.
+    import pandas as pd
+
+    raw = pd.DataFrame(rows, columns=header)
+    frame = pd.DataFrame(index=raw.index)
+    for column in ENTRY_COLUMNS:
+        values = raw[column] if column in raw.columns else pd.Series(None, index=raw.index, dtype=object)
+        if column == "Date":
+            frame[column] = pd.to_datetime(values, errors="coerce")
+        elif column in NUMERIC_COLUMNS:
+            frame[column] = pd.to_numeric(values, errors="coerce").astype("float32")
+        else:
+            values = values.fillna("").astype(str)
+            frame[column] = values.astype("category") if column in CATEGORY_COLUMNS else values
+    return frame
+
+
+def empty_frame():
+    return to_frame([])
+
+
+def append_frame(frame, new_rows):
+    # frame + new_rows (a typed frame) without falling back to object columns:
+    # categoricals are merged over the union of both sides' categories.
+    import pandas as pd
+
+    if new_rows.empty:
+        return frame
+    if frame.empty:
+        return new_rows.reset_index(drop=True)
+    frame, new_rows = frame.copy(deep=False), new_rows.copy(deep=False)
+    for column in CATEGORY_COLUMNS:
+        categories = frame[column].cat.categories.union(new_rows[column].cat.categories)
+        frame[column] = frame[column].cat.set_categories(categories)
+        new_rows[column] = new_rows[column].cat.set_categories(categories)
+    return pd.concat([frame, new_rows], ignore_index=True)
+
+
+def float_values(series):
+    # A float32 column as Python floats, each the shortest decimal that maps to
+    # the same float32 (68.6 rather than 68.5999984741211). NaN stays NaN.
+    return series.to_numpy().astype(str).astype("float64").tolist()
+
+
+def frame_entries(frame):
+    # DietEntry per row of a typed frame, built column-wise. Rows without a
+    # valid date get date=None.
+    columns = []
+    for column in ENTRY_COLUMNS:
+        series = frame[column]
+        if column == "Date":
+            values = [None if day != day else day for day in series.dt.date.tolist()]
+        elif column in NUMERIC_COLUMNS:
+            kind = _COLUMN_TYPES[column]
+            values = [None if value != value else kind(value) for value in float_values(series)]
+        else:
+            values = series.astype(object).tolist()
+        columns.append(values)
+    return [DietEntry(*values) for values in zip(*columns)]
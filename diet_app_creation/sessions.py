@@ -0,0 +1,335 @@
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+
+# ========== SESSION CONFIG ==========
+# Server-side login sessions. After the password and OTP steps an app calls
+# start(), which stores a session and puts a signed token in the page URL
+# (?session=...). A reconnect, reload or new tab with that URL resumes the
+# session through resume() without bcrypt or OTP. Sessions expire after
+# SESSION_TTL_MINUTES without activity (every resume() slides the expiry) and
+# never outlive SESSION_MAX_HOURS.
+#
+# Streamlit can't set an HttpOnly cookie, so the token has to live in the URL,
+# where history, bookmarks and shared links can leak it. To limit that, a
+# token only resolves for the browser it was issued to (a hash of its
+# User-Agent; not the IP, which changes whenever a phone switches networks),
+# and the first time a browser session resumes from a token it gets a fresh
+# one and the old token stops working.
+#
+# "memory" (default) or "sqlite" backend. Set DIET_SESSION_BACKEND, or
+#   [sessions]
+#   backend = "sqlite"
+#   sqlite_path = "diet_app_creation/sessions.db"
+#   secret = "..."   # token signing key; generated if missing
+# in secrets.toml. SQLite sessions survive restarts and are shared by app processes.
+BACKEND_ENV_VAR = "DIET_SESSION_BACKEND"
+SECRET_ENV_VAR = "DIET_SESSION_SECRET"
+SQLITE_PATH = "diet_app_creation/sessions.db"
+SESSION_TTL_MINUTES = 30
+SESSION_MAX_HOURS = 4
+# The stored expiry is only rewritten once it is this stale, so most reruns
+# resolve a session with one read and no write.
+TOUCH_INTERVAL_SECONDS = 60
+SWEEP_INTERVAL_SECONDS = 5 * 60
+QUERY_PARAM = "session"
+# st.session_state key holding the token this browser session was given.
+STATE_KEY = "session_token"
+
+
+@dataclass(slots=True)
+class Session:
+    id: str
+    app: str
+    username: str
+    role: str
+    created_at: float
+    expires_at: float
+    client: str = ""
+
+
+# ========== BACKENDS ==========
+class MemorySessionBackend:
+    # Sessions in a dict; lost on restart, private to this process.
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions = {}
+        self.signing_key = secrets.token_bytes(32)
+
+    def get(self, session_id):
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def put(self, session):
+        with self._lock:
+            self._sessions[session.id] = session
+
+    def touch(self, session_id, expires_at):
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                session.expires_at = expires_at
+
+    def delete(self, session_id):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def sweep(self, now):
+        with self._lock:
+            expired = [sid for sid, session in self._sessions.items() if session.expires_at <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        return len(expired)
+
+
+class SQLiteSessionBackend:
+    # One table keyed by session id, in WAL mode like the entry store. The
+    # generated signing key is kept in the same file so tokens survive restarts.
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        conn = self._connect()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS sessions (
+                    id TEXT PRIMARY KEY,
+                    app TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    client TEXT NOT NULL DEFAULT ''
+                )""")
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(sessions)")}
+            if "client" not in columns:
+                # Files created before sessions were bound to a client.
+                conn.execute("ALTER TABLE sessions ADD COLUMN client TEXT NOT NULL DEFAULT ''")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions (expires_at)")
+            conn.execute("CREATE TABLE IF NOT EXISTS session_keys (id INTEGER PRIMARY KEY CHECK (id = 1), key BLOB NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO session_keys (id, key) VALUES (1, ?)", (secrets.token_bytes(32),))
+        self.signing_key = conn.execute("SELECT key FROM session_keys WHERE id = 1").fetchone()[0]
+
+    def _connect(self):
+        # sqlite3 connections can't be shared across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, session_id):
+        row = self._connect().execute(
+            "SELECT id, app, username, role, created_at, expires_at, client FROM sessions WHERE id = ?", (session_id,)
+        ).fetchone()
+        return Session(*row) if row else None
+
+    def put(self, session):
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, app, username, role, created_at, expires_at, client) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (session.id, session.app, session.username, session.role, session.created_at, session.expires_at,
+                 session.client),
+            )
+
+    def touch(self, session_id, expires_at):
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE sessions SET expires_at = ? WHERE id = ?", (expires_at, session_id))
+
+    def delete(self, session_id):
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+
+    def sweep(self, now):
+        conn = self._connect()
+        with conn:
+            return conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,)).rowcount
+
+
+# ========== SESSION MANAGER ==========
+def _sign(key, session_id):
+    digest = hmac.new(key, session_id.encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+class SessionManager:
+    # Issues and checks tokens of the form "<session id>.<HMAC of the id>".
+    # Forged or mangled tokens are rejected by the signature check alone,
+    # without a backend lookup.
+
+    def __init__(self, backend, signing_key=None, ttl_seconds=SESSION_TTL_MINUTES * 60,
+                 max_age_seconds=SESSION_MAX_HOURS * 3600, clock=time.time):
+        self.backend = backend
+        self._key = signing_key or backend.signing_key
+        self.ttl_seconds = ttl_seconds
+        self.max_age_seconds = max_age_seconds
+        self._clock = clock
+        self._sweeper = None
+
+    def create(self, app, username, role, client=""):
+        now = self._clock()
+        return self._issue(Session(None, app, username, role, now, now + self.ttl_seconds, client))
+
+    def _issue(self, session):
+        session.id = secrets.token_urlsafe(24)
+        self.backend.put(session)
+        return f"{session.id}.{_sign(self._key, session.id)}"
+
+    def _session_id(self, token):
+        session_id, _, signature = (token or "").partition(".")
+        if not session_id or not hmac.compare_digest(signature, _sign(self._key, session_id)):
+            return None
+        return session_id
+
+    def resolve(self, token, app, client=""):
+        # The live session for this token, app and client, with its expiry slid
+        # forward; None if the token is invalid, expired or for another app or client.
+        session_id = self._session_id(token)
+        if session_id is None:
+            return None
+        session = self.backend.get(session_id)
+        now = self._clock()
+        if session is None or session.app != app or not hmac.compare_digest(session.client, client):
+            return None
+        if session.expires_at <= now:
+            self.backend.delete(session_id)
+            return None
+        expires_at = min(now + self.ttl_seconds, session.created_at + self.max_age_seconds)
+        if expires_at - session.expires_at >= TOUCH_INTERVAL_SECONDS:
+            self.backend.touch(session_id, expires_at)
+            session.expires_at = expires_at
+        return session
+
+    def rotate(self, session):
+        # Moves a resolved session to a new token and revokes the old one. The
+        # creation time is kept, so rotating never extends the absolute cap.
+        old_id = session.id
+        token = self._issue(Session(None, session.app, session.username, session.role, session.created_at,
+                                    session.expires_at, session.client))
+        self.backend.delete(old_id)
+        return token
+
+    def revoke(self, token):
+        session_id = self._session_id(token)
+        if session_id is not None:
+            self.backend.delete(session_id)
+
+    def sweep(self):
+        return self.backend.sweep(self._clock())
+
+    def start_sweeper(self, interval=SWEEP_INTERVAL_SECONDS):
+        # Deletes expired sessions in the background; started once per process.
+        if self._sweeper is not None:
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Session sweep failed: {e}")
+
+        self._sweeper = threading.Thread(target=run, name="session-sweeper", daemon=True)
+        self._sweeper.start()
+
+
+def _configured_backend():
+    backend = os.environ.get(BACKEND_ENV_VAR)
+    sqlite_path = SQLITE_PATH
+    secret = os.environ.get(SECRET_ENV_VAR)
+    try:
+        import streamlit as st
+        config = st.secrets.get("sessions", {})
+        backend = backend or config.get("backend")
+        sqlite_path = config.get("sqlite_path", sqlite_path)
+        secret = secret or config.get("secret")
+    except Exception:
+        # No secrets.toml (e.g. the keyfile-based apps); fall back to the defaults.
+        pass
+    return backend or "memory", sqlite_path, secret
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_session_manager():
+    # One manager (and sweeper thread) per process, shared by every app.
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            backend, sqlite_path, secret = _configured_backend()
+            if backend == "sqlite":
+                store = SQLiteSessionBackend(sqlite_path)
+            elif backend == "memory":
+                store = MemorySessionBackend()
+            else:
+                raise ValueError(f"Unknown session backend: {backend}")
+            _manager = SessionManager(store, signing_key=secret.encode() if secret else None)
+            _manager.start_sweeper()
+        return _manager
+
+
+# ========== STREAMLIT HELPERS ==========
+def client_id():
+    # Hash of the browser's User-Agent, so a leaked URL is useless elsewhere.
+    import streamlit as st
+
+    try:
+        agent = st.context.headers.get("User-Agent") or ""
+    except Exception:
+        agent = ""
+    return hashlib.sha256(agent.encode()).hexdigest()
+
+def resume(app):
+    # (session, had_token) for the token in the page URL. A token that no
+    # longer resolves is removed from the URL. A token this browser session
+    # didn't receive itself (a reload, new tab or pasted link) is replaced.
+    import streamlit as st
+
+    token = st.query_params.get(QUERY_PARAM)
+    if not token:
+        return None, False
+    manager = get_session_manager()
+    session = manager.resolve(token, app, client_id())
+    if session is None:
+        del st.query_params[QUERY_PARAM]
+        st.session_state.pop(STATE_KEY, None)
+    elif st.session_state.get(STATE_KEY) != token:
+        token = manager.rotate(session)
+        st.query_params[QUERY_PARAM] = token
+        st.session_state[STATE_KEY] = token
+    return session, True
+
+def start(app, username, role):
+    import streamlit as st
+
+    token = get_session_manager().create(app, username, role, client_id())
+    st.query_params[QUERY_PARAM] = token
+    st.session_state[STATE_KEY] = token
+
+def end():
+    import streamlit as st
+
+    token = st.query_params.get(QUERY_PARAM)
+    st.session_state.pop(STATE_KEY, None)
+    if token:
+        get_session_manager().revoke(token)
+        del st.query_params[QUERY_PARAM]
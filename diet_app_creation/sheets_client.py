@@ -0,0 +1,121 @@
+import os
+import threading
+
+import metrics
+
+# ========== SHEETS CONFIG ==========
+SCOPE = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+SPREADSHEET_NAME = "Diet_Tracker_Entries"
+WORKSHEET_NAME = "Entries"
+KEYFILE_PATH = "diet_app_creation/creds.json"
+
+# Set DIET_SHEETS_BACKEND=fake to run against the in-process fake in fake_gspread.py.
+BACKEND_ENV_VAR = "DIET_SHEETS_BACKEND"
+
+# ========== PROCESS-WIDE CONNECTION CACHE ==========
+# Streamlit re-executes the app script on every interaction, but imported modules
+# stay loaded, so the client and worksheet handles kept here survive reruns and are
+# shared by every session in the process.
+_lock = threading.Lock()
+_clients = {}
+_worksheets = {}
+_client_factory = None
+
+
+# gspread and oauth2client are imported on first connection rather than at
+# module import, so pages that never touch Sheets (login, entry form) load faster.
+def _credentials_from_secrets():
+    import streamlit as st
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    account = st.secrets["gcp_service_account"]
+    creds_dict = {
+        "type": account["type"],
+        "project_id": account["project_id"],
+        "private_key_id": account["private_key_id"],
+        "private_key": account["private_key"].replace("\\n", "\n"),
+        "client_email": account["client_email"],
+        "client_id": account["client_id"],
+        "auth_uri": account["auth_uri"],
+        "token_uri": account["token_uri"],
+        "auth_provider_x509_cert_url": account["auth_provider_x509_cert_url"],
+        "client_x509_cert_url": account["client_x509_cert_url"],
+        "universe_domain": account["universe_domain"],
+    }
+    return ServiceAccountCredentials.from_json_keyfile_dict(creds_dict, SCOPE)
+
+
+def _credentials_from_keyfile():
+    from oauth2client.service_account import ServiceAccountCredentials
+
+    return ServiceAccountCredentials.from_json_keyfile_name(KEYFILE_PATH, SCOPE)
+
+
+CREDENTIAL_SOURCES = {
+    "secrets": _credentials_from_secrets,
+    "keyfile": _credentials_from_keyfile,
+}
+
+
+def _default_client_factory():
+    if os.environ.get(BACKEND_ENV_VAR) == "fake":
+        import fake_gspread
+        return fake_gspread.shared_client
+    return None
+
+
+def use_client_factory(factory):
+    # Replace the real gspread client with factory() for every source,
+    # e.g. use_client_factory(fake_gspread.FakeClient). Pass None to go back.
+    global _client_factory
+    with _lock:
+        _client_factory = factory
+        _clients.clear()
+        _worksheets.clear()
+
+
+def reset(source=None):
+    # Drop cached handles so the next call reconnects (e.g. after revoked credentials).
+    with _lock:
+        if source is None:
+            _clients.clear()
+            _worksheets.clear()
+            return
+        _clients.pop(source, None)
+        for key in [k for k in _worksheets if k[0] == source]:
+            del _worksheets[key]
+
+
+def get_client(source="secrets"):
+    with _lock:
+        client = _clients.get(source)
+        if client is None:
+            factory = _client_factory or _default_client_factory()
+            if factory is not None:
+                client = factory()
+            else:
+                import gspread
+
+                # gspread wraps the service account in google-auth credentials used
+                # through an AuthorizedSession, which only refreshes the access token
+                # when a request finds it expired. Keeping the client is therefore
+                # safe for the life of the process.
+                with metrics.timer("gspread_authorize", source=source):
+                    client = gspread.authorize(CREDENTIAL_SOURCES[source]())
+            _clients[source] = client
+        return client
+
+
+def get_worksheet(name=WORKSHEET_NAME, source="secrets"):
+    # name=None opens the first worksheet, like spreadsheet.sheet1.
+    key = (source, name)
+    with _lock:
+        worksheet = _worksheets.get(key)
+    if worksheet is not None:
+        return worksheet
+
+    with metrics.timer("gspread_open", source=source):
+        spreadsheet = get_client(source).open(SPREADSHEET_NAME)
+    worksheet = spreadsheet.worksheet(name) if name else spreadsheet.sheet1
+    with _lock:
+        return _worksheets.setdefault(key, worksheet)
@@ -0,0 +1,332 @@
+import datetime
+import os
+import sqlite3
+import threading
+
+import metrics
+import sheets_client
+from batch_writer import BatchWriter
+from schema import ENTRY_COLUMNS, ENTRY_ID_COLUMN
+
+# ========== STORAGE CONFIG ==========
+# "sheets" (default) or "sqlite". Set DIET_STORAGE_BACKEND, or
+#   [storage]
+#   backend = "sqlite"
+#   sqlite_path = "diet_app_creation/diet_entries.db"
+# in secrets.toml.
+BACKEND_ENV_VAR = "DIET_STORAGE_BACKEND"
+SQLITE_PATH = "diet_app_creation/diet_entries.db"
+
+
+class EntryStorage:
+    # Interface shared by the storage backends.
+    #
+    # append_rows(rows, maybe_written) takes rows in ENTRY_COLUMNS order and
+    # returns one bool per row. A row whose entry_id is already stored counts as
+    # stored and is not written again; backends that can't enforce that on
+    # every write check first when maybe_written is True.
+    # read_since(cursor, patient, limit) returns (header, rows, cursor):
+    # every row stored after the given cursor (all rows for None), optionally
+    # only one patient's, plus a cursor to pass next time, so readers can follow
+    # the store incrementally. With a limit, at most that many stored rows are
+    # scanned per call, so a reader can page through the store in bounded
+    # chunks; the cursor stops advancing once everything has been read.
+    #
+    # Backends with filters_by_patient also answer date-windowed reads:
+    # read_range(patient, start, end) returns (header, rows) for the patient's
+    # rows dated start..end inclusive, in storage order, and
+    # date_bounds(patient) returns the first and last date (None if there are no rows).
+
+    # How long readers may serve a cached view before calling read_since() again.
+    cache_ttl = 0
+    # True when read_since(patient=...), read_range() and date_bounds() are
+    # answered from a per-patient index, so loading one patient never touches
+    # the others' rows.
+    filters_by_patient = False
+
+    def append_rows(self, rows, maybe_written=False):
+        raise NotImplementedError
+
+    def read_since(self, cursor=None, patient=None, limit=None):
+        raise NotImplementedError
+
+    def list_patients(self):
+        raise NotImplementedError
+
+    def read_range(self, patient, start, end):
+        raise NotImplementedError
+
+    def date_bounds(self, patient):
+        raise NotImplementedError
+
+
+# ========== GOOGLE SHEETS BACKEND ==========
+def _is_blank(row):
+    return not any(cell != "" for cell in row)
+
+
+def _rows_consumed(rows):
+    # Sheet rows a read has moved past: up to and including the last non-blank
+    # one. An empty range comes back from gspread as [[]], which must not count
+    # as a row, and a window whose tail is blank is read again next time.
+    for position in range(len(rows) - 1, -1, -1):
+        if not _is_blank(rows[position]):
+            return position + 1
+    return 0
+
+
+class SheetsStorage(EntryStorage):
+    # Each read is a network round trip, so readers cache for a minute.
+    cache_ttl = 60
+
+    def __init__(self, source="secrets", worksheet=sheets_client.WORKSHEET_NAME):
+        self.source = source
+        self.worksheet = worksheet
+        self._header = None
+        self._writer = BatchWriter(self._get_worksheet, find_written=self._find_written)
+
+    def _get_worksheet(self):
+        return sheets_client.get_worksheet(name=self.worksheet, source=self.source)
+
+    def append_rows(self, rows, maybe_written=False):
+        # One append_rows call for the whole batch, retried with backoff.
+        return self._writer.write(rows, maybe_written)
+
+    def _find_written(self, rows):
+        # Sheets has no unique constraint, so after an append that may or may
+        # not have been applied, the entry_id column is read back (one request).
+        position = ENTRY_COLUMNS.index(ENTRY_ID_COLUMN)
+        with metrics.timer("sheets_read", call="col_values"):
+            stored = set(self._get_worksheet().col_values(position + 1)[1:])
+        stored.discard("")
+        return [len(row) > position and row[position] in stored for row in rows]
+
+    def _clean(self, rows):
+        from gspread.utils import numericise_all
+
+        width = len(self._header)
+        rows = [row for row in rows if not _is_blank(row)]
+        return [numericise_all(row + [""] * (width - len(row)))[:width] for row in rows]
+
+    def _filter(self, rows, patient):
+        if patient is None:
+            return rows
+        column = self._header.index("Patient")
+        return [row for row in rows if row[column] == patient]
+
+    def _set_header(self, header):
+        # Sheets created before a column was added lack its header cell.
+        if header == ENTRY_COLUMNS[:len(header)]:
+            header = list(ENTRY_COLUMNS)
+        self._header = header
+
+    def read_since(self, cursor=None, patient=None, limit=None):
+        # The cursor is the number of data rows already read. Rows are only
+        # ever appended, so new rows are fetched with one ranged read that
+        # starts just past the cursor (row 1 is the header). Sheets can't
+        # filter server-side, so a patient filter is applied after the read.
+        # The cursor only moves past non-blank rows (see _rows_consumed), so
+        # polling an unchanged sheet leaves it where it is. With a limit, a run
+        # of `limit` or more blank rows reads as the end of the sheet.
+        if limit is None and (cursor is None or self._header is None):
+            with metrics.timer("sheets_read", call="get_all_values"):
+                values = self._get_worksheet().get_all_values()
+            self._set_header(values[0] if values else [])
+            rows = self._clean(values[1:])
+            return self._header, self._filter(rows, patient), _rows_consumed(values[1:])
+
+        if self._header is None:
+            with metrics.timer("sheets_read", call="row_values"):
+                self._set_header(self._get_worksheet().row_values(1))
+        from gspread.utils import rowcol_to_a1
+
+        cursor = cursor or 0
+        last_column = rowcol_to_a1(1, len(self._header)).rstrip("0123456789")
+        end_row = f"{cursor + 1 + limit}" if limit else ""
+        with metrics.timer("sheets_read", call="get_values"):
+            new_rows = self._get_worksheet().get_values(f"A{cursor + 2}:{last_column}{end_row}")
+        return self._header, self._filter(self._clean(new_rows), patient), cursor + _rows_consumed(new_rows)
+
+    def list_patients(self):
+        _, rows, _ = self.read_since(None)
+        column = self._header.index("Patient")
+        return sorted({row[column] for row in rows})
+
+
+# ========== SQLITE BACKEND ==========
+# Sheet header -> SQL column. Food fields keep their names.
+SQL_COLUMNS = {
+    "Date": "date",
+    "Weight": "weight",
+    "Hours": "hours",
+    "Minutes": "minutes",
+    "Patient": "patient",
+}
+SQL_TYPES = {
+    "patient": "TEXT NOT NULL DEFAULT ''",
+    "date": "TEXT NOT NULL",
+    "weight": "REAL",
+    "hours": "INTEGER",
+    "minutes": "INTEGER",
+    "coffee_cups": "INTEGER",
+    "walking_distance": "REAL",
+}
+
+
+def _sql_column(header):
+    return SQL_COLUMNS.get(header, header)
+
+
+class SQLiteStorage(EntryStorage):
+    # Local single-file store in WAL mode, so the doctor dashboard can read
+    # while patients write. Reads are indexed and take milliseconds, so readers
+    # don't need to cache.
+    cache_ttl = 0
+    filters_by_patient = True
+
+    def __init__(self, path=SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._columns = [_sql_column(header) for header in ENTRY_COLUMNS]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+
+    def _connect(self):
+        # sqlite3 connections can't be shared across threads; keep one per thread.
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _create_schema(self):
+        columns = ",\n".join(f"    {name} {SQL_TYPES.get(name, 'TEXT')}" for name in self._columns)
+        conn = self._connect()
+        with conn:
+            conn.execute(f"""
+                CREATE TABLE IF NOT EXISTS entries (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                {columns},
+                    created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )""")
+            # Databases created before a column was added get it appended, before
+            # any index that names it is built.
+            existing = {row[1] for row in conn.execute("PRAGMA table_info(entries)")}
+            for name in self._columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE entries ADD COLUMN {name} {SQL_TYPES.get(name, 'TEXT')}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_date ON entries (date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_patient_date ON entries (patient, date)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_patient_id ON entries (patient, id)")
+            # NULLs don't collide, so rows without an entry_id are never deduplicated.
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_entries_entry_id ON entries (entry_id)")
+
+    def append_rows(self, rows, maybe_written=False):
+        # maybe_written needs no check here: the unique entry_id index drops repeats.
+        width = len(self._columns)
+        patient = self._columns.index("patient")
+        entry_id = self._columns.index(ENTRY_ID_COLUMN)
+        values = []
+        for row in rows:
+            row = list(row)[:width]
+            row += [None] * (width - len(row))
+            # Rows queued before entries carried a username have no patient.
+            row[patient] = row[patient] or ""
+            row[entry_id] = row[entry_id] or None
+            values.append(row)
+        placeholders = ", ".join("?" for _ in self._columns)
+        conn = self._connect()
+        # One transaction for the batch: either every row is stored or none is.
+        # A replayed entry_id hits the unique index and is skipped, not duplicated.
+        with metrics.timer("sqlite_append"), conn:
+            conn.executemany(
+                f"INSERT INTO entries ({', '.join(self._columns)}) VALUES ({placeholders}) "
+                "ON CONFLICT (entry_id) DO NOTHING",
+                values,
+            )
+        return [True] * len(values)
+
+    def read_since(self, cursor=None, patient=None, limit=None):
+        # The cursor is the last row id read. Per-patient reads walk the
+        # (patient, id) index and never touch other patients' rows.
+        query = f"SELECT id, {', '.join(self._columns)} FROM entries WHERE id > ?"
+        params = [cursor or 0]
+        if patient is not None:
+            query += " AND patient = ?"
+            params.append(patient)
+        query += " ORDER BY id"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        with metrics.timer("sqlite_read"):
+            result = self._connect().execute(query, params).fetchall()
+        if result:
+            cursor = result[-1][0]
+        return list(ENTRY_COLUMNS), [list(row[1:]) for row in result], cursor
+
+    def list_patients(self):
+        rows = self._connect().execute("SELECT DISTINCT patient FROM entries ORDER BY patient").fetchall()
+        return [row[0] for row in rows]
+
+    def read_range(self, patient, start, end):
+        # Dates are stored as YYYY-MM-DD text, so the window is a range scan
+        # on the (patient, date) index. "< day after end" also keeps dates
+        # stored with a time part.
+        after_end = str(end + datetime.timedelta(days=1))
+        with metrics.timer("sqlite_read_range"):
+            result = self._connect().execute(
+                f"SELECT {', '.join(self._columns)} FROM entries "
+                "WHERE patient = ? AND date >= ? AND date < ? ORDER BY id",
+                (patient, str(start), after_end),
+            ).fetchall()
+        return list(ENTRY_COLUMNS), [list(row) for row in result]
+
+    def date_bounds(self, patient):
+        # Both ends come straight off the (patient, date) index. Text that
+        # isn't a date sorts after the digits and is left out.
+        first, last = self._connect().execute(
+            "SELECT MIN(date), MAX(date) FROM entries WHERE patient = ? AND date BETWEEN '0001' AND '9999-12-31~'",
+            (patient,),
+        ).fetchone()
+        if first is None:
+            return None
+        return datetime.date.fromisoformat(first[:10]), datetime.date.fromisoformat(last[:10])
+
+
+# ========== BACKEND SELECTION ==========
+def _configured_backend():
+    backend = os.environ.get(BACKEND_ENV_VAR)
+    sqlite_path = SQLITE_PATH
+    try:
+        import streamlit as st
+        config = st.secrets.get("storage", {})
+        backend = backend or config.get("backend")
+        sqlite_path = config.get("sqlite_path", sqlite_path)
+    except Exception:
+        # No secrets.toml (e.g. the keyfile-based apps); fall back to the defaults.
+        pass
+    return backend or "sheets", sqlite_path
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def get_storage(source="secrets", worksheet=sheets_client.WORKSHEET_NAME):
+    # source/worksheet pick the spreadsheet credentials and tab for the Sheets
+    # backend; the SQLite backend is one database per process either way.
+    backend, sqlite_path = _configured_backend()
+    key = ("sqlite", sqlite_path) if backend == "sqlite" else ("sheets", source, worksheet)
+    with _storages_lock:
+        if key not in _storages:
+            if backend == "sqlite":
+                _storages[key] = SQLiteStorage(sqlite_path)
+            elif backend == "sheets":
+                _storages[key] = SheetsStorage(source=source, worksheet=worksheet)
+            else:
+                raise ValueError(f"Unknown storage backend: {backend}")
+        return _storages[key]
@@ -0,0 +1,324 @@
+import functools
+import re
+
+import assets
+
+# ========== THEME CONFIG ==========
+# One stylesheet per app look, assembled from the shared fragments below,
+# minified and deduplicated once per process. Each rerun injects it with a
+# single <style> element; the background image goes by URL (see assets.py).
+#
+# A <link rel="stylesheet"> to app/static/ would be smaller still, but
+# Streamlit's static file server sends .css files as text/plain with
+# X-Content-Type-Options: nosniff, so browsers refuse to apply them.
+BACKGROUND_IMAGE = "diet_app_creation/vegetables-set-left-black-slate.jpg"
+
+# ========== STYLESHEETS ==========
+# Written readably here; minify() strips comments and whitespace and drops
+# duplicate rules and declarations before anything is sent to the browser.
+# Rules both full themes need go in BASE_CSS; each theme lists it first and
+# only adds or overrides what differs.
+BASE_CSS = """
+    /* Light headings and markdown text (not full Streamlit divs) over the dark background photo */
+    h1, h2, h3, h4, h5, h6, .stMarkdown p {
+        color: white !important;
+    }
+"""
+
+PATIENT_CSS = """
+    /* Headings and markdown text stand out from the photo */
+    h1, h2, h3, h4, h5, h6 {
+        text-shadow: 1px 1px 3px rgba(0,0,0,0.7);
+    }
+    .stMarkdown p {
+        text-shadow: 1px 1px 2px rgba(0,0,0,0.7);
+    }
+
+    /* Sidebar text white */
+    .css-1d391kg p, .css-1d391kg h1, .css-1d391kg h2, .css-1d391kg h3 {
+        color: white !important;
+    }
+
+    /* Styling for Input Fields (Force white text with light background) */
+    .stTextInput input, .stNumberInput input, .stSlider input, .stTextArea textarea {
+        color: white !important;  /* Force white text color */
+        background-color: #333 !important; /* Dark background for inputs */
+        border: 1px solid #ccc !important;  /* Light gray border for the inputs */
+    }
+
+    /* Label text color */
+    .stTextInput label, .stNumberInput label, .stSlider label, .stTextArea label {
+        color: white !important;  /* Force label text color to white */
+    }
+
+    /* Button text color */
+    button, .stButton>button {
+        color: white !important;
+        background-color: rgba(0,0,0,0.6) !important;
+        border: 1px solid white !important;
+    }
+
+    /* Fix for button hover */
+    .stButton>button:hover {
+        background-color: rgba(255, 255, 255, 0.3) !important;
+    }
+
+    /* Placeholder text color */
+    .stTextInput input::placeholder, .stPassword input::placeholder, .stNumberInput input::placeholder, .stTextArea textarea::placeholder {
+        color: rgba(255, 255, 255, 0.6) !important;  /* Light white placeholder */
+    }
+"""
+
+PATIENT_OVERLAY_CSS = """
+    h1, h2, h3 {
+        color: white !important;
+    }
+    div[data-testid="stMarkdownContainer"] h1,
+    div[data-testid="stMarkdownContainer"] h2,
+    div[data-testid="stMarkdownContainer"] h3 {
+        color: white !important;
+    }
+    .stApp h1, .stApp h2, .stApp h3 {
+        color: white !important;
+    }
+    .stApp::before {
+        content: '';
+        position: absolute;
+        top: 0;
+        left: 0;
+        right: 0;
+        bottom: 0;
+        background: rgba(0, 0, 0, 0.3);
+        z-index: -1;
+    }
+"""
+
+DOCTOR_CSS = """
+    /* ========== Background and App ========== */
+    .stApp {
+        background-attachment: fixed;
+        background-color: #333333 !important; /* Fallback */
+    }
+    /* ========== Markdown Text (headings and paragraphs are in BASE_CSS) ========== */
+    .stMarkdown div:not([data-baseweb="select"]) {
+        color: white !important;
+    }
+    /* ========== Input Fields ========== */
+    div.stTextInput > div > input {
+        background-color: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid #cccccc !important;
+        border-radius: 4px !important;
+        padding: 8px !important;
+    }
+    /* ========== Input Labels ========== */
+    div.stTextInput > label, div.stSelectbox > label {
+        color: white !important;
+        font-weight: bold !important;
+    }
+    /* ========== Primary Buttons (e.g., Login, Verify OTP) ========== */
+    div.stButton > button[kind="primary"] {
+        background-color: #1f77b4 !important;
+        color: #ffffff !important;
+        border: none !important;
+        border-radius: 8px !important;
+        padding: 10px 20px !important;
+        font-size: 16px !important;
+        font-weight: bold !important;
+    }
+    div.stButton > button[kind="primary"]:hover {
+        background-color: #0056b3 !important;
+        color: #ffffff !important;
+    }
+    /* ========== Secondary Buttons (e.g., Logout) ========== */
+    div.stButton > button:not([kind="primary"]) {
+        background-color: #d9d9d9 !important;
+        color: #333333 !important;
+        border: none !important;
+        border-radius: 8px !important;
+        padding: 10px 20px !important;
+        font-size: 16px !important;
+        font-weight: bold !important;
+    }
+    div.stButton > button:not([kind="primary"]):hover {
+        background-color: #bfbfbf !important;
+        color: #333333 !important;
+    }
+    /* ========== Selectbox (Dropdown) ========== */
+    div[data-baseweb="select"] > div {
+        background-color: #ffffff !important;
+        color: #000000 !important;
+        border: 1px solid #cccccc !important;
+        border-radius: 4px !important;
+        padding: 8px !important;
+    }
+    /* Selected value inside selectbox */
+    div[data-baseweb="select"] div[role="combobox"] > div {
+        color: #000000 !important;
+        background-color: #ffffff !important;
+    }
+    /* Dropdown options inside selectbox */
+    div[data-baseweb="select"] > div > span, 
+    div[data-baseweb="select"] > div > div, 
+    div[data-baseweb="select"] > div > div > span, 
+    div[data-baseweb="select"] span, 
+    div[data-baseweb="select"] div, 
+    div[data-baseweb="select"] li, 
+    div[data-baseweb="select"] * {
+        color: #000000 !important;
+        background-color: #ffffff !important;
+    }
+    /* Dropdown arrow */
+    div[data-baseweb="select"] > div::after {
+        border-color: #000000 !important;
+    }
+    /* Placeholder text */
+    input::placeholder {
+        color: #666666 !important;
+        opacity: 1 !important;
+    }
+    /* ========== Sidebar ========== */
+    section[data-testid="stSidebar"] {
+        background-color: rgba(0, 0, 0, 0.7) !important;
+    }
+    /* ========== Mobile Responsiveness ========== */
+    @media (max-width: 768px) {
+        .stApp {
+            background-size: cover !important;
+            background-position: center top !important;
+            background-repeat: no-repeat !important;
+        }
+        div.stTextInput > div > input, div.stButton > button, div[data-baseweb="select"] > div {
+            font-size: 18px !important;
+            padding: 10px !important;
+        }
+        div.stTextInput > label, div.stSelectbox > label {
+            font-size: 16px !important;
+        }
+        div.stButton > button {
+            width: 100% !important;
+            margin-bottom: 10px !important;
+        }
+    }
+"""
+
+# ========== MINIFY AND INJECT ==========
+THEMES = {
+    "patient": (BASE_CSS, PATIENT_CSS),         # streamlit_app.py
+    "patient_overlay": (PATIENT_OVERLAY_CSS,),  # app.py
+    "doctor": (BASE_CSS, DOCTOR_CSS),           # streamlit_app_doctor.py
+    "plain": (),                                # doctors_view.py: background only
+}
+
+_COMMENT_RE = re.compile(r"/\*.*?\*/", re.S)
+_SPACE_RE = re.compile(r"\s+")
+_SELECTOR_PUNCT_RE = re.compile(r"\s*([,>+~])\s*")
+_AT_RULE_PUNCT_RE = re.compile(r"\s*([:),])\s*")
+
+
+def _selector(text):
+    return _SELECTOR_PUNCT_RE.sub(r"\1", _SPACE_RE.sub(" ", text).strip())
+
+
+def _declarations(text):
+    # Later declarations of a property win, as in the browser, so earlier ones are dropped.
+    declarations = {}
+    for declaration in text.split(";"):
+        name, _, value = declaration.partition(":")
+        name, value = name.strip().lower(), _SPACE_RE.sub(" ", value).strip()
+        if name and value:
+            declarations.pop(name, None)
+            if "'" not in value and '"' not in value:
+                value = re.sub(r"\s*,\s*", ",", value)
+            declarations[name] = value.replace(" !important", "!important")
+    return tuple(declarations.items())
+
+
+def _parse(css):
+    # [(selector, declarations)] with at-rule blocks as (at-rule, [children]).
+    css = _COMMENT_RE.sub("", css)
+    items, parents = [], []
+    current, position = items, 0
+    while True:
+        opening, closing = css.find("{", position), css.find("}", position)
+        if opening == -1 and closing == -1:
+            return items
+        if opening != -1 and (closing == -1 or opening < closing):
+            prelude = css[position:opening].strip()
+            if prelude.startswith("@"):
+                block = (_AT_RULE_PUNCT_RE.sub(r"\1", _SPACE_RE.sub(" ", prelude)), [])
+                current.append(block)
+                parents.append(current)
+                current = block[1]
+                position = opening + 1
+            else:
+                closing = css.find("}", opening)
+                current.append((_selector(prelude), _declarations(css[opening + 1:closing])))
+                position = closing + 1
+        else:
+            current = parents.pop() if parents else items
+            position = closing + 1
+
+
+def _dedupe(items):
+    # Adjacent rules for the same selector are merged; a rule repeated
+    # verbatim is kept only at its last position, which is the one that
+    # decided the cascade.
+    merged = []
+    for selector, body in items:
+        if isinstance(body, list):
+            merged.append((selector, _dedupe(body)))
+        elif merged and merged[-1][0] == selector and not isinstance(merged[-1][1], list):
+            declarations = dict(merged[-1][1])
+            for name, value in body:
+                declarations.pop(name, None)
+                declarations[name] = value
+            merged[-1] = (selector, tuple(declarations.items()))
+        else:
+            merged.append((selector, body))
+    seen, result = set(), []
+    for selector, body in reversed(merged):
+        key = (selector, tuple(body) if isinstance(body, list) else body)
+        if key not in seen:
+            seen.add(key)
+            result.append((selector, body))
+    return result[::-1]
+
+
+def _render(items):
+    out = []
+    for selector, body in items:
+        if isinstance(body, list):
+            out.append(f"{selector}{{{_render(body)}}}")
+        else:
+            out.append(f"{selector}{{{';'.join(f'{name}:{value}' for name, value in body)}}}")
+    return "".join(out)
+
+
+def minify(css):
+    return _render(_dedupe(_parse(css)))
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet(name):
+    return minify("\n".join(THEMES[name]))
+
+
+@functools.lru_cache(maxsize=16)
+def _style_tag(name, image_url):
+    background = f'.stApp{{background-image:url("{image_url}");background-size:cover;background-position:center}}' if image_url else ""
+    return f"<style>{background}{stylesheet(name)}</style>"
+
+
+def apply(name, image=BACKGROUND_IMAGE):
+    # The one styling call each app makes per rerun.
+    import streamlit as st
+
+    try:
+        image_url = assets.image_url(image) if image else None
+    except FileNotFoundError:
+        image_url = None
+        st.error(f"Background image '{image}' not found.")
+    tag = _style_tag(name, image_url)
+    if tag != "<style></style>":
+        st.markdown(tag, unsafe_allow_html=True)
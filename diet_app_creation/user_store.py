@@ -0,0 +1,152 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import dataclass, fields
+
+# ========== USER STORE CONFIG ==========
+PATIENT_USERS_FILE = "diet_app_creation/users_app.json"
+DOCTOR_USERS_FILE = "diet_app_creation/users_doctor.json"
+# The backing file is stat'ed at most this often to spot edits.
+CHECK_INTERVAL_SECONDS = 1.0
+
+
+@dataclass(slots=True)
+class UserRecord:
+    username: str
+    password: str
+    role: str
+    secret_key: str = None   # patient apps
+    otp_secret: str = None   # doctor apps
+    extra: dict = None       # any other keys, kept so the file round-trips
+
+    @classmethod
+    def from_dict(cls, username, data):
+        data = dict(data)
+        known = {f.name: data.pop(f.name, None) for f in fields(cls) if f.name not in ("username", "extra")}
+        return cls(username=username, extra=data or None, **known)
+
+    def to_dict(self):
+        data = {"password": self.password, "role": self.role}
+        if self.secret_key is not None:
+            data["secret_key"] = self.secret_key
+        if self.otp_secret is not None:
+            data["otp_secret"] = self.otp_secret
+        if self.extra:
+            data.update(self.extra)
+        return data
+
+    # Dict-style access so existing callers (user["role"], user.get(...)) keep working.
+    def __getitem__(self, key):
+        value = self.get(key, KeyError)
+        if value is KeyError:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        if key in ("password", "role", "secret_key", "otp_secret"):
+            return getattr(self, key)
+        return (self.extra or {}).get(key, default)
+
+
+class UserStore:
+    # Users keyed by username, loaded once per process. File-backed stores
+    # reload when the file's mtime or size changes; secrets-backed stores are
+    # read-only at runtime (updates stay in memory).
+
+    def __init__(self, path=None, secrets_key=None):
+        self.path = path
+        self.secrets_key = secrets_key
+        self._lock = threading.Lock()
+        self._users = None
+        self._stamp = None
+        self._last_check = 0.0
+
+    def _file_stamp(self):
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read_source(self):
+        if self.path:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        import streamlit as st
+        return {name: dict(data) for name, data in st.secrets[self.secrets_key].items()}
+
+    def _ensure_loaded(self):
+        now = time.monotonic()
+        if self._users is not None:
+            if not self.path or now - self._last_check < CHECK_INTERVAL_SECONDS:
+                return
+            self._last_check = now
+            if self._file_stamp() == self._stamp:
+                return
+        stamp = self._file_stamp() if self.path else None
+        self._users = {name: UserRecord.from_dict(name, data) for name, data in self._read_source().items()}
+        self._stamp = stamp
+        self._last_check = now
+
+    def invalidate(self):
+        with self._lock:
+            self._users = None
+
+    def get(self, username, default=None):
+        with self._lock:
+            self._ensure_loaded()
+            return self._users.get(username, default)
+
+    def __getitem__(self, username):
+        user = self.get(username)
+        if user is None:
+            raise KeyError(username)
+        return user
+
+    def __contains__(self, username):
+        return self.get(username) is not None
+
+    def usernames(self, role=None):
+        with self._lock:
+            self._ensure_loaded()
+            return [name for name, user in self._users.items() if role is None or user.role == role]
+
+    def update(self, username, **changes):
+        # Applies changes to one user. File-backed stores write a temp file
+        # in the same directory and rename it over the original, so readers
+        # never see a half-written file.
+        with self._lock:
+            self._ensure_loaded()
+            if self.path:
+                raw = self._read_source()
+                raw[username] = {**raw.get(username, {}), **changes}
+                directory = os.path.dirname(self.path) or "."
+                fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".users-", suffix=".json")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(raw, f, indent=4)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, self.path)
+                except BaseException:
+                    if os.path.exists(tmp_path):
+                        os.remove(tmp_path)
+                    raise
+                self._stamp = self._file_stamp()
+                self._users[username] = UserRecord.from_dict(username, raw[username])
+            else:
+                current = self._users[username].to_dict()
+                self._users[username] = UserRecord.from_dict(username, {**current, **changes})
+            return self._users[username]
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_user_store(path=None, secrets_key=None):
+    # Shared by every session and both roles' apps in the process.
+    key = (path, secrets_key)
+    with _stores_lock:
+        if key not in _stores:
+            _stores[key] = UserStore(path=path, secrets_key=secrets_key)
+        return _stores[key]
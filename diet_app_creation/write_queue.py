@@ -0,0 +1,256 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import journal
+from batch_writer import BATCH_MAX_ROWS, BATCH_WINDOW_SECONDS
+
+# ========== QUEUE CONFIG ==========
+RETRY_BASE_SECONDS = 2
+RETRY_MAX_SECONDS = 300
+# A failing mail server should not hold the row queue forever.
+NOTIFY_MAX_ATTEMPTS = 5
+# Keys of finished jobs remembered (and kept across compaction) so a retried
+# submit() with the same key is recognised as already done.
+DONE_KEYS_KEPT = 5000
+
+
+def _new_job(job_id, row, notification, queued_at, maybe_written=False):
+    return {
+        "id": job_id,
+        "row": row,
+        "notification": notification,
+        "stored": False,
+        # The row may already be in storage: replayed after a crash, or retried
+        # after a failed write that could still have been applied.
+        "maybe_written": maybe_written,
+        "attempts": 0,
+        "next_attempt": 0.0,
+        "queued_at": queued_at,
+    }
+
+
+class WriteBehindQueue:
+    # Durable write-behind queue for diet entry submissions.
+    #
+    # submit() appends the entry to an on-disk journal (fsync'd) and returns
+    # straight away; a background thread then stores the rows and hands the
+    # notifications on. Journal records are JSON lines:
+    #   {"op": "put", "id": ..., "row": [...], "notification": {...}}
+    #   {"op": "stored", "id": ...}   row written, notification still owed
+    #   {"op": "done", "id": ...}
+    # On start-up every job without a "done" record is replayed, and jobs that
+    # were already "stored" skip straight to the notification, so a restart
+    # never loses an entry or writes it twice.
+    #
+    # submit(row, key=...) is idempotent: a key that is still pending or was
+    # finished recently is acknowledged without queueing the row again.
+    #
+    # notify(key=job id, **notification) must take over delivery durably before
+    # it returns (notifications.Notifier journals it), since the job is then
+    # recorded as done; the key lets it drop a repeat after a crash.
+    #
+    # store_rows(rows, maybe_written) receives a whole batch and returns one
+    # bool per row (see storage.EntryStorage.append_rows); maybe_written is True
+    # when some rows in the batch may already have been stored. The worker waits up to batch_window
+    # seconds after the oldest pending submission for more to arrive, or
+    # until batch_size rows are waiting.
+
+    def __init__(self, journal_path, store_rows, notify=None, batch_size=BATCH_MAX_ROWS,
+                 batch_window=BATCH_WINDOW_SECONDS, start=True):
+        self.journal_path = journal_path
+        self._store_rows = store_rows
+        self._notify = notify
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self._cond = threading.Condition()
+        self._pending = OrderedDict()
+        self._done = OrderedDict()
+        self._stopped = False
+        self.last_error = None
+
+        self._journal = journal.Journal(journal_path)
+        self._replay()
+        self._journal.open()
+
+        self._thread = threading.Thread(target=self._run, name="diet-write-behind", daemon=True)
+        if start:
+            self._thread.start()
+
+    # ---------- journal ----------
+    def _replay(self):
+        for record in self._journal.records():
+            op, job_id = record.get("op"), record.get("id")
+            if op == "put":
+                # queued_at=0 so replayed jobs are flushed without waiting for a
+                # window; the crash may have come after the row was appended.
+                self._pending[job_id] = _new_job(job_id, record["row"], record.get("notification"), 0.0,
+                                                 maybe_written=True)
+            elif op == "stored" and job_id in self._pending:
+                self._pending[job_id]["stored"] = True
+            elif op == "done":
+                self._pending.pop(job_id, None)
+                self._remember_done(job_id)
+
+    def _write(self, *records):
+        self._journal.write(*records)
+
+    def _remember_done(self, job_id):
+        self._done[job_id] = True
+        self._done.move_to_end(job_id)
+        while len(self._done) > DONE_KEYS_KEPT:
+            self._done.popitem(last=False)
+
+    def _maybe_compact(self):
+        if self._pending or not self._journal.needs_compaction():
+            return
+        # Only the recent done keys survive, for submit() deduplication.
+        self._journal.compact({"op": "done", "id": job_id} for job_id in self._done)
+
+    # ---------- public API ----------
+    def submit(self, row, notification=None, key=None):
+        # key defaults to a fresh id; pass the entry's own id to make retries safe.
+        job_id = key or uuid.uuid4().hex
+        with self._cond:
+            if job_id in self._pending or job_id in self._done:
+                return job_id
+            self._write({"op": "put", "id": job_id, "row": row, "notification": notification})
+            self._pending[job_id] = _new_job(job_id, row, notification, time.monotonic())
+            self._cond.notify()
+        return job_id
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    def is_pending(self, job_id):
+        with self._cond:
+            return job_id in self._pending
+
+    def flush(self, timeout=None):
+        # Block until everything submitted so far has been processed. Pending
+        # batch windows are cut short.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            for job in self._pending.values():
+                job["queued_at"] = 0.0
+            self._cond.notify_all()
+            while self._pending:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining if remaining is not None else 1.0)
+        return True
+
+    def stop(self, timeout=5):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread.is_alive():
+            self._thread.join(timeout)
+        with self._cond:
+            self._journal.close()
+
+    # ---------- worker ----------
+    def _next_batch(self):
+        # Called with the condition held. Returns ready jobs in submission order,
+        # or None once the queue is stopped.
+        while not self._stopped:
+            now = time.monotonic()
+            ready = []
+            next_wake = None
+            for job in self._pending.values():
+                if job["next_attempt"] <= now:
+                    ready.append(job)
+                    if len(ready) >= self.batch_size:
+                        break
+                elif next_wake is None or job["next_attempt"] < next_wake:
+                    next_wake = job["next_attempt"]
+
+            if ready:
+                window_ends = min(job["queued_at"] for job in ready) + self.batch_window
+                if len(ready) >= self.batch_size or now >= window_ends:
+                    return ready
+                next_wake = window_ends if next_wake is None else min(next_wake, window_ends)
+
+            self._cond.wait(None if next_wake is None else max(next_wake - now, 0.01))
+        return None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                batch = self._next_batch()
+            if batch is None:
+                return
+            self._process(batch)
+
+    def _process(self, batch):
+        # Job state is read and changed only with the condition held; the storage
+        # and notify calls run without it. id, row and notification never change.
+        with self._cond:
+            to_store = [job for job in batch if not job["stored"]]
+            maybe_written = any(job["maybe_written"] for job in to_store)
+        failed = []
+        if to_store:
+            try:
+                results = self._store_rows([job["row"] for job in to_store], maybe_written=maybe_written)
+            except Exception as e:
+                self.last_error = e
+                print(f"Write-behind queue: batch of {len(to_store)} rows failed: {e}")
+                results = [False] * len(to_store)
+            with self._cond:
+                stored_records = []
+                for job, ok in zip(to_store, results):
+                    if ok:
+                        job["stored"] = True
+                        job["attempts"] = 0
+                        stored_records.append({"op": "stored", "id": job["id"]})
+                    else:
+                        job["maybe_written"] = True
+                        failed.append(job)
+                if stored_records:
+                    self._write(*stored_records)
+
+        with self._cond:
+            to_notify = [(job, job["attempts"]) for job in batch if job["stored"]]
+        done = []
+        for job, attempts in to_notify:
+            if job["notification"] and self._notify is not None:
+                try:
+                    self._notify(key=job["id"], **job["notification"])
+                except Exception as e:
+                    self.last_error = e
+                    print(f"Write-behind queue: notification for job {job['id']} failed: {e}")
+                    if attempts + 1 < NOTIFY_MAX_ATTEMPTS:
+                        failed.append(job)
+                        continue
+                    print(f"Write-behind queue: giving up on notification for job {job['id']}")
+            done.append(job)
+
+        with self._cond:
+            now = time.monotonic()
+            for job in failed:
+                job["attempts"] += 1
+                delay = min(RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1), RETRY_MAX_SECONDS)
+                job["next_attempt"] = now + delay
+            if done:
+                self._write(*({"op": "done", "id": job["id"]} for job in done))
+                for job in done:
+                    self._pending.pop(job["id"], None)
+                    self._remember_done(job["id"])
+                self._maybe_compact()
+            self._cond.notify_all()
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_write_queue(name, store_rows, notify=None):
+    # One queue (and worker thread) per journal per process. The callables from
+    # the first call are kept; later reruns get the running queue back.
+    with _queues_lock:
+        if name not in _queues:
+            _queues[name] = WriteBehindQueue(journal.journal_path(name), store_rows, notify)
+        return _queues[name]
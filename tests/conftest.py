@@ -0,0 +1,72 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+# The app modules import each other as top-level modules (Streamlit runs them
+# from diet_app_creation/), so the tests do the same.
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "diet_app_creation")
+sys.path.insert(0, APP_DIR)
+
+import entries_cache  # noqa: E402
+import fake_gspread  # noqa: E402
+import sheets_client  # noqa: E402
+import storage  # noqa: E402
+
+FIRST_DAY = datetime.date(2024, 1, 1)
+
+
+def entry_row(day, patient="alice", entry_id="", breakfast="oats", dinner="pasta", weight=70.0):
+    # One stored row in schema.ENTRY_COLUMNS order.
+    return [str(day), weight, 7, 30, 2, 3.0, breakfast, "", "", "", dinner, "", patient, entry_id]
+
+
+@pytest.fixture
+def day():
+    return FIRST_DAY
+
+
+@pytest.fixture
+def make_row():
+    return entry_row
+
+
+@pytest.fixture
+def make_rows(day):
+    # make_rows(count, start=0, patient="alice", **fields): one row per day
+    # from day + start, each with its own entry_id.
+    def build(count, start=0, patient="alice", **fields):
+        return [
+            entry_row(day + datetime.timedelta(days=start + i), patient=patient,
+                      entry_id=f"{patient}{start + i}", **fields)
+            for i in range(count)
+        ]
+    return build
+
+
+def _clear_caches():
+    storage._storages.clear()
+    entries_cache._caches.clear()
+
+
+@pytest.fixture
+def fake_sheets(monkeypatch):
+    # A fresh in-memory spreadsheet behind the Sheets storage backend; yields
+    # its Entries worksheet.
+    monkeypatch.setenv(storage.BACKEND_ENV_VAR, "sheets")
+    client = fake_gspread.FakeClient()
+    sheets_client.use_client_factory(lambda: client)
+    _clear_caches()
+    yield client.open(sheets_client.SPREADSHEET_NAME).worksheet(sheets_client.WORKSHEET_NAME)
+    sheets_client.use_client_factory(None)
+    _clear_caches()
+
+
+@pytest.fixture
+def sqlite_storage(monkeypatch, tmp_path):
+    monkeypatch.setenv(storage.BACKEND_ENV_VAR, "sqlite")
+    monkeypatch.setattr(storage, "SQLITE_PATH", str(tmp_path / "entries.db"))
+    _clear_caches()
+    yield storage.get_storage()
+    _clear_caches()
@@ -0,0 +1,53 @@
+import math
+
+import analytics
+from entries_cache import EntriesCache
+
+
+def _weights(rows):
+    # A slowly rising weight, so the rolling trends have something to track.
+    for i, row in enumerate(rows):
+        row[1] = 70.0 + i / 10
+    return rows
+
+
+def test_daily_metrics_have_one_row_per_calendar_day(sqlite_storage, make_rows):
+    sqlite_storage.append_rows(make_rows(1) + make_rows(1, start=2))
+    daily = analytics.daily_metrics(EntriesCache(sqlite_storage, ttl_seconds=0).get_frame())
+    assert len(daily) == 3
+    assert math.isnan(daily["weight"].iloc[1])
+    assert daily["sleep_hours"].iloc[0] == 7.5
+
+
+def test_incremental_trends_match_a_rebuild(sqlite_storage, make_rows):
+    sqlite_storage.append_rows(_weights(make_rows(60)))
+    cache = EntriesCache(sqlite_storage, patient="alice", ttl_seconds=0)
+    trends = analytics.TrendCache()
+    trends.get(cache, "alice")
+    sqlite_storage.append_rows(_weights(make_rows(5, start=60)))
+    incremental = trends.get(cache, "alice")
+    rebuilt = analytics.TrendCache().get(EntriesCache(sqlite_storage, patient="alice", ttl_seconds=0), "alice")
+    assert incremental.round(6).equals(rebuilt.round(6))
+
+
+def test_blank_field_in_a_later_same_day_entry_wins_in_both_paths(sqlite_storage, day, make_row, make_rows):
+    sqlite_storage.append_rows(_weights(make_rows(10)))
+    cache = EntriesCache(sqlite_storage, patient="alice", ttl_seconds=0)
+    trends = analytics.TrendCache()
+    trends.get(cache, "alice")
+    # A resubmission for the first day with the weight left blank.
+    sqlite_storage.append_rows([make_row(day, entry_id="again", weight=None)])
+    incremental = trends.get(cache, "alice")
+    rebuilt = analytics.TrendCache().get(EntriesCache(sqlite_storage, patient="alice", ttl_seconds=0), "alice")
+    assert math.isnan(incremental["weight"].iloc[0])
+    assert incremental.round(6).equals(rebuilt.round(6))
+
+
+def test_states_are_keyed_by_storage_and_bounded(sqlite_storage, make_rows):
+    for patient in ("alice", "bob", "carol"):
+        sqlite_storage.append_rows(make_rows(3, patient=patient))
+    trends = analytics.TrendCache(max_states=2)
+    for patient in ("alice", "alice", "bob", "carol"):
+        # A new cache object per call, as after the entries cache was evicted.
+        trends.get(EntriesCache(sqlite_storage, patient=patient, ttl_seconds=0), patient)
+    assert [key[2] for key in trends._states] == ["bob", "carol"]
@@ -0,0 +1,51 @@
+import io
+import os
+
+import pytest
+from PIL import Image
+
+import assets
+
+
+@pytest.fixture
+def photo(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_DIR", str(tmp_path / "static"))
+    path = str(tmp_path / "background.jpg")
+    Image.new("RGB", (64, 32), (200, 120, 40)).save(path, format="JPEG")
+    yield path
+    assets._static_url.cache_clear()
+
+
+def test_image_is_scaled_down_and_reencoded(photo):
+    data, ext = assets._load_image(photo, os.path.getmtime(photo), 32, "webp", 80)
+    assert ext == ".webp"
+    with Image.open(io.BytesIO(data)) as img:
+        assert img.size == (32, 16)
+
+
+def test_static_copy_is_written_once_and_served_by_url(photo):
+    url = assets._static_url(photo, os.path.getmtime(photo), 32, "jpeg", 80)
+    assert url.startswith(f"{assets.STATIC_URL}/{assets.STATIC_CACHE_SUBDIR}/")
+    target = os.path.join(assets.STATIC_DIR, assets.STATIC_CACHE_SUBDIR, url.rsplit("/", 1)[1])
+    written_at = os.path.getmtime(target)
+    assets._static_url.cache_clear()
+    assert assets._static_url(photo, os.path.getmtime(photo), 32, "jpeg", 80) == url
+    assert os.path.getmtime(target) == written_at
+
+
+def test_static_names_differ_by_quality_and_format(photo):
+    mtime = os.path.getmtime(photo)
+    urls = {
+        assets._static_url(photo, mtime, 32, "jpeg", 80),
+        assets._static_url(photo, mtime, 32, "jpeg", 50),
+        assets._static_url(photo, mtime, 32, "webp", 80),
+        assets._static_url(photo, mtime, 32, None, 80),
+    }
+    assert len(urls) == 4
+    written = os.listdir(os.path.join(assets.STATIC_DIR, assets.STATIC_CACHE_SUBDIR))
+    assert sorted(written) == sorted(url.rsplit("/", 1)[1] for url in urls)
+
+
+def test_original_file_ignores_width_and_quality(photo):
+    mtime = os.path.getmtime(photo)
+    assert assets._static_url(photo, mtime, 32, None, 80) == assets._static_url(photo, mtime, 1920, None, 50)
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+import auth
+import bycrypt_utils
+import user_store
+
+
+@pytest.fixture
+def users_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_store, "CHECK_INTERVAL_SECONDS", 0)
+    monkeypatch.setattr(user_store, "_stores", {})
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({
+        "alice": {"password": bycrypt_utils.hash_password("pw", rounds=4), "role": "patient"},
+        "drbob": {"password": bycrypt_utils.hash_password("pw", rounds=4), "role": "doctor"},
+    }))
+    return path
+
+
+def _login_app(path, roles):
+    return auth.LoginApp("test", (({"path": str(path)}, "secret_key"),), roles=roles)
+
+
+def test_only_the_apps_roles_can_log_in(users_file):
+    doctors = _login_app(users_file, roles=("doctor",))
+    assert auth.authenticate("drbob", "pw", doctors)[0]
+    assert auth.authenticate("alice", "pw", doctors) == (False, None)
+    assert not auth.authenticate("drbob", "wrong", doctors)[0]
+
+
+def test_old_work_factors_are_upgraded_in_file_backed_stores(users_file):
+    valid, _ = auth.authenticate("alice", "pw", _login_app(users_file, roles=("patient",)))
+    stored = json.loads(users_file.read_text())["alice"]["password"]
+    assert valid and bycrypt_utils.hash_rounds(stored) == bycrypt_utils.BCRYPT_ROUNDS
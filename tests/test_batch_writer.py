@@ -0,0 +1,84 @@
+import pytest
+
+import storage
+from batch_writer import BatchWriter
+
+
+def test_maybe_written_rows_already_in_the_sheet_are_not_appended_again(fake_sheets, day, make_row):
+    entry_storage = storage.get_storage()
+    first, second = make_row(day, entry_id="a"), make_row(day, entry_id="b")
+    assert entry_storage.append_rows([first]) == [True]
+
+    # As after a crash between the append and the journal's "stored" record.
+    assert entry_storage.append_rows([first, second], maybe_written=True) == [True, True]
+    assert [row[-1] for row in fake_sheets.get_all_values()[1:]] == ["a", "b"]
+    assert fake_sheets.calls["append_rows"] == 2
+
+
+def test_rows_are_not_checked_unless_maybe_written(fake_sheets, day, make_row):
+    storage.get_storage().append_rows([make_row(day, entry_id="a")])
+    assert "col_values" not in fake_sheets.calls
+
+
+class FlakySheet:
+    # Fails the first appends with the given errors; optionally applies a
+    # failed append anyway, like a request that timed out after Sheets wrote it.
+    def __init__(self, errors=(), applied_anyway=False, short_by=0):
+        self.rows = []
+        self.calls = []
+        self._errors = list(errors)
+        self._applied_anyway = applied_anyway
+        self._short_by = short_by
+
+    def append_rows(self, rows, value_input_option="RAW"):
+        self.calls.append(len(rows))
+        if self._errors:
+            if self._applied_anyway:
+                self.rows.extend(rows)
+            raise self._errors.pop(0)
+        written = rows[:len(rows) - self._short_by]
+        self._short_by = 0
+        self.rows.extend(written)
+        return {"updates": {"updatedRows": len(written)}}
+
+    def find_written(self, rows):
+        return [row in self.rows for row in rows]
+
+
+def _writer(sheet, **kwargs):
+    return BatchWriter(lambda: sheet, sleep=lambda seconds: None, **kwargs)
+
+
+@pytest.fixture
+def rows(make_rows):
+    return make_rows(3)
+
+
+def test_retryable_errors_are_retried_with_backoff(rows):
+    sheet = FlakySheet(errors=[TimeoutError(), ConnectionError()])
+    assert _writer(sheet).write(rows) == [True] * 3
+    assert sheet.calls == [3, 3, 3] and sheet.rows == rows
+
+
+def test_other_errors_are_not_retried(rows):
+    sheet = FlakySheet(errors=[ValueError("bad range")])
+    assert _writer(sheet).write(rows) == [False] * 3
+    assert sheet.calls == [3]
+
+
+def test_attempts_are_capped(rows):
+    sheet = FlakySheet(errors=[TimeoutError()] * 5)
+    assert _writer(sheet, max_attempts=3).write(rows) == [False] * 3
+    assert sheet.calls == [3, 3, 3]
+
+
+def test_short_append_resends_only_the_lost_tail(rows):
+    sheet = FlakySheet(short_by=1)
+    assert _writer(sheet).write(rows) == [True] * 3
+    assert sheet.calls == [3, 1] and sheet.rows == rows
+
+
+def test_timed_out_append_that_was_applied_is_not_resent(rows):
+    sheet = FlakySheet(errors=[TimeoutError()], applied_anyway=True)
+    assert _writer(sheet, find_written=sheet.find_written).write(rows) == [True] * 3
+    assert sheet.calls == [3] and sheet.rows == rows
@@ -0,0 +1,35 @@
+import datetime
+
+import pytest
+
+from drafts import DraftStore
+
+
+@pytest.fixture
+def today():
+    # Drafts older than DRAFT_RETENTION_DAYS are dropped on save.
+    return datetime.date.today()
+
+
+def test_drafts_survive_a_restart(tmp_path, today):
+    DraftStore(str(tmp_path)).update("alice", today, weight=70.5, breakfast_food="oats")
+    draft = DraftStore(str(tmp_path)).get("alice", today)
+    assert draft["fields"] == {"weight": 70.5, "breakfast_food": "oats"}
+
+
+def test_resubmitting_an_unchanged_draft_keeps_its_entry_id(tmp_path, today):
+    store = DraftStore(str(tmp_path))
+    first = store.update("alice", today, weight=70.5)["entry_id"]
+    assert store.mark_submitted("alice", today) == first
+    store.update("alice", today, weight=70.5)
+    assert store.mark_submitted("alice", today) == first
+
+    # An edit after the submit is a new revision, stored as a new row.
+    assert store.update("alice", today, weight=71.0)["entry_id"] != first
+
+
+def test_old_drafts_are_dropped_on_save(tmp_path, today):
+    store = DraftStore(str(tmp_path))
+    store.update("alice", today - datetime.timedelta(days=60), weight=70.0)
+    store.update("alice", today, weight=71.0)
+    assert DraftStore(str(tmp_path)).get("alice", today - datetime.timedelta(days=60)) is None
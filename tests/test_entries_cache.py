@@ -0,0 +1,86 @@
+import datetime
+
+import pytest
+
+import entries_cache
+import storage
+from entries_cache import EntriesCache
+
+
+def test_only_new_rows_are_read_after_the_first_load(fake_sheets, day, make_rows):
+    fake_sheets.append_rows(make_rows(3))
+    cache = EntriesCache(storage.get_storage(), ttl_seconds=0)
+    assert len(cache.get_frame()) == 3
+
+    fake_sheets.append_rows(make_rows(2, start=3))
+    frame = cache.get_frame(force=True)
+    assert list(frame["Date"].dt.date) == [day + datetime.timedelta(days=i) for i in range(5)]
+    assert fake_sheets.calls["get_all_values"] == 1
+    assert fake_sheets.calls["get_values"] == 1
+
+
+def test_reads_within_the_ttl_are_served_from_memory(fake_sheets, make_rows):
+    fake_sheets.append_rows(make_rows(3))
+    cache = EntriesCache(storage.get_storage(), ttl_seconds=3600)
+    cache.get_frame()
+    fake_sheets.append_rows(make_rows(1, start=3))
+    assert len(cache.get_frame()) == 3
+    assert len(cache.get_frame(force=True)) == 4
+
+
+def test_index_holds_the_last_entry_of_each_day(fake_sheets, day, make_row, make_rows):
+    fake_sheets.append_rows(make_rows(3) + [make_row(day, breakfast="eggs")])
+    index = EntriesCache(storage.get_storage(), ttl_seconds=0).get_index()
+    assert index.dates("alice") == tuple(day + datetime.timedelta(days=i) for i in (2, 1, 0))
+    assert index.latest("alice", day).breakfast_food == "eggs"
+
+
+def test_summaries_follow_the_last_entry_of_each_day(sqlite_storage, day, make_row):
+    sqlite_storage.append_rows([make_row(day), make_row(day, breakfast="", dinner="")])
+    summary = EntriesCache(sqlite_storage, ttl_seconds=0).get_summaries().get("alice", day)
+    assert summary.sleep_text == "7 hours and 30 minutes"
+    assert summary.flags == ("No meals recorded",) and summary.kcal == 0
+
+
+@pytest.mark.parametrize("backend", ["fake_sheets", "sqlite_storage"])
+def test_history_windows_read_the_same_days_from_either_backend(request, backend, day, make_rows):
+    request.getfixturevalue(backend)
+    storage.get_storage().append_rows(make_rows(5) + make_rows(5, patient="bob"))
+    assert entries_cache.date_bounds("alice") == (day, day + datetime.timedelta(days=4))
+    window = entries_cache.window_summaries("alice", day + datetime.timedelta(days=1), day + datetime.timedelta(days=3))
+    assert [summary.date for summary in window] == [day + datetime.timedelta(days=i) for i in (1, 2, 3)]
+    assert {summary.patient for summary in window} == {"alice"}
+
+
+def test_empty_polls_do_not_skip_later_rows(fake_sheets, day, make_rows):
+    entry_storage = storage.get_storage()
+    entry_storage.append_rows(make_rows(3))
+    cache = EntriesCache(entry_storage, ttl_seconds=0)
+    assert len(cache.get_frame()) == 3
+    for _ in range(3):
+        assert len(cache.get_frame(force=True)) == 3
+
+    entry_storage.append_rows(make_rows(1, start=3))
+    frame = cache.get_frame(force=True)
+    assert len(frame) == 4
+    assert cache.get_index().dates("alice")[0] == day + datetime.timedelta(days=3)
+
+
+def test_incremental_reads_match_a_full_load(sqlite_storage, day, make_row):
+    rows = [
+        make_row(day + datetime.timedelta(days=i % 10), patient=("alice", "bob")[i % 2],
+                 entry_id=f"e{i}", breakfast=f"oats {i}", weight=70 + i)
+        for i in range(30)
+    ]
+    incremental = EntriesCache(sqlite_storage, ttl_seconds=0)
+    for start in range(0, len(rows), 7):
+        sqlite_storage.append_rows(rows[start:start + 7])
+        incremental.get_frame(force=True)
+    full = EntriesCache(sqlite_storage, ttl_seconds=0)
+
+    for patient in ("alice", "bob"):
+        assert incremental.get_index().dates(patient) == full.get_index().dates(patient)
+        for date in full.get_index().dates(patient):
+            assert incremental.get_index().latest(patient, date) == full.get_index().latest(patient, date)
+            assert incremental.get_summaries().get(patient, date) == full.get_summaries().get(patient, date)
+    assert incremental.get_frame().equals(full.get_frame())
@@ -0,0 +1,49 @@
+import pytest
+
+import entry_io
+import storage
+
+
+@pytest.mark.parametrize("fmt", entry_io.FORMATS)
+def test_export_imports_back_into_an_empty_store(sqlite_storage, tmp_path, monkeypatch, make_rows, fmt):
+    sqlite_storage.append_rows(make_rows(5) + make_rows(2, patient="bob"))
+    path = str(tmp_path / f"alice.{fmt}")
+    assert entry_io.export_entries(path, patient="alice", chunk_rows=2) == 5
+
+    monkeypatch.setattr(storage, "SQLITE_PATH", str(tmp_path / "restored.db"))
+    storage._storages.clear()
+    assert entry_io.import_entries(path, batch_rows=2) == (5, 0)
+    _, rows, _ = storage.get_storage().read_since(None)
+    assert rows == make_rows(5)
+
+
+def test_import_matches_columns_loosely_and_skips_bad_dates(sqlite_storage, tmp_path):
+    path = tmp_path / "legacy.csv"
+    path.write_text("DATE,weight,Breakfast_Food\n2024-01-01,70.5,oats\nnot a date,71,eggs\n")
+    assert entry_io.import_entries(str(path), patient="alice") == (1, 1)
+    _, [row], _ = sqlite_storage.read_since(None)
+    assert row[:2] == ["2024-01-01", 70.5] and row[6] == "oats" and row[12] == "alice"
+
+
+def test_export_of_empty_sheet_stops(fake_sheets, tmp_path):
+    assert entry_io.export_entries(str(tmp_path / "out.csv"), chunk_rows=2) == 0
+    assert fake_sheets.calls.get("get_values", 0) <= 2
+
+
+def test_export_reads_every_row_in_bounded_calls(fake_sheets, tmp_path, make_rows):
+    fake_sheets.append_rows(make_rows(5))
+    path = tmp_path / "out.csv"
+    assert entry_io.export_entries(str(path), chunk_rows=2) == 5
+    # Three chunks plus the read that finds nothing past the end.
+    assert fake_sheets.calls["get_values"] == 4
+    assert len(path.read_text().splitlines()) == 6
+
+
+def test_retried_import_of_rows_without_entry_ids_stores_each_once(fake_sheets, tmp_path):
+    path = tmp_path / "legacy.csv"
+    path.write_text("Date,Weight,Hours,breakfast_food\n2024-01-01,70.5,7,oats\n2024-01-02,70.5,7,oats\n")
+    assert entry_io.import_entries(str(path), patient="alice") == (2, 0)
+    assert entry_io.import_entries(str(path), patient="alice", retry=True) == (2, 0)
+    _, rows, _ = storage.get_storage().read_since(None)
+    ids = [row[-1] for row in rows]
+    assert len(rows) == 2 and all(ids) and ids[0] != ids[1]
@@ -0,0 +1,15 @@
+import fake_gspread
+from schema import ENTRY_COLUMNS
+
+
+def test_empty_range_is_one_empty_row_like_gspread():
+    worksheet = fake_gspread.FakeWorksheet("Entries", header=ENTRY_COLUMNS)
+    assert worksheet.get_values("A2:N") == [[]]
+    assert worksheet.get_values("A50:N60") == [[]]
+
+
+def test_rows_are_padded_and_trailing_blank_rows_dropped():
+    worksheet = fake_gspread.FakeWorksheet("Entries", header=["a", "b", "c"])
+    worksheet.append_rows([["1"], ["", "", ""], ["2", "x"], ["", ""]])
+    assert worksheet.get_values("A2:C") == [["1", "", ""], ["", "", ""], ["2", "x", ""]]
+    assert worksheet.get_all_values()[-1] == ["2", "x", ""]
@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+import bycrypt_utils
+import login_throttle
+from login_throttle import LoginThrottle, forwarded_ip, login_keys
+
+
+def _fail(throttle, keys, times):
+    for _ in range(times):
+        assert throttle.begin(keys) == 0
+        throttle.end(keys, False)
+
+
+def test_client_is_locked_out_of_a_user_after_repeated_failures():
+    throttle = LoginThrottle()
+    keys = login_keys("alice", "10.0.0.1")
+    _fail(throttle, keys, login_throttle.MAX_FAILURES["user_ip"])
+    assert throttle.begin(keys) == pytest.approx(login_throttle.LOCKOUT_BASE_SECONDS, abs=1)
+    # Another client can still log in as alice.
+    assert throttle.begin(login_keys("alice", "10.0.0.2")) == 0
+
+
+def test_guessing_from_many_addresses_cannot_lock_out_a_known_client():
+    throttle = LoginThrottle()
+    home = login_keys("alice", "10.0.0.1")
+    assert throttle.begin(home) == 0
+    throttle.end(home, True)
+
+    for i in range(login_throttle.MAX_FAILURES["user"]):
+        _fail(throttle, login_keys("alice", f"192.0.2.{i}"), 1)
+    # A new address is refused, the patient's own one is not.
+    assert throttle.begin(login_keys("alice", "198.51.100.1")) > 0
+    assert throttle.begin(home) == 0
+
+
+def test_success_clears_the_clients_failures_but_not_the_ips():
+    throttle = LoginThrottle()
+    keys = login_keys("alice", "10.0.0.1")
+    _fail(throttle, keys, login_throttle.MAX_FAILURES["user_ip"] - 1)
+    assert throttle.begin(keys) == 0
+    throttle.end(keys, True)
+    assert ("user_ip", ("alice", "10.0.0.1")) not in throttle._failures
+    assert len(throttle._failures[("ip", "10.0.0.1")]) == login_throttle.MAX_FAILURES["user_ip"] - 1
+
+
+def test_busy_attempt_releases_its_slot_without_counting():
+    throttle = LoginThrottle()
+    keys = login_keys("alice", "10.0.0.1")
+    assert throttle.begin(keys) == 0
+    # One check per user and client at a time.
+    assert throttle.begin(keys) > 0
+    # A check for the same user from elsewhere isn't held up.
+    assert throttle.begin(login_keys("alice", "10.0.0.2")) == 0
+    throttle.end(keys, None)
+    assert throttle.begin(keys) == 0
+    throttle.end(keys, None)
+    assert throttle._failures == {}
+
+
+def test_ip_in_flight_checks_are_capped():
+    throttle = LoginThrottle()
+    cap = login_throttle.MAX_IN_FLIGHT["ip"]
+    for i in range(cap):
+        assert throttle.begin(login_keys(f"user{i}", "10.0.0.1")) == 0
+    assert throttle.begin(login_keys("another", "10.0.0.1")) > 0
+    assert throttle.begin(login_keys("another", "10.0.0.2")) == 0
+
+
+def test_forwarded_ip_ignores_entries_the_client_wrote():
+    # The client sent "X-Forwarded-For: 1.2.3.4"; the proxy appended the real address.
+    assert forwarded_ip("1.2.3.4, 203.0.113.9", hops=1) == "203.0.113.9"
+    assert forwarded_ip("1.2.3.4, 203.0.113.9, 10.0.0.5", hops=2) == "203.0.113.9"
+    assert forwarded_ip("203.0.113.9", hops=2) == "203.0.113.9"
+    assert forwarded_ip(" , ", hops=1) is None
+
+
+def test_timed_out_password_check_is_reported_as_busy(monkeypatch):
+    release = threading.Event()
+    monkeypatch.setattr(bycrypt_utils, "verify_password", lambda password, hashed: release.wait(5))
+    with pytest.raises(bycrypt_utils.LoginBusy):
+        bycrypt_utils.check_password("pw", "hash", timeout=0.05)
+    release.set()
+
+
+def test_password_check_runs_on_the_pool_and_flags_old_work_factors():
+    hashed = bycrypt_utils.hash_password("pw", rounds=4)
+    assert bycrypt_utils.check_password("pw", hashed)
+    assert not bycrypt_utils.check_password("nope", hashed)
+    assert bycrypt_utils.needs_rehash(hashed, rounds=5)
+    assert not bycrypt_utils.needs_rehash(hashed, rounds=4)
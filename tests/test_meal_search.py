@@ -0,0 +1,41 @@
+import datetime
+
+import schema
+from meal_search import MealSearchIndex
+
+
+def _index(*rows):
+    index = MealSearchIndex()
+    index.add_frame(schema.to_frame([list(row) for row in rows]))
+    return index
+
+
+def _days(hits):
+    return [hit.date for hit in hits]
+
+
+def test_words_match_case_and_plural_insensitively(day, make_row):
+    next_day = day + datetime.timedelta(days=1)
+    index = _index(make_row(day, dinner="Chicken and Fries"), make_row(next_day, dinner="fry"))
+    assert _days(index.search("alice", "fries")) == [next_day, day]
+    assert _days(index.search("alice", "CHICKEN fry")) == [day]
+    assert index.search("alice", "rice") == []
+    assert index.search("alice", "  ") == []
+
+
+def test_results_are_per_patient_meal_and_date_range(day, make_row, make_rows):
+    rows = make_rows(5)
+    days = [datetime.date.fromisoformat(row[0]) for row in rows]
+    index = _index(*rows, make_row(day, patient="bob"))
+    assert _days(index.search("alice", "oats", meals=("breakfast_food",))) == days[::-1]
+    assert index.search("alice", "oats", meals=("lunch_food",)) == []
+    assert _days(index.search("alice", "oats", start=days[1], end=days[3])) == days[3:0:-1]
+    assert _days(index.search("bob", "oats")) == [day]
+
+
+def test_a_later_entry_for_the_same_day_replaces_its_words(day, make_row):
+    index = _index(make_row(day, dinner="pasta"))
+    index.add_frame(schema.to_frame([make_row(day, dinner="salad")]))
+    assert index.search("alice", "pasta") == []
+    [hit] = index.search("alice", "salad")
+    assert (hit.date, hit.meal, hit.text) == (day, "dinner_food", "salad")
@@ -0,0 +1,40 @@
+import pytest
+
+import metrics
+
+
+@pytest.fixture
+def enabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    metrics.reset()
+    yield
+    metrics.reset()
+
+
+def test_nothing_is_recorded_while_disabled(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    metrics.reset()
+    with metrics.timer("render"):
+        pass
+    metrics.count("logins")
+    assert metrics.snapshot() == []
+
+
+def test_timers_are_exported_as_cumulative_histograms(enabled):
+    metrics.observe(metrics._key("render", {"page": "doctor"}), 0.003)
+    metrics.observe(metrics._key("render", {"page": "doctor"}), 0.2)
+    text = metrics.render_prometheus()
+    assert "# TYPE diet_render_seconds histogram" in text
+    assert 'diet_render_seconds_bucket{page="doctor",le="0.005"} 1' in text
+    assert 'diet_render_seconds_bucket{page="doctor",le="0.25"} 2' in text
+    assert 'diet_render_seconds_count{page="doctor"} 2' in text
+
+
+def test_timed_blocks_and_counters_show_up_in_the_snapshot(enabled):
+    with pytest.raises(ValueError):
+        with metrics.timer("submit"):
+            raise ValueError("still recorded")
+    metrics.count("logins", outcome="ok")
+    rows = {row["metric"]: row for row in metrics.snapshot()}
+    assert rows["submit"]["calls"] == 1
+    assert rows["logins"]["calls"] == 1 and rows["logins"]["labels"] == '{outcome="ok"}'
@@ -0,0 +1,136 @@
+import time
+
+import notifications
+from fake_smtp import SMTPSink
+
+
+def _subjects(sink):
+    return [message["message"]["Subject"] for message in sink.messages]
+
+
+def test_digest_pending_email_is_sent_after_a_restart(tmp_path):
+    journal_path = str(tmp_path / "notify.journal")
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings, digest_interval=3600, journal_path=journal_path)
+        notifier.notify("New Diet Entry!", "Entry 1", key="a")
+        notifier.notify("New Diet Entry!", "Entry 2", key="b")
+        # Restart while the digest is still open.
+        notifier.stop()
+        assert sink.messages == []
+
+        notifier = notifications.Notifier(sink.settings, digest_interval=0, journal_path=journal_path)
+        assert notifier.flush(timeout=10)
+        notifier.stop()
+        assert sorted(_subjects(sink)) == ["New Diet Entry!", "New Diet Entry!"]
+
+        # Both are done now: another restart sends nothing.
+        notifier = notifications.Notifier(sink.settings, digest_interval=0, journal_path=journal_path)
+        assert notifier.pending_count() == 0
+        notifier.stop()
+
+
+def test_failed_send_stays_pending_across_restarts(tmp_path, monkeypatch):
+    journal_path = str(tmp_path / "notify.journal")
+    monkeypatch.setattr(notifications, "RETRY_SECONDS", 3600)
+
+    def unreachable():
+        settings = sink.settings()
+        settings["port"] = closed_port
+        return settings
+
+    with SMTPSink() as sink:
+        with SMTPSink() as closed:
+            closed_port = closed.port
+        notifier = notifications.Notifier(unreachable, journal_path=journal_path)
+        notifier.notify("New Diet Entry!", "Entry 1", key="a")
+        assert not notifier.flush(timeout=1)
+        assert notifier.last_error is not None
+        notifier.stop()
+
+        notifier = notifications.Notifier(sink.settings, journal_path=journal_path)
+        assert notifier.flush(timeout=10)
+        notifier.stop()
+        assert _subjects(sink) == ["New Diet Entry!"]
+
+
+def test_repeated_key_is_sent_once(tmp_path):
+    journal_path = str(tmp_path / "notify.journal")
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings, journal_path=journal_path)
+        notifier.notify("New Diet Entry!", "Entry 1", key="a")
+        assert notifier.flush(timeout=10)
+        notifier.notify("New Diet Entry!", "Entry 1", key="a")
+        assert notifier.flush(timeout=10)
+        notifier.stop()
+
+        notifier = notifications.Notifier(sink.settings, journal_path=journal_path)
+        notifier.notify("New Diet Entry!", "Entry 1", key="a")
+        assert notifier.flush(timeout=10)
+        notifier.stop()
+        assert len(sink.messages) == 1
+
+
+def test_idle_session_is_closed_without_holding_the_lock(monkeypatch):
+    monkeypatch.setattr(notifications, "SMTP_IDLE_SECONDS", 0.2)
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings)
+        notifier.notify("Hello", "body")
+        assert notifier.flush(timeout=10)
+        connection = notifier._connection
+        held = []
+        close = connection.close
+
+        def recording_close():
+            # _is_owned() is True only for the thread holding the condition.
+            held.append(notifier._cond._is_owned())
+            close()
+
+        connection.close = recording_close
+        deadline = time.monotonic() + 5
+        while not held and time.monotonic() < deadline:
+            time.sleep(0.05)
+        notifier.stop()
+        assert held and held[0] is False
+
+
+def test_notifications_share_one_smtp_session():
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings, digest_interval=0)
+        for i in range(10):
+            notifier.notify("New Diet Entry!", f"Entry {i + 1}")
+        assert notifier.flush(timeout=30)
+        connects = notifier._connection.connects
+        notifier.stop()
+    assert len(sink.messages) == 10 and connects == 1
+
+
+def test_digest_mode_groups_entries_into_one_email():
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings, digest_interval=3600)
+        for i in range(10):
+            notifier.notify("New Diet Entry!", f"Entry {i + 1}")
+        assert notifier.flush(timeout=30)
+        notifier.stop()
+    assert _subjects(sink) == ["10 New Diet Entries"]
+
+
+def test_failed_digest_is_retried_as_one_email(monkeypatch):
+    monkeypatch.setattr(notifications, "RETRY_SECONDS", 0.2)
+    attempts = []
+    send = notifications.SMTPConnection.send
+
+    def fail_once(connection, receiver, subject, body):
+        attempts.append(subject)
+        if len(attempts) == 1:
+            raise OSError("connection reset")
+        send(connection, receiver, subject, body)
+
+    monkeypatch.setattr(notifications.SMTPConnection, "send", fail_once)
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings, digest_interval=3600)
+        for i in range(3):
+            notifier.notify("New Diet Entry!", f"Entry {i + 1}")
+        assert notifier.flush(timeout=10)
+        notifier.stop()
+    assert attempts == ["3 New Diet Entries"] * 2
+    assert _subjects(sink) == ["3 New Diet Entries"]
@@ -0,0 +1,34 @@
+import os
+
+import pytest
+
+import nutrition
+
+
+@pytest.fixture(autouse=True)
+def matcher(monkeypatch):
+    # The app reads the food table relative to the repo root; load it by
+    # absolute path so the tests don't depend on the working directory.
+    path = os.path.join(os.path.dirname(nutrition.__file__), "food_table.csv")
+    monkeypatch.setattr(nutrition, "_matcher", nutrition.FoodMatcher.from_csv(path))
+
+
+def _foods(estimate):
+    return [(food.name, servings) for food, servings in estimate.items]
+
+
+def test_quantities_and_aliases_are_matched():
+    estimate = nutrition.estimate_meal("2 eggs and toast")
+    assert _foods(estimate) == [("egg", 2.0), ("bread", 1.0)]
+    assert estimate.kcal == pytest.approx(2 * 72 + 79)
+
+
+def test_unknown_words_are_reported_not_guessed():
+    estimate = nutrition.estimate_meal("Oatmeal, 1 apple and moonrocks")
+    assert _foods(estimate) == [("oats", 1.0), ("apple", 1.0)]
+    assert estimate.unmatched == ("moonrock",)
+
+
+def test_estimates_are_memoized_by_normalized_text():
+    assert nutrition.estimate_meal("Oatmeal") is nutrition.estimate_meal("  oatmeal ")
+    assert nutrition.estimate_meal(None) is nutrition.EMPTY_ESTIMATE
@@ -0,0 +1,45 @@
+import pyotp
+import pytest
+
+import otp_cache
+
+NOW = 1_700_000_000
+
+
+@pytest.fixture(autouse=True)
+def fresh_replay_records():
+    # The replay records are process-wide; each test starts without any.
+    with otp_cache._lock:
+        otp_cache._last_used.clear()
+    yield
+    with otp_cache._lock:
+        otp_cache._last_used.clear()
+
+
+def test_code_is_accepted_once():
+    secret = pyotp.random_base32()
+    code = pyotp.TOTP(secret).at(NOW)
+    assert otp_cache.verify("alice", secret, code, now=NOW)
+    assert not otp_cache.verify("alice", secret, code, now=NOW + 5)
+    assert otp_cache.verify("alice", secret, pyotp.TOTP(secret).at(NOW + 30), now=NOW + 30)
+
+
+def test_wrong_or_empty_codes_are_refused():
+    secret = pyotp.random_base32()
+    assert not otp_cache.verify("alice", secret, "", now=NOW)
+    assert not otp_cache.verify("alice", secret, pyotp.TOTP(secret).at(NOW - 60), now=NOW)
+
+
+def test_a_new_secret_is_not_blocked_by_the_old_ones_record():
+    old, new = pyotp.random_base32(), pyotp.random_base32()
+    assert otp_cache.verify("alice", old, pyotp.TOTP(old).at(NOW), now=NOW)
+    assert otp_cache.verify("alice", new, pyotp.TOTP(new).at(NOW), now=NOW)
+
+
+def test_qr_code_is_drawn_once_per_secret():
+    secret = pyotp.random_base32()
+    png = otp_cache.provisioning_qr("alice", secret, "Diet Tracker")
+    assert png.startswith(b"\x89PNG")
+    assert otp_cache.provisioning_qr("alice", secret, "Diet Tracker") is png
+    # A rotated secret gets a new code.
+    assert otp_cache.provisioning_qr("alice", pyotp.random_base32(), "Diet Tracker") != png
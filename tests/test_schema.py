@@ -0,0 +1,27 @@
+import schema
+from schema import DietEntry
+
+
+def test_rows_from_any_backend_parse_to_the_same_entry(day, make_row):
+    row = make_row(day, entry_id="a")
+    # Sheets hands every cell back as a string.
+    as_text = ["" if value is None else str(value) for value in row]
+    entry = DietEntry.from_row(row)
+    assert DietEntry.from_row(as_text) == entry
+    assert (entry.date, entry.sleep_hours, entry.patient) == (day, 7, "alice")
+    assert entry.to_row() == row
+
+
+def test_blank_or_bad_cells_become_none(day, make_row):
+    row = make_row(day)
+    row[1], row[4] = "", "lots"
+    entry = DietEntry.from_row(row)
+    assert entry.weight is None and entry.coffee_cups is None
+
+
+def test_chunks_append_without_losing_their_types(make_rows):
+    frame = schema.append_frame(schema.to_frame(make_rows(2)), schema.to_frame(make_rows(2, patient="bob")))
+    assert frame["Patient"].dtype == "category"
+    assert list(frame["Patient"]) == ["alice", "alice", "bob", "bob"]
+    assert schema.float_values(frame["Weight"]) == [70.0] * 4
+    assert [entry.entry_id for entry in schema.frame_entries(frame)] == ["alice0", "alice1", "bob0", "bob1"]
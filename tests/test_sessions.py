@@ -0,0 +1,121 @@
+import sqlite3
+
+import pytest
+
+import sessions
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "sqlite":
+        return sessions.SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    return sessions.MemorySessionBackend()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+def _manager(backend, clock):
+    return sessions.SessionManager(backend, ttl_seconds=30 * 60, max_age_seconds=12 * 3600, clock=clock)
+
+
+def test_token_resolves_to_its_session_for_its_app_only(backend, clock):
+    manager = _manager(backend, clock)
+    token = manager.create("patient_app", "alice", "patient")
+    session = manager.resolve(token, "patient_app")
+    assert (session.username, session.role) == ("alice", "patient")
+    assert manager.resolve(token, "doctor_app") is None
+
+
+def test_forged_or_mangled_tokens_are_rejected(backend, clock):
+    manager = _manager(backend, clock)
+    token = manager.create("patient_app", "alice", "patient")
+    session_id, _, signature = token.partition(".")
+    assert manager.resolve(session_id, "patient_app") is None
+    assert manager.resolve(f"{session_id}.{signature[::-1]}", "patient_app") is None
+    assert manager.resolve(None, "patient_app") is None
+    other = sessions.SessionManager(backend, signing_key=b"another key", clock=clock)
+    assert other.resolve(token, "patient_app") is None
+
+
+def test_idle_sessions_expire_and_activity_slides_the_expiry(backend, clock):
+    manager = _manager(backend, clock)
+    token = manager.create("patient_app", "alice", "patient")
+    clock.now += 20 * 60
+    assert manager.resolve(token, "patient_app") is not None
+    clock.now += 20 * 60  # 40 minutes after login, 20 after the last activity
+    assert manager.resolve(token, "patient_app") is not None
+    clock.now += 31 * 60
+    assert manager.resolve(token, "patient_app") is None
+
+
+def test_sessions_never_outlive_the_absolute_cap(backend, clock):
+    manager = _manager(backend, clock)
+    token = manager.create("patient_app", "alice", "patient")
+    for _ in range(12 * 4):
+        clock.now += 15 * 60
+        manager.resolve(token, "patient_app")
+    assert manager.resolve(token, "patient_app") is None
+
+
+def test_revoked_and_swept_sessions_are_gone(backend, clock):
+    manager = _manager(backend, clock)
+    revoked = manager.create("patient_app", "alice", "patient")
+    idle = manager.create("patient_app", "bob", "patient")
+    manager.revoke(revoked)
+    assert manager.resolve(revoked, "patient_app") is None
+    clock.now += 31 * 60
+    assert manager.sweep() == 1
+    assert manager.resolve(idle, "patient_app") is None
+
+
+def test_sqlite_sessions_survive_a_restart(tmp_path, clock):
+    path = str(tmp_path / "sessions.db")
+    token = _manager(sessions.SQLiteSessionBackend(path), clock).create("patient_app", "alice", "patient")
+    restarted = _manager(sessions.SQLiteSessionBackend(path), clock)
+    assert restarted.resolve(token, "patient_app").username == "alice"
+
+
+def test_token_only_resolves_for_the_client_it_was_issued_to(backend, clock):
+    manager = _manager(backend, clock)
+    token = manager.create("patient_app", "alice", "patient", client="phone")
+    assert manager.resolve(token, "patient_app", client="phone") is not None
+    assert manager.resolve(token, "patient_app", client="laptop") is None
+    assert manager.resolve(token, "patient_app") is None
+
+
+def test_rotation_revokes_the_old_token_and_keeps_the_cap(backend, clock):
+    manager = _manager(backend, clock)
+    created_at = clock.now
+    old = manager.create("patient_app", "alice", "patient", client="phone")
+    clock.now += 10 * 60
+    new = manager.rotate(manager.resolve(old, "patient_app", client="phone"))
+    assert manager.resolve(old, "patient_app", client="phone") is None
+    session = manager.resolve(new, "patient_app", client="phone")
+    assert (session.username, session.created_at) == ("alice", created_at)
+
+
+def test_default_absolute_cap_is_short():
+    assert sessions.SESSION_MAX_HOURS <= 4
+
+
+def test_sqlite_file_from_before_client_binding_is_migrated(tmp_path, clock):
+    path = str(tmp_path / "sessions.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE sessions (id TEXT PRIMARY KEY, app TEXT NOT NULL, username TEXT NOT NULL, "
+                 "role TEXT NOT NULL, created_at REAL NOT NULL, expires_at REAL NOT NULL)")
+    conn.commit()
+    conn.close()
+    manager = _manager(sessions.SQLiteSessionBackend(path), clock)
+    token = manager.create("patient_app", "alice", "patient", client="phone")
+    assert manager.resolve(token, "patient_app", client="phone").client == "phone"
@@ -0,0 +1,29 @@
+import fake_gspread
+import sheets_client
+
+
+def test_worksheet_handles_are_shared_across_calls(fake_sheets):
+    client = sheets_client.get_client()
+    opened = client.open_calls
+    for _ in range(3):
+        assert sheets_client.get_worksheet() is fake_sheets
+    assert client.open_calls == opened + 1
+
+
+def test_each_source_gets_its_own_client_until_reset():
+    built = []
+
+    def factory():
+        built.append(fake_gspread.FakeClient())
+        return built[-1]
+
+    sheets_client.use_client_factory(factory)
+    try:
+        assert sheets_client.get_client("secrets") is sheets_client.get_client("secrets")
+        assert sheets_client.get_client("keyfile") is not sheets_client.get_client("secrets")
+        sheets_client.reset("secrets")
+        sheets_client.get_client("secrets")
+        sheets_client.get_client("keyfile")
+        assert len(built) == 3
+    finally:
+        sheets_client.use_client_factory(None)
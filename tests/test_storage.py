@@ -0,0 +1,114 @@
+import datetime
+import sqlite3
+
+import storage
+
+
+def test_sheets_reads_follow_appended_rows(fake_sheets, make_rows):
+    entry_storage = storage.get_storage()
+    assert isinstance(entry_storage, storage.SheetsStorage)
+    entry_storage.append_rows(make_rows(3))
+    header, rows, cursor = entry_storage.read_since(None)
+    assert header == fake_sheets.get_all_values()[0]
+    assert len(rows) == 3 and cursor == 3
+
+    entry_storage.append_rows(make_rows(2, start=3))
+    _, rows, cursor = entry_storage.read_since(cursor)
+    assert [row[0] for row in rows] == ["2024-01-04", "2024-01-05"] and cursor == 5
+    assert fake_sheets.calls["get_values"] == 1
+
+
+def test_sqlite_reads_follow_appended_rows(sqlite_storage, make_rows):
+    assert isinstance(sqlite_storage, storage.SQLiteStorage)
+    assert sqlite_storage.append_rows(make_rows(3)) == [True] * 3
+    _, rows, cursor = sqlite_storage.read_since(None)
+    assert rows == make_rows(3)
+
+    sqlite_storage.append_rows(make_rows(1, start=3))
+    _, rows, cursor = sqlite_storage.read_since(cursor)
+    assert rows == make_rows(1, start=3)
+    _, rows, _ = sqlite_storage.read_since(cursor)
+    assert rows == []
+
+
+def test_sqlite_reads_one_patients_rows(sqlite_storage, make_rows):
+    sqlite_storage.append_rows(make_rows(2) + make_rows(3, patient="bob") + make_rows(1, start=2))
+    assert sqlite_storage.list_patients() == ["alice", "bob"]
+    _, rows, cursor = sqlite_storage.read_since(None, patient="alice")
+    assert rows == make_rows(3)
+    sqlite_storage.append_rows(make_rows(1, start=3, patient="bob"))
+    assert sqlite_storage.read_since(cursor, patient="alice")[1] == []
+
+
+def test_sheets_filters_patients_after_the_read(fake_sheets, make_rows):
+    entry_storage = storage.get_storage()
+    entry_storage.append_rows(make_rows(2) + make_rows(3, patient="bob"))
+    assert entry_storage.list_patients() == ["alice", "bob"]
+    _, rows, cursor = entry_storage.read_since(None, patient="bob")
+    assert rows == make_rows(3, patient="bob") and cursor == 5
+
+
+def test_sqlite_replayed_entry_id_is_stored_once(sqlite_storage, day, make_row):
+    row = make_row(day, entry_id="same")
+    assert sqlite_storage.append_rows([row]) == [True]
+    assert sqlite_storage.append_rows([row]) == [True]
+    _, rows, _ = sqlite_storage.read_since(None)
+    assert len(rows) == 1
+
+
+def test_sqlite_read_range_and_date_bounds(sqlite_storage, day, make_row):
+    sqlite_storage.append_rows([
+        make_row(day, entry_id="a"),
+        make_row(day + datetime.timedelta(days=40), entry_id="b"),
+        make_row(day + datetime.timedelta(days=5), patient="bob", entry_id="c"),
+    ])
+    assert sqlite_storage.date_bounds("alice") == (day, day + datetime.timedelta(days=40))
+    assert sqlite_storage.date_bounds("nobody") is None
+    _, rows = sqlite_storage.read_range("alice", day, day + datetime.timedelta(days=31))
+    assert [row[-1] for row in rows] == ["a"]
+
+
+def test_sheets_cursor_does_not_move_on_empty_polls(fake_sheets, make_rows):
+    entry_storage = storage.get_storage()
+    entry_storage.append_rows(make_rows(3))
+    _, rows, cursor = entry_storage.read_since(None)
+    assert len(rows) == 3 and cursor == 3
+    for _ in range(3):
+        # gspread returns [[]] for the empty range past the last row.
+        _, rows, cursor = entry_storage.read_since(cursor)
+        assert rows == [] and cursor == 3
+
+    entry_storage.append_rows(make_rows(1, start=3))
+    _, rows, cursor = entry_storage.read_since(cursor)
+    assert [row[0] for row in rows] == ["2024-01-04"] and cursor == 4
+
+
+def test_sheets_limited_reads_page_through_interior_blank_rows(fake_sheets, make_rows):
+    first, second = make_rows(2)
+    fake_sheets.append_rows([first, [""] * len(first), second])
+    entry_storage = storage.get_storage()
+    _, rows, cursor = entry_storage.read_since(None, limit=2)
+    assert len(rows) == 1 and cursor == 1  # the blank second row is read again next time
+    _, rows, cursor = entry_storage.read_since(cursor, limit=2)
+    assert [row[0] for row in rows] == ["2024-01-02"] and cursor == 3
+    _, rows, next_cursor = entry_storage.read_since(cursor, limit=2)
+    assert rows == [] and next_cursor == cursor
+
+
+def test_sqlite_file_from_before_patients_is_migrated(tmp_path, day, make_row):
+    path = str(tmp_path / "entries.db")
+    old_columns = [column for column in map(storage._sql_column, storage.ENTRY_COLUMNS)
+                   if column not in ("patient", "entry_id")]
+    conn = sqlite3.connect(path)
+    conn.execute(f"CREATE TABLE entries (id INTEGER PRIMARY KEY AUTOINCREMENT, {', '.join(old_columns)}, "
+                 "created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("CREATE INDEX idx_entries_date ON entries (date)")
+    conn.execute(f"INSERT INTO entries (date, {old_columns[1]}) VALUES (?, ?)", (str(day), 71.0))
+    conn.commit()
+    conn.close()
+    entry_storage = storage.SQLiteStorage(path)
+    entry_storage.append_rows([make_row(day, entry_id="a")])
+    _, rows, _ = entry_storage.read_since(None)
+    assert [row[0] for row in rows] == [str(day), str(day)]
+    _, rows, _ = entry_storage.read_since(None, patient="alice")
+    assert [row[-1] for row in rows] == ["a"]
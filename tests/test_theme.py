@@ -0,0 +1,25 @@
+import theme
+
+
+def test_full_themes_share_the_base_rules():
+    base = theme.minify(theme.BASE_CSS)
+    for name in ("patient", "doctor"):
+        assert theme.stylesheet(name).startswith(base)
+
+
+def test_minify_merges_adjacent_rules_and_drops_repeats():
+    css = """
+        /* comment */
+        a { color: red; }
+        a { color: blue; margin : 0 }
+        b { color: red }
+        b { color: red }
+    """
+    assert theme.minify(css) == "a{color:blue;margin:0}b{color:red}"
+
+
+def test_style_tag_puts_the_background_before_the_theme():
+    assert theme._style_tag("plain", None) == "<style></style>"
+    tag = theme._style_tag("doctor", "app/static/bg.webp")
+    assert tag.startswith('<style>.stApp{background-image:url("app/static/bg.webp");')
+    assert tag.endswith(theme.stylesheet("doctor") + "</style>")
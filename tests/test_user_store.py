@@ -0,0 +1,41 @@
+import json
+
+import pytest
+
+import user_store
+from user_store import UserStore
+
+
+@pytest.fixture
+def users_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(user_store, "CHECK_INTERVAL_SECONDS", 0)
+    path = tmp_path / "users.json"
+    path.write_text(json.dumps({
+        "alice": {"password": "hash-a", "role": "patient", "secret_key": "S1", "email": "a@example.com"},
+        "drbob": {"password": "hash-b", "role": "doctor", "otp_secret": "S2"},
+    }))
+    return path
+
+
+def test_users_are_read_as_records_with_dict_access(users_file):
+    store = UserStore(path=str(users_file))
+    assert store["alice"]["role"] == "patient" and store["alice"].get("email") == "a@example.com"
+    assert store.usernames(role="doctor") == ["drbob"]
+    assert "carol" not in store
+
+
+def test_update_rewrites_the_file_and_keeps_unknown_keys(users_file):
+    store = UserStore(path=str(users_file))
+    store.update("alice", password="hash-new")
+    saved = json.loads(users_file.read_text())["alice"]
+    assert saved == {"password": "hash-new", "role": "patient", "secret_key": "S1", "email": "a@example.com"}
+    assert store["alice"].password == "hash-new"
+
+
+def test_edits_made_on_disk_are_picked_up(users_file):
+    store = UserStore(path=str(users_file))
+    assert store["drbob"].otp_secret == "S2"
+    data = json.loads(users_file.read_text())
+    data["carol"] = {"password": "hash-c", "role": "patient", "secret_key": "S3"}
+    users_file.write_text(json.dumps(data))
+    assert store["carol"].secret_key == "S3"
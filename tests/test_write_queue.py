@@ -0,0 +1,150 @@
+import notifications
+import storage
+import write_queue
+from fake_smtp import SMTPSink
+from write_queue import WriteBehindQueue
+
+
+def _recorder(stored):
+    def store_rows(rows, maybe_written=False):
+        stored.extend(rows)
+        return [True] * len(rows)
+    return store_rows
+
+
+def test_replayed_job_whose_row_was_appended_before_the_crash_is_not_duplicated(fake_sheets, tmp_path, make_rows):
+    entry_storage = storage.get_storage()
+    journal = str(tmp_path / "entries.journal")
+    [row] = make_rows(1)
+
+    # First process: the row reaches the sheet, then the process dies before
+    # the journal records it as stored.
+    queue = WriteBehindQueue(journal, entry_storage.append_rows, start=False)
+    queue.submit(row, key=row[-1])
+    entry_storage.append_rows([row])
+    queue.stop()
+
+    queue = WriteBehindQueue(journal, entry_storage.append_rows)
+    assert queue.flush(timeout=10)
+    queue.stop()
+    assert [r[-1] for r in fake_sheets.get_all_values()[1:]] == [row[-1]]
+
+
+def test_journal_replay_stores_and_notifies_everything_once(fake_sheets, tmp_path, make_rows):
+    entry_storage = storage.get_storage()
+    journal = str(tmp_path / "entries.journal")
+    rows = make_rows(5)
+    with SMTPSink() as sink:
+        notifier = notifications.Notifier(sink.settings, journal_path=str(tmp_path / "notify.journal"))
+
+        # First process: entries are accepted, then it dies before the worker runs.
+        queue = WriteBehindQueue(journal, entry_storage.append_rows, notifier.notify, start=False)
+        for row in rows:
+            queue.submit(row, {"subject": "New Diet Entry!", "body": f"Entry {row[0]}"}, key=row[-1])
+        queue.stop()
+        assert fake_sheets.calls.get("append_rows", 0) == 0
+
+        queue = WriteBehindQueue(journal, entry_storage.append_rows, notifier.notify)
+        assert queue.flush(timeout=10)
+        assert notifier.flush(timeout=10)
+        queue.stop()
+        notifier.stop()
+
+        assert [r[-1] for r in fake_sheets.get_all_values()[1:]] == [row[-1] for row in rows]
+        # The replayed jobs are flushed together.
+        assert fake_sheets.calls["append_rows"] == 1
+        assert len(sink.messages) == 5
+
+        # A third start has nothing left to replay.
+        queue = WriteBehindQueue(journal, entry_storage.append_rows, start=False)
+        assert queue.pending_count() == 0
+        queue.stop()
+
+
+def test_submit_with_a_known_key_is_not_queued_again(tmp_path, make_rows):
+    stored = []
+    [row] = make_rows(1)
+    journal = str(tmp_path / "entries.journal")
+    queue = WriteBehindQueue(journal, _recorder(stored), batch_window=0)
+    assert queue.submit(row, key="a") == "a"
+    queue.submit(row, key="a")  # still pending or just done
+    assert queue.flush(timeout=10)
+    queue.submit(row, key="a")  # done
+    assert queue.flush(timeout=10)
+    queue.stop()
+
+    queue = WriteBehindQueue(journal, _recorder(stored), batch_window=0)
+    queue.submit(row, key="a")  # done before the restart
+    assert queue.flush(timeout=10)
+    queue.stop()
+    assert len(stored) == 1
+
+
+def test_failed_notification_is_retried_then_given_up(tmp_path, monkeypatch, make_rows):
+    monkeypatch.setattr(write_queue, "RETRY_BASE_SECONDS", 0.01)
+    attempts = []
+
+    def notify(subject, body, key=None):
+        attempts.append(key)
+        raise ConnectionRefusedError("SMTP server down")
+
+    stored = []
+    queue = WriteBehindQueue(str(tmp_path / "entries.journal"), _recorder(stored), notify, batch_window=0)
+    queue.submit(make_rows(1)[0], {"subject": "New Diet Entry!", "body": "Entry"}, key="a")
+    assert queue.flush(timeout=10)
+    queue.stop()
+
+    # The row is stored once; only the notification is retried.
+    assert len(stored) == 1
+    assert attempts == ["a"] * write_queue.NOTIFY_MAX_ATTEMPTS
+    assert isinstance(queue.last_error, ConnectionRefusedError)
+
+
+def test_only_rows_reported_unwritten_are_retried(tmp_path, monkeypatch, make_rows):
+    monkeypatch.setattr(write_queue, "RETRY_BASE_SECONDS", 0.01)
+    calls = []
+
+    def store_rows(rows, maybe_written=False):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            return [True, False, True]
+        return [True] * len(rows)
+
+    queue = WriteBehindQueue(str(tmp_path / "entries.journal"), store_rows, batch_window=60)
+    for row in make_rows(3):
+        queue.submit(row)
+    assert queue.flush(timeout=10)
+    queue.stop()
+    assert calls == [3, 1]
+
+
+def test_failed_rows_are_retried_as_maybe_written(tmp_path, monkeypatch, make_rows):
+    monkeypatch.setattr(write_queue, "RETRY_BASE_SECONDS", 0.01)
+    calls = []
+
+    def store_rows(rows, maybe_written=False):
+        calls.append((len(rows), maybe_written))
+        if len(calls) == 1:
+            raise TimeoutError("sheets timed out")
+        return [True] * len(rows)
+
+    queue = WriteBehindQueue(str(tmp_path / "entries.journal"), store_rows, batch_window=0)
+    queue.submit(make_rows(1)[0], key="a")
+    assert queue.flush(timeout=10)
+    queue.stop()
+    assert calls == [(1, False), (1, True)]
+
+
+def test_submissions_inside_the_window_share_one_batch(tmp_path, make_rows):
+    batches = []
+
+    def store_rows(rows, maybe_written=False):
+        batches.append(len(rows))
+        return [True] * len(rows)
+
+    queue = WriteBehindQueue(str(tmp_path / "entries.journal"), store_rows, batch_window=60)
+    for row in make_rows(10):
+        queue.submit(row)
+    assert queue.flush(timeout=10)
+    queue.stop()
+    assert batches == [10]